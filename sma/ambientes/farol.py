@@ -2,6 +2,7 @@ import numpy as np
 from typing import Tuple, List, Optional, Set
 from ..core.ambiente_base import Ambiente
 from ..core.tipos import Accao, TipoAccao
+from ..core.navegacao import DESLOCAMENTOS, MOVIMENTOS, celulas_vizinhanca
 
 
 class AmbienteFarol(Ambiente):
@@ -17,6 +18,7 @@ class AmbienteFarol(Ambiente):
         for ox, oy in self.obstaculos:
             if 0 <= ox < largura and 0 <= oy < altura:
                 self.matriz[oy, ox] = 2
+        self._bloqueado = self.matriz == 2
 
     def direcao_para_farol(self, pos_ag) -> Tuple[int, int]:
         dx = np.sign(self.pos_farol[0] - pos_ag[0])
@@ -26,12 +28,8 @@ class AmbienteFarol(Ambiente):
     def vizinhanca(self, pos, raio: int = 1, diagonais: bool = True, agente=None):
         """Retorna informações sobre as células ao redor do agente."""
         x, y = pos
-        dirs = [(0, -1), (0, 1), (1, 0), (-1, 0)]  # N, S, E, O
-        if diagonais:
-            dirs += [(1, 1), (1, -1), (-1, 1), (-1, -1)]  # NE, SE, NO, SO
-
         viz = {}
-        for dx, dy in dirs:
+        for dx, dy in celulas_vizinhanca(raio, diagonais):
             nx, ny = x + dx, y + dy
             if 0 <= nx < self.largura and 0 <= ny < self.altura:
                 # 0 = vazio, 2 = obstáculo, 1 = farol
@@ -48,16 +46,8 @@ class AmbienteFarol(Ambiente):
 
     def agir(self, accao: Accao, agente) -> float:
         x, y = agente.posicao
-        nx, ny = x, y
-
-        if accao.tipo == TipoAccao.MoverN:
-            ny = y - 1
-        elif accao.tipo == TipoAccao.MoverS:
-            ny = y + 1
-        elif accao.tipo == TipoAccao.MoverE:
-            nx = x + 1
-        elif accao.tipo == TipoAccao.MoverO:
-            nx = x - 1
+        dx, dy = MOVIMENTOS.get(accao.tipo, (0, 0))
+        nx, ny = x + dx, y + dy
 
         fora = not (0 <= nx < self.largura and 0 <= ny < self.altura)
         if fora or (nx, ny) in self.obstaculos:
@@ -69,5 +59,62 @@ class AmbienteFarol(Ambiente):
             return 99.0
         return -1.0
 
+    def agir_populacao(self, populacao) -> np.ndarray:
+        """
+        Versão vetorizada de `agir` para uma Populacao inteira: aplica
+        `populacao.ultima_accao` a todos os agentes e devolve as recompensas.
+        """
+        desloc = np.array(
+            [DESLOCAMENTOS.get(a, (0, 0)) for a in populacao.acoes], dtype=np.int32
+        )
+        novas = populacao.posicoes + desloc[populacao.ultima_accao]
+        nx, ny = novas[:, 0], novas[:, 1]
+        dentro = (nx >= 0) & (nx < self.largura) & (ny >= 0) & (ny < self.altura)
+        valido = dentro.copy()
+        valido[dentro] = ~self._bloqueado[ny[dentro], nx[dentro]]
+
+        populacao.posicoes[valido] = novas[valido]
+        no_farol = valido & (nx == self.pos_farol[0]) & (ny == self.pos_farol[1])
+        recompensas = np.where(valido, np.where(no_farol, 99.0, -1.0), -10.0)
+        if no_farol.any():
+            self.terminou = True
+        return recompensas
+
+    def tabela_transicoes(self, acoes: Tuple[TipoAccao, ...]):
+        """
+        Modelo completo do MDP (as mesmas regras de `agir`) para todas as células.
+
+        Devolve arrays [n_acoes, altura*largura] com o índice (y*largura + x)
+        da célula seguinte, a recompensa e se a transição termina o episódio.
+        As células com obstáculo são absorventes com recompensa 0.
+        """
+        n = self.altura * self.largura
+        celulas = np.arange(n)
+        ys, xs = np.divmod(celulas, self.largura)
+        bloqueado = np.zeros((self.altura, self.largura), dtype=bool)
+        for ox, oy in self.obstaculos:
+            if 0 <= ox < self.largura and 0 <= oy < self.altura:
+                bloqueado[oy, ox] = True
+        idx_farol = self.pos_farol[1] * self.largura + self.pos_farol[0]
+
+        proximo = np.empty((len(acoes), n), dtype=np.int64)
+        recompensa = np.empty((len(acoes), n))
+        terminal = np.empty((len(acoes), n), dtype=bool)
+        for i, accao in enumerate(acoes):
+            dx, dy = DESLOCAMENTOS.get(accao, (0, 0))
+            nx, ny = xs + dx, ys + dy
+            fora = (nx < 0) | (nx >= self.largura) | (ny < 0) | (ny >= self.altura)
+            nx, ny = np.clip(nx, 0, self.largura - 1), np.clip(ny, 0, self.altura - 1)
+            invalido = fora | bloqueado[ny, nx]
+            proximo[i] = np.where(invalido, celulas, ny * self.largura + nx)
+            terminal[i] = ~invalido & (proximo[i] == idx_farol)
+            recompensa[i] = np.where(invalido, -10.0, np.where(terminal[i], 99.0, -1.0))
+        # Obstáculos não são estados alcançáveis: ficam absorventes, com valor 0
+        obst = bloqueado.ravel()
+        proximo[:, obst] = celulas[obst]
+        recompensa[:, obst] = 0.0
+        terminal[:, obst] = True
+        return proximo, recompensa, terminal
+
     def atualizacao(self):
         pass
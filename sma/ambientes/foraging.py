@@ -1,7 +1,8 @@
 import numpy as np
-from typing import Dict, Tuple
-from ..core.ambiente_base import Ambiente
+from typing import Dict, Optional, Tuple
+from ..core.ambiente_base import Ambiente, EstadoAmbiente
 from ..core.tipos import Accao, TipoAccao
+from ..core.navegacao import MOVIMENTOS, celulas_vizinhanca
 
 
 class AmbienteForaging(Ambiente):
@@ -18,6 +19,8 @@ class AmbienteForaging(Ambiente):
         self.ninho = ninho
         self.recursos = dict(recursos)
         self.recursos_iniciais = dict(recursos)
+        # Ordem fixa dos recursos para a máscara em capturar/restaurar
+        self._ordem_recursos = tuple(self.recursos_iniciais.items())
         self.obstaculos = obstaculos if obstaculos else {}
         self.terminou = False
         self._ultimo_valor_depositado = 0.0
@@ -29,15 +32,21 @@ class AmbienteForaging(Ambiente):
             for (x, y), _ in obstaculos.items():
                 self.matriz[y, x] = 9
         self.matriz[ninho[1], ninho[0]] = 3
+        # Modelo do estado inicial, reposto no lugar em reiniciar()
+        self._matriz_inicial = self.matriz.copy()
+        # Só as células dos recursos mudam: restaurar() reescreve apenas essas
+        xs, ys = zip(*(p for p, _ in self._ordem_recursos)) if self._ordem_recursos else ((), ())
+        self._celulas_recursos = (np.array(ys, dtype=np.intp), np.array(xs, dtype=np.intp))
+        self._valores_celulas = self._matriz_inicial[self._celulas_recursos]
+        # Incrementada sempre que o conjunto de recursos muda (recolha, reinício, restauro)
+        self.versao = 0
+        self._mascara_atual: Optional[np.ndarray] = None
+        self._versao_mascara = -1
 
     def vizinhanca(self, pos, raio: int = 1, diagonais: bool = False, agente=None):
         x, y = pos
-        dirs = [(0, -1), (0, 1), (1, 0), (-1, 0)]
-        if diagonais:
-            dirs += [(1, 1), (1, -1), (-1, 1), (-1, -1)]
-
         viz = {}
-        for dx, dy in dirs:
+        for dx, dy in celulas_vizinhanca(raio, diagonais):
             nx, ny = x + dx, y + dy
             if 0 <= nx < self.largura and 0 <= ny < self.altura:
                 viz[(dx, dy)] = int(self.matriz[ny, nx])
@@ -66,25 +75,12 @@ class AmbienteForaging(Ambiente):
 
     def agir(self, accao: Accao, agente) -> float:
         x, y = agente.posicao
-        nx, ny = x, y
         recomp = -0.1
         self._ultimo_valor_depositado = 0.0
 
-        if accao.tipo in {
-            TipoAccao.MoverN,
-            TipoAccao.MoverS,
-            TipoAccao.MoverE,
-            TipoAccao.MoverO,
-            TipoAccao.Stay,
-        }:
-            if accao.tipo == TipoAccao.MoverN:
-                ny = y - 1
-            elif accao.tipo == TipoAccao.MoverS:
-                ny = y + 1
-            elif accao.tipo == TipoAccao.MoverE:
-                nx = x + 1
-            elif accao.tipo == TipoAccao.MoverO:
-                nx = x - 1
+        desloc = MOVIMENTOS.get(accao.tipo)
+        if desloc is not None:
+            nx, ny = x + desloc[0], y + desloc[1]
 
             fora = not (0 <= nx < self.largura and 0 <= ny < self.altura)
             obst = not fora and self.matriz[ny, nx] == 9
@@ -115,6 +111,7 @@ class AmbienteForaging(Ambiente):
             ):
                 val = self.recursos.pop(agente.posicao)
                 self.matriz[agente.posicao[1], agente.posicao[0]] = 0
+                self.versao += 1
                 agente.carregando = val
                 recomp += 5.0
             else:
@@ -142,3 +139,45 @@ class AmbienteForaging(Ambiente):
 
     def atualizacao(self):
         pass
+
+    def reiniciar(self, agentes=()):
+        super().reiniciar(agentes)
+        np.copyto(self.matriz, self._matriz_inicial)
+        self.recursos.clear()
+        self.recursos.update(self.recursos_iniciais)
+        self._ultimo_valor_depositado = 0.0
+        self.versao += 1
+
+    def capturar(self, agentes=()) -> EstadoAmbiente:
+        base = super().capturar(agentes)
+        mascara = np.fromiter(
+            (p in self.recursos for p, _ in self._ordem_recursos),
+            dtype=bool,
+            count=len(self._ordem_recursos),
+        )
+        self._mascara_atual, self._versao_mascara = mascara, self.versao
+        return base._replace(recursos=mascara)
+
+    def restaurar(self, estado: EstadoAmbiente, agentes=()):
+        """
+        Repõe o estado capturado. Os recursos só são reconstruídos se mudaram
+        desde a última captura/restauro deste estado, e a matriz é refeita a
+        partir da máscara e de `_matriz_inicial` só nas células dos recursos:
+        o custo nunca depende do tamanho do mapa.
+        """
+        super().restaurar(estado, agentes)
+        if estado.recursos is self._mascara_atual and self.versao == self._versao_mascara:
+            return
+        self.recursos.clear()
+        self.recursos.update(
+            (p, v) for (p, v), ativo in zip(self._ordem_recursos, estado.recursos.tolist()) if ativo
+        )
+        self.matriz[self._celulas_recursos] = np.where(estado.recursos, self._valores_celulas, 0)
+        self.versao += 1
+        self._mascara_atual, self._versao_mascara = estado.recursos, self.versao
+
+    def clonar(self) -> "AmbienteForaging":
+        novo = super().clonar()
+        novo.recursos = dict(self.recursos)
+        novo.matriz = self.matriz.copy()
+        return novo
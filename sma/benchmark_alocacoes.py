@@ -0,0 +1,95 @@
+"""
+Microbenchmark das alocações por passo: ações internadas (`Accao.de`) e
+observações com __slots__, comparadas com as dataclasses simples anteriores.
+
+    python -m sma.benchmark_alocacoes [-n 1000000]
+"""
+import argparse
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from sma.core.tipos import Accao, Observacao, TipoAccao
+from sma.core.navegacao import MOVIMENTOS
+from sma.ambientes.foraging import AmbienteForaging
+
+
+@dataclass
+class _AccaoAntiga:
+    tipo: TipoAccao
+    parametros: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class _ObservacaoAntiga:
+    dados: Any
+
+
+class _Agente:
+    def __init__(self):
+        self.posicao = (5, 5)
+        self.carregando = 0
+
+
+def _medir(criar, n: int):
+    """
+    (segundos, bytes alocados) para n passos. O tempo é medido sem tracemalloc;
+    a memória numa segunda passagem que mantém os objetos vivos.
+    """
+    inicio = time.perf_counter()
+    for i in range(n):
+        criar(i)
+    tempo = time.perf_counter() - inicio
+
+    guardados = [None] * n
+    tracemalloc.start()
+    for i in range(n):
+        guardados[i] = criar(i)
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return tempo, memoria
+
+
+def _linha(nome: str, n: int, tempo: float, memoria: int):
+    print(f"  {nome:<28} {tempo * 1e9 / n:8.1f} ns/passo  {memoria / 2**20:8.1f} MB")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Alocações por milhão de passos")
+    parser.add_argument("-n", type=int, default=1_000_000, help="numero de passos")
+    args = parser.parse_args(argv)
+    n = args.n
+    tipos = list(TipoAccao)
+    dados = {"viz": {}, "carregando": 0}
+
+    print(f"\nAcoes ({n} passos, objetos mantidos vivos)")
+    _linha("Accao(...) por passo", n, *_medir(lambda i: _AccaoAntiga(tipos[i % 7]), n))
+    _linha("Accao.de (internada)", n, *_medir(lambda i: Accao.de(tipos[i % 7]), n))
+
+    print(f"\nObservacoes ({n} passos)")
+    _linha("dataclass com __dict__", n, *_medir(lambda i: _ObservacaoAntiga(dados), n))
+    _linha("dataclass com __slots__", n, *_medir(lambda i: Observacao(dados), n))
+
+    print(f"\nDeslocamento da acao ({n} passos)")
+    def antigo(i):
+        # Como o AmbienteForaging.agir anterior: um set literal novo em cada chamada
+        return tipos[i % 7] in {
+            TipoAccao.MoverN, TipoAccao.MoverS, TipoAccao.MoverE, TipoAccao.MoverO, TipoAccao.Stay
+        }
+
+    _linha("set literal por passo", n, _medir(antigo, n)[0], 0)
+    _linha("tabela MOVIMENTOS", n, _medir(lambda i: MOVIMENTOS.get(tipos[i % 7]), n)[0], 0)
+
+    amb = AmbienteForaging(20, 20, (0, 0), {(3, 3): 5})
+    agente = _Agente()
+    accao = Accao.de(TipoAccao.Stay)
+    inicio = time.perf_counter()
+    for _ in range(n):
+        amb.agir(accao, agente)
+    print(f"\n  AmbienteForaging.agir (Stay): {(time.perf_counter() - inicio) * 1e9 / n:.1f} ns/passo")
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -178,6 +178,25 @@ def perguntar_snapshot_interval(episodios: int) -> int:
     return int(resposta)
 
 
+def perguntar_retomar_treino(ambiente: str) -> bool:
+    """Pergunta se o treino Q-Learning deve continuar a partir das Q-tables existentes."""
+    n_qtables = contar_qtables_disponiveis(ambiente)
+    if n_qtables == 0:
+        return False
+
+    resposta = questionary.confirm(
+        f"Continuar treino a partir das {n_qtables} Q-table(s) existentes?",
+        default=False,
+        style=CLI_STYLE,
+    ).ask()
+
+    if resposta is None:
+        print("\nOperacao cancelada.")
+        sys.exit(0)
+
+    return resposta
+
+
 def contar_qtables_disponiveis(ambiente: str) -> int:
     """Conta quantas Q-tables existem para o ambiente especificado."""
     base_path = Path(__file__).parent
@@ -326,6 +345,7 @@ def gerar_config_dinamico(
     max_passos: int,
     algoritmo: str = "qlearning",
     snapshot_interval: int = 0,
+    retomar: bool = False,
 ) -> Dict[str, Any]:
     """Gera configuracao dinamica baseada nas escolhas do utilizador."""
 
@@ -372,6 +392,7 @@ def gerar_config_dinamico(
     config["max_passos"] = max_passos
     config["visualizar"] = False
     config["snapshot_interval"] = snapshot_interval
+    config["retomar"] = retomar
 
     largura = config["ambiente"]["largura"]
     altura = config["ambiente"]["altura"]
@@ -449,6 +470,8 @@ def executar_simulacao(config: Dict[str, Any], graficos: List[str]):
     print(f"   Max passos: {config['max_passos']}")
     if config.get("snapshot_interval", 0) > 0:
         print(f"   Snapshot Q-table: a cada {config['snapshot_interval']} eps")
+    if config.get("retomar"):
+        print("   Retomar treino: sim")
     print("\n" + "-" * 50 + "\n")
 
     try:
@@ -841,8 +864,10 @@ def main():
     max_passos = perguntar_max_passos()
 
     snapshot_interval = 0
+    retomar = False
     if modo == "APRENDIZAGEM" and algoritmo == "qlearning":
         snapshot_interval = perguntar_snapshot_interval(episodios)
+        retomar = perguntar_retomar_treino(ambiente)
 
     graficos = perguntar_graficos()
 
@@ -855,6 +880,7 @@ def main():
         max_passos=max_passos,
         algoritmo=algoritmo,
         snapshot_interval=snapshot_interval,
+        retomar=retomar,
     )
 
     executar_simulacao(config, graficos)
@@ -21,10 +21,17 @@ def contar_qtables_disponiveis(ambiente: str) -> int:
     return sum(1 for _ in qtables_dir.glob(f"qtable_{prefixo}_*.json"))
 
 
-def executar_com_politica_fixa(cfg_path: str, num_episodios: int = 10):
-    """Executa simulação com política fixa."""
+def executar_com_politica_fixa(
+    cfg_path: str, num_episodios: int = 10, tipo_politica: str = "fixa_inteligente"
+):
+    """
+    Executa simulação com uma política de referência sem treino.
+
+    tipo_politica: "fixa_inteligente" (heurística) ou "iteracao_valor"
+    (política ótima do Farol, por iteração de valor).
+    """
     print("\n" + "="*70)
-    print("EXECUTANDO COM POLÍTICA FIXA")
+    print(f"EXECUTANDO COM POLÍTICA DE REFERÊNCIA ({tipo_politica})")
     print("="*70)
     
     with open(cfg_path, "r", encoding="utf-8") as f:
@@ -35,7 +42,7 @@ def executar_com_politica_fixa(cfg_path: str, num_episodios: int = 10):
     if isinstance(cfg_modificada.get("agentes"), list):
         for ag_cfg in cfg_modificada["agentes"]:
             ag_cfg["politica"] = {
-                "tipo": "fixa_inteligente"
+                "tipo": tipo_politica
             }
     
     cfg_modificada["modo_execucao"] = "TESTE"
@@ -200,6 +207,12 @@ def main():
         default=10,
         help="Número de episódios para teste (padrão: 10)"
     )
+    parser.add_argument(
+        "--referencia", "-r",
+        choices=["fixa_inteligente", "iteracao_valor"],
+        default="fixa_inteligente",
+        help="Política de referência (iteracao_valor: ótima, só FAROL)"
+    )
     
     args = parser.parse_args()
     
@@ -210,7 +223,8 @@ def main():
     
     stats_fixa, historico_fixa = executar_com_politica_fixa(
         str(cfg_path),
-        args.episodios
+        args.episodios,
+        args.referencia
     )
     
     stats_aprendida, historico_aprendida = executar_com_politica_aprendida(
@@ -0,0 +1,99 @@
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional
+from .navegacao import celulas_vizinhanca
+
+
+# Campos observados por tipo de agente e número de valores que cada um pode tomar.
+# "viz" é o número de valores por célula; "carregando" depende dos recursos do
+# mapa e é passado a tamanho_espaco() (sem ele o espaço é ilimitado).
+DOMINIOS = {
+    "FAROL": {"dir_farol": 9, "viz": 4, "no_farol": 2},
+    "FORAGER": {
+        "viz": 5,
+        "carregando": None,
+        "dir_ninho": 9,
+        "dist_ninho": 11,
+        "dir_recurso": 9,
+        "no_ninho": 2,
+        "no_recurso": 2,
+    },
+}
+
+
+class AbstracaoEstado:
+    """
+    Projeção declarativa da observação na chave de estado de um agente tabular.
+
+    - campos: campos da observação que formam o estado (None = todos)
+    - buckets: limites para discretizar campos numéricos, ex. {"dist_ninho": [2, 5]}
+    - sem_diagonais: descarta as células diagonais de "viz"
+    """
+
+    def __init__(
+        self,
+        campos: Optional[List[str]] = None,
+        buckets: Optional[Dict[str, List[float]]] = None,
+        sem_diagonais: bool = False,
+    ):
+        self.campos = list(campos) if campos else None
+        self.buckets = {c: sorted(lim) for c, lim in (buckets or {}).items()}
+        self.sem_diagonais = sem_diagonais
+
+    @staticmethod
+    def de_config(cfg: dict) -> "AbstracaoEstado":
+        return AbstracaoEstado(
+            campos=cfg.get("campos"),
+            buckets=cfg.get("buckets"),
+            sem_diagonais=cfg.get("sem_diagonais", False),
+        )
+
+    def para_dict(self) -> dict:
+        return {
+            "campos": self.campos,
+            "buckets": self.buckets,
+            "sem_diagonais": self.sem_diagonais,
+        }
+
+    def _valor(self, campo: str, v: Any) -> Any:
+        if campo in self.buckets:
+            return bisect_right(self.buckets[campo], v)
+        if campo == "viz" and isinstance(v, dict):
+            # Só os valores, na ordem fixa de vizinhanca(); (dx, dy) com um 0 é ortogonal
+            return tuple(c for d, c in v.items() if not self.sem_diagonais or 0 in d)
+        return v
+
+    def chave(self, dados: Any) -> str:
+        """Chave de estado (string, para poder ser guardada em JSON)."""
+        if not isinstance(dados, dict):
+            return repr(dados)
+        campos = self.campos if self.campos is not None else dados.keys()
+        return repr(tuple(self._valor(c, dados.get(c)) for c in campos))
+
+    def tamanho_espaco(
+        self,
+        tipo_agente: str,
+        diagonais: bool = True,
+        raio: int = 1,
+        dominios: Optional[Dict[str, int]] = None,
+    ) -> Optional[int]:
+        """
+        Limite superior do nº de estados, ou None se algum campo não for finito.
+        `raio`/`diagonais` são os do sensor que dá "viz"; `dominios` completa
+        ou substitui DOMINIOS (ex.: {"carregando": nº de valores possíveis}).
+        """
+        dominios = {**DOMINIOS.get(tipo_agente, {}), **(dominios or {})}
+        campos = self.campos if self.campos is not None else list(dominios)
+        total = 1
+        for campo in campos:
+            if campo in self.buckets:
+                total *= len(self.buckets[campo]) + 1
+            elif campo == "viz":
+                celulas = celulas_vizinhanca(raio, diagonais)
+                if self.sem_diagonais:
+                    celulas = [d for d in celulas if 0 in d]
+                total *= dominios["viz"] ** len(celulas)
+            elif dominios.get(campo):
+                total *= dominios[campo]
+            else:
+                return None
+        return total
@@ -0,0 +1,107 @@
+import math
+from typing import Optional
+
+
+class Agenda:
+    """Valor de um hiperparâmetro (epsilon, alfa) em função do episódio."""
+
+    tipo = "constante"
+
+    def __init__(self, inicial: float, final: Optional[float] = None):
+        self.inicial = inicial
+        self.final = inicial if final is None else final
+
+    def valor(self, episodio: int) -> float:
+        return self.inicial
+
+    def para_dict(self) -> dict:
+        return {"tipo": self.tipo, "inicial": self.inicial, "final": self.final}
+
+
+class AgendaLinear(Agenda):
+    """Interpola linearmente de `inicial` até `final` ao longo de `episodios`."""
+
+    tipo = "linear"
+
+    def __init__(self, inicial: float, final: float = 0.01, episodios: int = 1000):
+        super().__init__(inicial, final)
+        self.episodios = max(1, episodios)
+
+    def valor(self, episodio: int) -> float:
+        frac = min(1.0, episodio / self.episodios)
+        return self.inicial + (self.final - self.inicial) * frac
+
+    def para_dict(self) -> dict:
+        return {**super().para_dict(), "episodios": self.episodios}
+
+
+class AgendaExponencial(Agenda):
+    """Multiplica por `decaimento` a cada episódio, com mínimo `final`."""
+
+    tipo = "exponencial"
+
+    def __init__(self, inicial: float, final: float = 0.01, decaimento: float = 0.995):
+        super().__init__(inicial, final)
+        self.decaimento = decaimento
+
+    def valor(self, episodio: int) -> float:
+        return max(self.final, self.inicial * self.decaimento**episodio)
+
+    def para_dict(self) -> dict:
+        return {**super().para_dict(), "decaimento": self.decaimento}
+
+
+class AgendaDegrau(Agenda):
+    """Multiplica por `fator` a cada `intervalo` episódios, com mínimo `final`."""
+
+    tipo = "degrau"
+
+    def __init__(
+        self, inicial: float, final: float = 0.01, fator: float = 0.5, intervalo: int = 100
+    ):
+        super().__init__(inicial, final)
+        self.fator = fator
+        self.intervalo = max(1, intervalo)
+
+    def valor(self, episodio: int) -> float:
+        return max(self.final, self.inicial * self.fator ** (episodio // self.intervalo))
+
+    def para_dict(self) -> dict:
+        return {**super().para_dict(), "fator": self.fator, "intervalo": self.intervalo}
+
+
+class AgendaVisitas(Agenda):
+    """
+    Taxa de aprendizagem por par (estado, ação): alfa = inicial / n^expoente,
+    com n o número de visitas ao par e mínimo `final`.
+    """
+
+    tipo = "visitas"
+
+    def __init__(self, inicial: float, final: float = 0.01, expoente: float = 0.8):
+        super().__init__(inicial, final)
+        self.expoente = expoente
+
+    def valor_visitas(self, n: int) -> float:
+        return max(self.final, self.inicial / math.pow(max(1, n), self.expoente))
+
+    def para_dict(self) -> dict:
+        return {**super().para_dict(), "expoente": self.expoente}
+
+
+AGENDAS = {
+    cls.tipo: cls
+    for cls in (Agenda, AgendaLinear, AgendaExponencial, AgendaDegrau, AgendaVisitas)
+}
+
+
+def criar_agenda(cfg: Optional[dict], inicial: float) -> Optional[Agenda]:
+    """Cria uma agenda a partir da config; `inicial` é usado se a config não o definir."""
+    if not cfg:
+        return None
+    params = dict(cfg)
+    tipo = params.pop("tipo", "constante")
+    if tipo not in AGENDAS:
+        raise ValueError(f"Agenda desconhecida: {tipo}")
+    params.setdefault("inicial", inicial)
+    return AGENDAS[tipo](**params)
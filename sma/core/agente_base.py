@@ -1,8 +1,9 @@
 import threading
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 from .tipos import Observacao, Accao
 from .politicas import Politica
+from .sensores import PlanoObservacao
 
 
 class Agente(threading.Thread, ABC):
@@ -11,10 +12,11 @@ class Agente(threading.Thread, ABC):
         self.id = id_
         self.politica = politica
         self.sensores: List = []
+        self._plano: Optional[PlanoObservacao] = None
         self.posicao = (0, 0)
         self.posicao_inicial = (0, 0)
         self._observacao_atual = Observacao(dados=None)
-        self._accao_pronta = Accao(tipo=None)
+        self._accao_pronta = Accao.de(None)
         self._barreira_percepcao = None
         self._barreira_acao = None
         self._ativo = True
@@ -24,6 +26,8 @@ class Agente(threading.Thread, ABC):
 
     def instala(self, sensor):
         self.sensores.append(sensor)
+        # Com vários sensores a leitura é compilada num único plano
+        self._plano = PlanoObservacao(self.sensores) if len(self.sensores) > 1 else None
 
     def observar(self, ambiente) -> Observacao:
         if not self.sensores:
@@ -33,11 +37,9 @@ class Agente(threading.Thread, ABC):
             dados = self.sensores[0].ler(ambiente, self)
             return Observacao(dados=dados)
 
-        dados = {}
-        for i, sensor in enumerate(self.sensores):
-            nome = sensor.__class__.__name__
-            dados[f"{nome}_{i}"] = sensor.ler(ambiente, self)
-        return Observacao(dados=dados)
+        if self._plano is None or len(self._plano.sensores) != len(self.sensores):
+            self._plano = PlanoObservacao(self.sensores)
+        return Observacao(dados=self._plano.ler(ambiente, self))
 
     def observacao(self, obs: Observacao):
         self._observacao_atual = obs
@@ -1,7 +1,17 @@
-from typing import Any
+import copy
+import numpy as np
+from typing import Any, NamedTuple, Optional, Sequence, Tuple
 from .tipos import Observacao, Accao
 
 
+class EstadoAmbiente(NamedTuple):
+    """Fotografia compacta do estado mutável de um ambiente e dos seus agentes."""
+    posicoes: Tuple[Tuple[int, int], ...]
+    cargas: Tuple[int, ...]
+    terminou: bool
+    recursos: Optional[np.ndarray] = None  # máscara dos recursos ainda no mapa
+
+
 class Ambiente:
     """Classe base para ambientes."""
     
@@ -16,3 +26,31 @@ class Ambiente:
     def atualizacao(self):
         """Chamado no fim de cada passo."""
         pass
+
+    def reiniciar(self, agentes: Sequence[Any] = ()):
+        """Repõe o estado inicial do episódio (no lugar, sem recriar estruturas)."""
+        for a in agentes:
+            a.posicao = a.posicao_inicial
+            if hasattr(a, "carregando"):
+                a.carregando = 0
+        self.terminou = False
+
+    def capturar(self, agentes: Sequence[Any] = ()) -> EstadoAmbiente:
+        """Fotografia do estado atual (sem deepcopy), para `restaurar` mais tarde."""
+        return EstadoAmbiente(
+            tuple(a.posicao for a in agentes),
+            tuple(getattr(a, "carregando", 0) for a in agentes),
+            getattr(self, "terminou", False),
+        )
+
+    def restaurar(self, estado: EstadoAmbiente, agentes: Sequence[Any] = ()):
+        """Repõe o estado capturado (os agentes na mesma ordem da captura)."""
+        for a, pos, carga in zip(agentes, estado.posicoes, estado.cargas):
+            a.posicao = pos
+            if hasattr(a, "carregando"):
+                a.carregando = carga
+        self.terminou = estado.terminou
+
+    def clonar(self) -> "Ambiente":
+        """Cópia que partilha o mapa estático mas tem o seu próprio estado mutável."""
+        return copy.copy(self)
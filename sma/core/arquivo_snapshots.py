@@ -0,0 +1,235 @@
+"""
+Arquivo de snapshots de uma Q-table: uma tabela base mais deltas comprimidos.
+
+    <qtable>_snapshots/
+      indice.json     episódios arquivados, por ordem, e quais são bases
+      ep<N>.z         JSON comprimido com zlib: tabela completa (base) ou
+                      só as linhas alteradas/removidas desde o snapshot anterior
+
+Para ler um snapshot:
+    python -m sma.core.arquivo_snapshots DIR [--episodio N] [-o qtable.json]
+"""
+import argparse
+import json
+import os
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from .escritor import escrever_json_atomico
+
+# Campos guardados linha a linha (estado -> {ação: valor}); os restantes vão completos
+TABELAS = ("Q", "visitas")
+
+
+def _delta(anterior: dict, atual: dict) -> dict:
+    delta = {"outros": {k: v for k, v in atual.items() if k not in TABELAS}}
+    for t in TABELAS:
+        velha, nova = anterior.get(t, {}), atual.get(t, {})
+        delta[t] = {
+            "alteradas": {k: linha for k, linha in nova.items() if velha.get(k) != linha},
+            "removidas": [k for k in velha if k not in nova],
+        }
+    return delta
+
+
+def _aplicar(dados: dict, delta: dict) -> dict:
+    resultado = dict(delta["outros"])
+    for t in TABELAS:
+        tabela = dados.get(t, {})
+        for k in delta[t]["removidas"]:
+            tabela.pop(k, None)
+        tabela.update(delta[t]["alteradas"])
+        if tabela or t == "Q":
+            resultado[t] = tabela
+    return resultado
+
+
+def _compor(d1: dict, d2: dict) -> dict:
+    """Um delta equivalente a aplicar d1 e depois d2."""
+    composto = {"outros": d2["outros"]}
+    for t in TABELAS:
+        removidas = set(d2[t]["removidas"])
+        alteradas = {k: v for k, v in d1[t]["alteradas"].items() if k not in removidas}
+        alteradas.update(d2[t]["alteradas"])
+        removidas.update(k for k in d1[t]["removidas"] if k not in alteradas)
+        composto[t] = {"alteradas": alteradas, "removidas": sorted(removidas)}
+    return composto
+
+
+def episodios_a_manter(episodios: List[int], manter_ultimos: int) -> set:
+    """
+    Os últimos `manter_ultimos` episódios e, dos mais antigos, o primeiro de
+    cada intervalo de idade [2^k, 2^(k+1)) contado a partir do mais recente.
+    """
+    if not episodios:
+        return set()
+    manter = set(episodios[-manter_ultimos:])
+    ref = episodios[-1]
+    baldes = set()
+    for ep in episodios[:-manter_ultimos]:
+        balde = (ref - ep).bit_length()
+        if balde not in baldes:
+            baldes.add(balde)
+            manter.add(ep)
+    return manter
+
+
+class ArquivoSnapshots:
+    """
+    Snapshots de uma Q-table num só diretório: cada snapshot guarda apenas as
+    linhas que mudaram desde o anterior, com uma base completa a cada
+    `intervalo_base` snapshots para limitar o custo de reconstrução.
+
+    A retenção mantém os últimos `manter_ultimos` snapshots e um por cada
+    intervalo de idade logarítmico (None = manter todos). Ao apagar um
+    snapshot o seu delta é composto com o seguinte, para que todos os
+    restantes continuem reconstruíveis.
+    """
+
+    INDICE = "indice.json"
+
+    def __init__(
+        self,
+        diretorio: str,
+        manter_ultimos: Optional[int] = 5,
+        intervalo_base: int = 10,
+        nivel: int = 6,
+    ):
+        self.diretorio = Path(diretorio)
+        self.manter_ultimos = manter_ultimos if manter_ultimos is None else max(1, manter_ultimos)
+        self.intervalo_base = max(1, intervalo_base)
+        self.nivel = nivel
+        self.entradas: List[dict] = []  # {"episodio", "ficheiro", "base"} por ordem
+        self._ultimo: Optional[dict] = None  # último snapshot completo, para o próximo delta
+        # Destino das mensagens (o simulador usa a fila do escritor de fundo)
+        self.avisar: Callable[[str], None] = print
+        indice = self.diretorio / self.INDICE
+        if indice.exists():
+            with open(indice, "r", encoding="utf-8") as f:
+                self.entradas = json.load(f)["entradas"]
+
+    @staticmethod
+    def de_config(diretorio: str, cfg: dict) -> "ArquivoSnapshots":
+        return ArquivoSnapshots(
+            diretorio,
+            manter_ultimos=cfg.get("manter_ultimos", 5),
+            intervalo_base=cfg.get("intervalo_base", 10),
+            nivel=cfg.get("nivel_compressao", 6),
+        )
+
+    def episodios(self) -> List[int]:
+        return [e["episodio"] for e in self.entradas]
+
+    def _ler(self, entrada: dict) -> dict:
+        with open(self.diretorio / entrada["ficheiro"], "rb") as f:
+            return json.loads(zlib.decompress(f.read()))
+
+    def _escrever(self, entrada: dict, conteudo: dict) -> int:
+        bruto = zlib.compress(json.dumps(conteudo, separators=(",", ":")).encode("utf-8"), self.nivel)
+        caminho = self.diretorio / entrada["ficheiro"]
+        tmp = caminho.with_name(caminho.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(bruto)
+        os.replace(tmp, caminho)
+        return len(bruto)
+
+    def _guardar_indice(self):
+        escrever_json_atomico(str(self.diretorio / self.INDICE), {"entradas": self.entradas}, indent=1)
+
+    def reconstruir(self, episodio: int) -> dict:
+        """Tabela completa (como escrita por `guardar`) do snapshot do episódio."""
+        eps = self.episodios()
+        if episodio not in eps:
+            raise KeyError(f"snapshot do episodio {episodio} nao existe em {self.diretorio}")
+        i = eps.index(episodio)
+        j = max(k for k in range(i + 1) if self.entradas[k]["base"])
+        dados = self._ler(self.entradas[j])
+        for entrada in self.entradas[j + 1 : i + 1]:
+            dados = _aplicar(dados, self._ler(entrada))
+        return dados
+
+    def adicionar(self, episodio: int, dados: dict):
+        """Arquiva o snapshot `dados` (dict de PoliticaQLearning.estado_guardar)."""
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        futuros = [e for e in self.entradas if e["episodio"] >= episodio]
+        if futuros:
+            # Treino retomado de um snapshot anterior: o histórico seguinte deixa de valer
+            self.avisar(f"Aviso: a descartar {len(futuros)} snapshot(s) a partir do episodio {episodio} em {self.diretorio}")
+            for e in futuros:
+                (self.diretorio / e["ficheiro"]).unlink(missing_ok=True)
+            self.entradas = self.entradas[: len(self.entradas) - len(futuros)]
+            self._ultimo = None
+        if self.entradas and self._ultimo is None:
+            self._ultimo = self.reconstruir(self.entradas[-1]["episodio"])
+
+        desde_base = 0
+        for e in reversed(self.entradas):
+            if e["base"]:
+                break
+            desde_base += 1
+        base = not self.entradas or desde_base + 1 >= self.intervalo_base
+        entrada = {"episodio": episodio, "ficheiro": f"ep{episodio}.z", "base": base}
+        tamanho = self._escrever(entrada, dados if base else _delta(self._ultimo, dados))
+        self.entradas.append(entrada)
+        self._ultimo = dados
+        self._aplicar_retencao()
+        self._guardar_indice()
+        tipo = "base" if base else "delta"
+        self.avisar(f"Snapshot arquivado: {self.diretorio.name}/ep{episodio} ({tipo}, {tamanho / 1024:.1f} KB)")
+
+    def _aplicar_retencao(self):
+        if self.manter_ultimos is None:
+            return
+        manter = episodios_a_manter(self.episodios(), self.manter_ultimos)
+        i = 0
+        while i < len(self.entradas) - 1:
+            if self.entradas[i]["episodio"] in manter:
+                i += 1
+                continue
+            self._remover(i)
+
+    def _remover(self, i: int):
+        """Apaga a entrada i (não a última), passando o seu conteúdo para a seguinte."""
+        atual, seguinte = self.entradas[i], self.entradas[i + 1]
+        if not seguinte["base"]:
+            if atual["base"]:
+                conteudo = self.reconstruir(seguinte["episodio"])
+                seguinte["base"] = True
+            else:
+                conteudo = _compor(self._ler(atual), self._ler(seguinte))
+            self._escrever(seguinte, conteudo)
+        (self.diretorio / atual["ficheiro"]).unlink(missing_ok=True)
+        del self.entradas[i]
+
+    def tamanho_disco(self) -> int:
+        return sum((self.diretorio / e["ficheiro"]).stat().st_size for e in self.entradas)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Listar ou extrair snapshots de um arquivo")
+    parser.add_argument("diretorio", help="diretorio qtable_<id>_snapshots")
+    parser.add_argument("--episodio", "-e", type=int, help="snapshot a extrair")
+    parser.add_argument("--output", "-o", type=str, help="ficheiro JSON de destino")
+    args = parser.parse_args(argv)
+
+    arquivo = ArquivoSnapshots(args.diretorio)
+    if args.episodio is None:
+        for e in arquivo.entradas:
+            tamanho = (arquivo.diretorio / e["ficheiro"]).stat().st_size
+            print(f"  ep{e['episodio']:<8} {'base' if e['base'] else 'delta':<6} {tamanho / 1024:8.1f} KB")
+        print(f"Total: {len(arquivo.entradas)} snapshot(s), {arquivo.tamanho_disco() / 1024:.1f} KB")
+        return 0
+    try:
+        dados = arquivo.reconstruir(args.episodio)
+    except KeyError as e:
+        print(f"Erro: {e.args[0]}")
+        return 1
+    destino = args.output or f"{arquivo.diretorio.name.replace('_snapshots', '')}_ep{args.episodio}.json"
+    escrever_json_atomico(destino, dados, indent=2)
+    print(f"Snapshot extraido: {destino} ({len(dados.get('Q', {}))} estados)")
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
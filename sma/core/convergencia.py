@@ -0,0 +1,119 @@
+from typing import Dict, List, Optional
+
+
+class MonitorConvergencia:
+    """
+    Deteta a convergência do treino para permitir paragem antecipada.
+
+    Em cada episódio avalia os critérios configurados (os que forem None
+    ficam desativados):
+      - taxa_sucesso_min: taxa de sucesso média na janela >= valor
+      - tolerancia_recompensa: variação da recompensa média da janela <= valor
+      - tolerancia_q: maior variação de um valor Q no episódio <= valor
+      - tolerancia_fitness: melhoria do melhor fitness genético <= valor
+
+    O treino para quando todos os critérios ativos se mantêm durante
+    `paciencia` episódios seguidos. Critérios sem políticas a que se apliquem
+    (tolerancia_q sem Q-tables, tolerancia_fitness sem genéticas) são
+    ignorados, com um aviso.
+    """
+
+    def __init__(
+        self,
+        janela: int = 50,
+        paciencia: int = 20,
+        taxa_sucesso_min: Optional[float] = None,
+        tolerancia_recompensa: Optional[float] = None,
+        tolerancia_q: Optional[float] = None,
+        tolerancia_fitness: Optional[float] = None,
+    ):
+        self.janela = janela
+        self.paciencia = paciencia
+        self.taxa_sucesso_min = taxa_sucesso_min
+        self.tolerancia_recompensa = tolerancia_recompensa
+        self.tolerancia_q = tolerancia_q
+        self.tolerancia_fitness = tolerancia_fitness
+
+        self.taxa_sucesso = 0.0
+        self.recompensa_media = 0.0
+        self._media_anterior: Optional[float] = None
+        self._melhor_fitness: Dict[int, float] = {}
+        self._estaveis = 0
+        self._avisados: set = set()
+
+    def _aviso_sem_politicas(self, criterio: str, tipo: str):
+        if criterio not in self._avisados:
+            self._avisados.add(criterio)
+            print(f"Aviso: criterio de convergencia {criterio} ignorado (nenhuma politica {tipo})")
+
+    @staticmethod
+    def de_config(cfg: dict) -> "MonitorConvergencia":
+        return MonitorConvergencia(
+            janela=cfg.get("janela", 50),
+            paciencia=cfg.get("paciencia", 20),
+            taxa_sucesso_min=cfg.get("taxa_sucesso_min"),
+            tolerancia_recompensa=cfg.get("tolerancia_recompensa"),
+            tolerancia_q=cfg.get("tolerancia_q"),
+            tolerancia_fitness=cfg.get("tolerancia_fitness"),
+        )
+
+    def _melhoria_fitness(self, politicas: List) -> Optional[float]:
+        """Maior melhoria do melhor fitness, ou None se nenhuma política for genética."""
+        if not any(hasattr(pol, "melhor_fitness") for pol in politicas):
+            return None
+        melhoria = 0.0
+        for pol in politicas:
+            atual = getattr(pol, "melhor_fitness", None)
+            if atual is None or atual == float("-inf"):
+                continue
+            anterior = self._melhor_fitness.get(id(pol))
+            if anterior is not None:
+                melhoria = max(melhoria, atual - anterior)
+            else:
+                melhoria = float("inf")
+            self._melhor_fitness[id(pol)] = atual
+        return melhoria
+
+    def registar_episodio(self, historico: List, politicas: List) -> Optional[str]:
+        """Avalia o episódio acabado de fechar; devolve o motivo de paragem ou None."""
+        recentes = historico[-self.janela :]
+        self.taxa_sucesso = sum(1 for ep in recentes if ep.sucesso) / len(recentes)
+        media = sum(ep.recompensa_total for ep in recentes) / len(recentes)
+        media_anterior, self._media_anterior = self._media_anterior, media
+        self.recompensa_media = media
+        melhoria = self._melhoria_fitness(politicas)
+
+        if len(historico) < self.janela:
+            return None
+
+        criterios = []
+        if self.taxa_sucesso_min is not None:
+            criterios.append(self.taxa_sucesso >= self.taxa_sucesso_min)
+        if self.tolerancia_recompensa is not None:
+            criterios.append(
+                media_anterior is not None
+                and abs(media - media_anterior) <= self.tolerancia_recompensa
+            )
+        if self.tolerancia_q is not None:
+            deltas = [
+                pol.ultimo_delta_q for pol in politicas if hasattr(pol, "ultimo_delta_q")
+            ]
+            if deltas:
+                criterios.append(max(deltas) <= self.tolerancia_q)
+            else:
+                self._aviso_sem_politicas("tolerancia_q", "com Q-table")
+        if self.tolerancia_fitness is not None:
+            if melhoria is not None:
+                criterios.append(melhoria <= self.tolerancia_fitness)
+            else:
+                self._aviso_sem_politicas("tolerancia_fitness", "genetica")
+
+        self._estaveis = self._estaveis + 1 if criterios and all(criterios) else 0
+        if self._estaveis < self.paciencia:
+            return None
+
+        return (
+            f"convergencia (taxa_sucesso={self.taxa_sucesso:.2f}, "
+            f"recompensa_media={self.recompensa_media:.2f}, "
+            f"estavel durante {self._estaveis} episodios)"
+        )
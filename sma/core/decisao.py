@@ -0,0 +1,32 @@
+from typing import Dict, List, Sequence
+from .tipos import Accao
+
+
+def selecionar_acoes_em_lote(agentes: Sequence) -> List[Accao]:
+    """
+    Decide a ação de vários agentes, agrupados pela classe da política.
+
+    Classes com `selecionar_acoes_batch(politicas, estados)` recebem o grupo
+    inteiro numa só chamada (ex.: um produto matricial para todas as
+    políticas genéticas); as restantes decidem agente a agente com `age()`.
+    Usa a observação atual de cada agente e devolve as ações pela ordem
+    de `agentes`.
+    """
+    grupos: Dict[type, List[int]] = {}
+    for i, ag in enumerate(agentes):
+        grupos.setdefault(type(ag.politica), []).append(i)
+
+    accoes: List[Accao] = [None] * len(agentes)
+    for classe, indices in grupos.items():
+        lote = getattr(classe, "selecionar_acoes_batch", None)
+        if lote is None:
+            for i in indices:
+                accoes[i] = agentes[i].age()
+            continue
+        escolhas = lote(
+            [agentes[i].politica for i in indices],
+            [agentes[i]._observacao_atual for i in indices],
+        )
+        for i, accao in zip(indices, escolhas):
+            accoes[i] = accao
+    return accoes
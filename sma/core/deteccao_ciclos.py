@@ -0,0 +1,58 @@
+import numpy as np
+
+
+class DetetorCiclos:
+    """
+    Deteta agentes presos: a oscilar entre células ou a empurrar uma parede.
+
+    Para cada agente guarda, numa janela circular, o código dos últimos
+    `janela` estados (posição, carga). Quando o estado atual aparece
+    `repeticoes` vezes na janela o agente é dado como preso, e:
+      - acao "terminar": o episódio acaba logo (sem sucesso)
+      - acao "marcar": o agente fica parado até ao fim do episódio e o
+        episódio acaba quando todos os agentes estiverem presos
+    """
+
+    ACOES = ("terminar", "marcar")
+
+    def __init__(self, janela: int = 8, repeticoes: int = 4, acao: str = "terminar"):
+        if acao not in self.ACOES:
+            raise ValueError(f"Acao de deteccao de ciclos desconhecida: {acao}")
+        self.janela = max(2, janela)
+        self.repeticoes = max(2, min(repeticoes, self.janela))
+        self.acao = acao
+        self._estados = np.empty((0, self.janela), dtype=np.int64)
+        self.presos = np.zeros(0, dtype=bool)
+        self._passo = 0
+
+    @staticmethod
+    def de_config(cfg: dict) -> "DetetorCiclos":
+        return DetetorCiclos(
+            janela=cfg.get("janela", 8),
+            repeticoes=cfg.get("repeticoes", 4),
+            acao=cfg.get("acao", "terminar"),
+        )
+
+    def reiniciar(self, n_agentes: int):
+        self._estados = np.full((n_agentes, self.janela), -1, dtype=np.int64)
+        self.presos = np.zeros(n_agentes, dtype=bool)
+        self._passo = 0
+
+    def registar(self, posicoes: np.ndarray, cargas: np.ndarray) -> np.ndarray:
+        """
+        Regista o estado de todos os agentes após um passo e devolve a máscara
+        dos que ficaram presos neste passo.
+        """
+        posicoes = np.asarray(posicoes, dtype=np.int64)
+        codigos = (np.asarray(cargas, dtype=np.int64) << 32) | (posicoes[:, 1] << 16) | posicoes[:, 0]
+        self._estados[:, self._passo % self.janela] = codigos
+        self._passo += 1
+        repetidos = (self._estados == codigos[:, None]).sum(axis=1)
+        novos = (repetidos >= self.repeticoes) & ~self.presos
+        self.presos |= novos
+        return novos
+
+    def terminar_episodio(self) -> bool:
+        if not self.presos.any():
+            return False
+        return self.acao == "terminar" or bool(self.presos.all())
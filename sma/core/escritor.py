@@ -0,0 +1,104 @@
+import json
+import os
+import queue
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+
+def escrever_json_atomico(caminho: str, dados: dict, indent: Optional[int] = None):
+    """Escreve JSON num ficheiro temporário e troca-o pelo destino (rename atómico)."""
+    Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+    tmp = f"{caminho}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(dados, f, indent=indent)
+    os.replace(tmp, caminho)
+
+
+class EscritorAssincrono:
+    """
+    Escreve políticas e snapshots em disco numa thread de fundo.
+
+    O ciclo principal só copia o estado para um dict (`submeter`); a
+    serialização JSON e a escrita ficam nesta thread. A fila é limitada a
+    `max_pendentes` escritas: se o disco não acompanhar, `submeter` bloqueia
+    em vez de acumular cópias em memória. Com max_pendentes=0 as escritas
+    são síncronas.
+
+    A thread de escrita não imprime: as mensagens ficam numa fila que o
+    ciclo principal mostra entre episódios (`mostrar_mensagens`).
+    """
+
+    def __init__(self, max_pendentes: int = 4):
+        self.max_pendentes = max_pendentes
+        self._fila: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self.escritas = 0
+        self.erros = 0
+        self._mensagens: deque = deque()
+
+    def _iniciar(self):
+        self._fila = queue.Queue(maxsize=self.max_pendentes)
+        self._thread = threading.Thread(target=self._correr, daemon=True)
+        self._thread.start()
+
+    def submeter(self, caminho: str, dados: dict, indent: Optional[int] = None, mensagem: str = ""):
+        """Agenda a escrita de `dados` (já copiados) em `caminho`."""
+        self.executar(self.escrever, caminho, dados, indent, mensagem)
+
+    def executar(self, funcao, *args):
+        """Agenda `funcao(*args)` na thread de escrita, pela ordem de chegada."""
+        if self.max_pendentes <= 0:
+            funcao(*args)
+            return
+        if self._thread is None:
+            self._iniciar()
+        self._fila.put((funcao, args))
+
+    def escrever(self, caminho: str, dados: dict, indent: Optional[int] = None, mensagem: str = ""):
+        """Escreve já (na thread que chama), contando escritas e erros."""
+        try:
+            escrever_json_atomico(caminho, dados, indent)
+            self.escritas += 1
+            if mensagem:
+                self.avisar(mensagem)
+        except (OSError, TypeError, ValueError) as e:
+            self.erros += 1
+            self.avisar(f"Erro ao escrever {caminho}: {e}")
+
+    def avisar(self, mensagem: str):
+        """Guarda uma mensagem para o ciclo principal mostrar."""
+        self._mensagens.append(mensagem)
+
+    def mostrar_mensagens(self):
+        """Imprime (na thread que chama) as mensagens pendentes da thread de escrita."""
+        while self._mensagens:
+            print(self._mensagens.popleft())
+
+    def _correr(self):
+        while True:
+            trabalho = self._fila.get()
+            try:
+                if trabalho is None:
+                    return
+                funcao, args = trabalho
+                funcao(*args)
+            except Exception as e:
+                # Um trabalho falhado não pode parar a thread: aguardar()/submeter() ficariam bloqueados
+                self.erros += 1
+                self.avisar(f"Erro na escrita em fundo: {type(e).__name__}: {e}")
+            finally:
+                self._fila.task_done()
+
+    def aguardar(self):
+        """Bloqueia até todas as escritas pendentes estarem em disco."""
+        if self._fila is not None:
+            self._fila.join()
+
+    def fechar(self):
+        if self._thread is not None:
+            self._fila.put(None)
+            self._thread.join()
+            self._thread = None
+            self._fila = None
@@ -0,0 +1,76 @@
+import numpy as np
+from functools import lru_cache
+from typing import Dict, Iterable, Tuple
+from .tipos import TipoAccao
+
+
+# Deslocamento (dx, dy) de cada ação de movimento; as restantes ficam no lugar
+DESLOCAMENTOS: Dict[TipoAccao, Tuple[int, int]] = {
+    TipoAccao.MoverN: (0, -1),
+    TipoAccao.MoverS: (0, 1),
+    TipoAccao.MoverE: (1, 0),
+    TipoAccao.MoverO: (-1, 0),
+}
+
+# Ações que tentam ocupar uma célula (os movimentos e ficar no lugar)
+MOVIMENTOS: Dict[TipoAccao, Tuple[int, int]] = {**DESLOCAMENTOS, TipoAccao.Stay: (0, 0)}
+
+
+@lru_cache(maxsize=None)
+def celulas_vizinhanca(raio: int = 1, diagonais: bool = True) -> Tuple[Tuple[int, int], ...]:
+    """
+    Deslocamentos (dx, dy) lidos por `vizinhanca()`, por ordem fixa: as
+    células à distância 1 (N, S, E, O e, com diagonais, NE, SE, NO, SO) e
+    depois as restantes até `raio`. Com diagonais é o quadrado de lado
+    2*raio+1; sem diagonais só as linhas e colunas do agente.
+    """
+    if raio < 1:
+        return ()
+    celulas = [(0, -1), (0, 1), (1, 0), (-1, 0)]
+    if diagonais:
+        celulas += [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+    for dy in range(-raio, raio + 1):
+        for dx in range(-raio, raio + 1):
+            if (dx, dy) == (0, 0) or (dx, dy) in celulas:
+                continue
+            if diagonais or dx == 0 or dy == 0:
+                celulas.append((dx, dy))
+    return tuple(celulas)
+
+
+def campo_distancias(bloqueado: np.ndarray, alvos: Iterable[Tuple[int, int]]) -> np.ndarray:
+    """
+    Distância BFS (nº de movimentos N/S/E/O) de cada célula ao alvo mais próximo.
+
+    `bloqueado` é uma matriz booleana [altura, largura]; células bloqueadas ou
+    sem caminho ficam a -1. A pesquisa avança por níveis sobre os índices da
+    fronteira, pelo que o custo é proporcional ao nº de células e não ao
+    nº de níveis × tamanho da grelha.
+    """
+    altura, largura = bloqueado.shape
+    livre = ~bloqueado.ravel()
+    dist = np.full(altura * largura, -1, dtype=np.int32)
+
+    fronteira = np.array(
+        [y * largura + x for x, y in alvos if 0 <= x < largura and 0 <= y < altura],
+        dtype=np.int64,
+    )
+    fronteira = fronteira[livre[fronteira]] if len(fronteira) else fronteira
+    dist[fronteira] = 0
+
+    d = 0
+    while len(fronteira):
+        d += 1
+        x = fronteira % largura
+        vizinhos = np.concatenate(
+            [
+                fronteira[fronteira >= largura] - largura,
+                fronteira[fronteira < (altura - 1) * largura] + largura,
+                fronteira[x < largura - 1] + 1,
+                fronteira[x > 0] - 1,
+            ]
+        )
+        vizinhos = vizinhos[livre[vizinhos] & (dist[vizinhos] < 0)]
+        fronteira = np.unique(vizinhos)
+        dist[fronteira] = d
+    return dist.reshape(altura, largura)
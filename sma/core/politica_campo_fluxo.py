@@ -0,0 +1,169 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+from typing import List, Optional, Set, Tuple
+from .tipos import Observacao, Accao, TipoAccao
+from .politicas import Politica
+from .navegacao import DESLOCAMENTOS, campo_distancias
+
+
+# Distância usada para células sem caminho até ao alvo
+SEM_CAMINHO = np.iinfo(np.int32).max
+
+
+class PoliticaCampoFluxo(Politica):
+    """
+    Navegação por campos de distância BFS pré-calculados (flow fields).
+
+    Há um campo por alvo (farol, ninho e cada recurso), calculado uma vez por
+    mapa e guardado numa cache partilhada entre instâncias. O campo "recurso
+    mais próximo" é o mínimo dos campos dos recursos ativos e é atualizado
+    incrementalmente quando um recurso é recolhido: só as células cujo
+    recurso mais próximo desapareceu são recalculadas.
+
+    Em cada passo a ação é o vizinho N/S/E/O com menor distância ao alvo
+    (quatro leituras de array), o que contorna obstáculos e becos sem saída.
+    Lê a posição do agente do campo "pos" da observação.
+    """
+
+    # (mapa, alvo) -> campo de distâncias, os menos usados saem primeiro
+    _cache: OrderedDict[tuple, np.ndarray] = OrderedDict()
+    _MAX_CACHE = 256
+    _lock_cache = threading.Lock()
+
+    def __init__(self, ambiente, tipo_agente: str = "FAROL"):
+        self.ambiente = ambiente
+        self.tipo_agente = tipo_agente
+        self.largura, self.altura = ambiente.largura, ambiente.altura
+        self._bloqueado = self._mapa_bloqueado(ambiente)
+        self._chave_mapa = (self.largura, self.altura, self._bloqueado.tobytes())
+        self._lock = threading.Lock()
+        self._movimentos = [
+            (Accao.de(a), dx, dy) for a, (dx, dy) in DESLOCAMENTOS.items()
+        ]
+        self._ficar = Accao.de(TipoAccao.Stay)
+        self.acoes = (TipoAccao.Stay, *DESLOCAMENTOS)
+
+        if tipo_agente == "FAROL":
+            self.campo_alvo = self._campo(ambiente.pos_farol)
+            # Com bordas SEM_CAMINHO, para ler vizinhos em lote sem testar limites
+            self._campo_alvo_borda = np.pad(self.campo_alvo, 1, constant_values=SEM_CAMINHO)
+        else:
+            self.campo_alvo = self._campo(ambiente.ninho)
+            self._posicoes: List[Tuple[int, int]] = list(ambiente.recursos_iniciais)
+            self._campos_recursos = np.stack(
+                [self._campo(p) for p in self._posicoes]
+            ) if self._posicoes else np.empty((0, self.altura, self.largura), np.int32)
+            self._ativos: Set[Tuple[int, int]] = set()
+            self._versao = getattr(ambiente, "versao", None)
+            self.campo_recurso: Optional[np.ndarray] = None
+            self._mais_proximo: Optional[np.ndarray] = None
+            self._combinado_inicial = None
+            self._sincronizar_recursos()
+
+    @staticmethod
+    def _mapa_bloqueado(ambiente) -> np.ndarray:
+        bloqueado = np.zeros((ambiente.altura, ambiente.largura), dtype=bool)
+        for ox, oy in ambiente.obstaculos:
+            if 0 <= ox < ambiente.largura and 0 <= oy < ambiente.altura:
+                bloqueado[oy, ox] = True
+        return bloqueado
+
+    def _campo(self, alvo: Tuple[int, int]) -> np.ndarray:
+        chave = (self._chave_mapa, tuple(alvo))
+        cache = PoliticaCampoFluxo._cache
+        with PoliticaCampoFluxo._lock_cache:
+            campo = cache.get(chave)
+            if campo is not None:
+                cache.move_to_end(chave)
+                return campo
+        campo = campo_distancias(self._bloqueado, [alvo])
+        campo[campo < 0] = SEM_CAMINHO
+        with PoliticaCampoFluxo._lock_cache:
+            cache[chave] = campo
+            while len(cache) > PoliticaCampoFluxo._MAX_CACHE:
+                cache.popitem(last=False)
+        return campo
+
+    def _sincronizar_recursos(self):
+        """Atualiza o campo "recurso mais próximo" para os recursos ainda no mapa."""
+        ativos = set(self.ambiente.recursos)
+        removidos = self._ativos - ativos
+        if self._mais_proximo is not None and ativos <= self._ativos:
+            # Incremental: só as células cujo recurso mais próximo foi recolhido
+            indices = [i for i, p in enumerate(self._posicoes) if p in removidos]
+            celulas = np.isin(self._mais_proximo, indices)
+            restantes = [i for i, p in enumerate(self._posicoes) if p in ativos]
+            if restantes:
+                sub = self._campos_recursos[restantes][:, celulas]
+                self._mais_proximo[celulas] = np.asarray(restantes)[sub.argmin(axis=0)]
+                self.campo_recurso[celulas] = sub.min(axis=0)
+            else:
+                self.campo_recurso[celulas] = SEM_CAMINHO
+        elif ativos == set(self._posicoes) and self._combinado_inicial is not None:
+            # Novo episódio: repor o campo inicial guardado
+            campo, mais_proximo = self._combinado_inicial
+            self.campo_recurso, self._mais_proximo = campo.copy(), mais_proximo.copy()
+        else:
+            indices = [i for i, p in enumerate(self._posicoes) if p in ativos]
+            if indices:
+                sub = self._campos_recursos[indices]
+                self._mais_proximo = np.asarray(indices)[sub.argmin(axis=0)]
+                self.campo_recurso = sub.min(axis=0)
+            else:
+                self._mais_proximo = np.full((self.altura, self.largura), -1)
+                self.campo_recurso = np.full((self.altura, self.largura), SEM_CAMINHO, np.int32)
+            if ativos == set(self._posicoes):
+                self._combinado_inicial = (self.campo_recurso.copy(), self._mais_proximo.copy())
+        self._ativos = ativos
+
+    def _seguir(self, campo: np.ndarray, x: int, y: int) -> Accao:
+        melhor, melhor_d = self._ficar, campo[y, x]
+        for accao, dx, dy in self._movimentos:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.largura and 0 <= ny < self.altura and campo[ny, nx] < melhor_d:
+                melhor, melhor_d = accao, campo[ny, nx]
+        return melhor
+
+    def selecionar_acao(self, estado: Observacao) -> Accao:
+        dados = estado.dados if isinstance(estado.dados, dict) else {}
+        pos = dados.get("pos")
+        if pos is None:
+            return self._ficar
+        x, y = pos
+
+        if self.tipo_agente == "FAROL":
+            return self._seguir(self.campo_alvo, x, y)
+
+        if dados.get("carregando", 0) > 0:
+            if dados.get("no_ninho", False):
+                return Accao.de(TipoAccao.Depositar)
+            return self._seguir(self.campo_alvo, x, y)
+
+        if dados.get("no_recurso", False):
+            return Accao.de(TipoAccao.Coletar)
+        # O ambiente incrementa `versao` sempre que o conjunto de recursos muda
+        if self.ambiente.versao != self._versao:
+            with self._lock:
+                versao = self.ambiente.versao
+                if versao != self._versao:
+                    self._sincronizar_recursos()
+                    self._versao = versao
+        return self._seguir(self.campo_recurso, x, y)
+
+    def selecionar_acoes_populacao(self, populacao, indices: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Passo do campo para vários agentes de uma Populacao (só FAROL: os
+        foragers dependem da carga e dos recursos e decidem agente a agente).
+        Devolve índices em `self.acoes`.
+        """
+        if self.tipo_agente != "FAROL":
+            return None
+        pos = populacao.posicoes[indices]
+        xs, ys = pos[:, 0] + 1, pos[:, 1] + 1
+        campo = self._campo_alvo_borda
+        distancias = np.stack(
+            [campo[ys, xs]] + [campo[ys + dy, xs + dx] for dx, dy in DESLOCAMENTOS.values()]
+        )
+        # argmin fica com a primeira em empate: "ficar" salvo se um vizinho melhorar, como em _seguir
+        return distancias.argmin(axis=0)
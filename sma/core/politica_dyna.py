@@ -0,0 +1,116 @@
+import heapq
+import random
+from typing import Any, Dict, List, Set, Tuple
+from .tipos import TipoAccao
+from .politicas import PoliticaQLearning
+
+
+class PoliticaDynaQ(PoliticaQLearning):
+    """
+    Dyna-Q: Q-Learning com um modelo aprendido das transições.
+
+    Cada passo real guarda (estado, ação) -> (recompensa, próximo estado) no
+    modelo e depois faz `passos_planeamento` atualizações simuladas a partir
+    dele, sem custo de simulação do ambiente. Com `prioritizado=True` usa
+    prioritized sweeping: as atualizações simuladas seguem uma fila de
+    prioridade pelo erro TD e propagam-se aos predecessores do estado.
+
+    O modelo guarda no máximo `max_modelo` pares; quando está cheio, um par
+    ao acaso é substituído.
+    """
+
+    def __init__(
+        self,
+        acoes: Tuple[TipoAccao, ...],
+        alfa=0.2,
+        gama=0.95,
+        epsilon=0.1,
+        passos_planeamento: int = 10,
+        max_modelo: int = 10000,
+        prioritizado: bool = False,
+        limiar_prioridade: float = 0.01,
+        **kwargs,
+    ):
+        super().__init__(acoes, alfa, gama, epsilon, **kwargs)
+        self.passos_planeamento = passos_planeamento
+        self.max_modelo = max_modelo
+        self.prioritizado = prioritizado
+        self.limiar_prioridade = limiar_prioridade
+
+        self.modelo: Dict[Tuple[Any, TipoAccao], Tuple[float, Any]] = {}
+        # Lista paralela ao modelo para amostragem e remoção em O(1)
+        self._pares: List[Tuple[Any, TipoAccao]] = []
+        self._indice_par: Dict[Tuple[Any, TipoAccao], int] = {}
+        # Prioritized sweeping: predecessores de cada estado e fila de prioridade
+        self._predecessores: Dict[Any, Set[Tuple[Any, TipoAccao]]] = {}
+        self._fila: List[Tuple[float, int, Tuple[Any, TipoAccao]]] = []
+        self._contador_fila = 0
+
+    def _erro_td(self, k: Any, a: TipoAccao, recompensa: float, k2: Any) -> float:
+        qsa = self.Q.get(k, {}).get(a, 0.0)
+        return recompensa + self.gama * self._qmax(k2) - qsa
+
+    def _remover_par(self, par: Tuple[Any, TipoAccao]):
+        _, k2 = self.modelo.pop(par)
+        i = self._indice_par.pop(par)
+        ultimo = self._pares.pop()
+        if ultimo != par:
+            self._pares[i] = ultimo
+            self._indice_par[ultimo] = i
+        preds = self._predecessores.get(k2)
+        if preds is not None:
+            preds.discard(par)
+            if not preds:
+                del self._predecessores[k2]
+
+    def _registar_modelo(self, k: Any, a: TipoAccao, recompensa: float, k2: Any):
+        par = (k, a)
+        if par in self.modelo:
+            self._remover_par(par)
+        elif len(self.modelo) >= self.max_modelo:
+            self._remover_par(random.choice(self._pares))
+        self.modelo[par] = (recompensa, k2)
+        self._indice_par[par] = len(self._pares)
+        self._pares.append(par)
+        if self.prioritizado:
+            self._predecessores.setdefault(k2, set()).add(par)
+
+    def _enfileirar(self, par: Tuple[Any, TipoAccao], prioridade: float):
+        # A fila também é limitada por max_modelo para a memória não crescer
+        if prioridade > self.limiar_prioridade and len(self._fila) < self.max_modelo:
+            self._contador_fila += 1
+            heapq.heappush(self._fila, (-prioridade, self._contador_fila, par))
+
+    def _aprender(self, k: Any, a: TipoAccao, recompensa: float, k2: Any):
+        prioridade = abs(self._erro_td(k, a, recompensa, k2)) if self.prioritizado else 0.0
+        super()._aprender(k, a, recompensa, k2)
+        self._registar_modelo(k, a, recompensa, k2)
+
+        if self.prioritizado:
+            self._enfileirar((k, a), prioridade)
+            self._planear_prioritizado()
+        else:
+            self._planear()
+
+    def _planear(self):
+        if not self._pares:
+            return
+        for _ in range(self.passos_planeamento):
+            k, a = random.choice(self._pares)
+            recompensa, k2 = self.modelo[(k, a)]
+            self._atualizar_q(k, a, recompensa, k2, self.alfa)
+
+    def _planear_prioritizado(self):
+        for _ in range(self.passos_planeamento):
+            if not self._fila:
+                break
+            _, _, par = heapq.heappop(self._fila)
+            if par not in self.modelo:
+                continue
+            k, a = par
+            recompensa, k2 = self.modelo[par]
+            self._atualizar_q(k, a, recompensa, k2, self.alfa)
+
+            for pred in self._predecessores.get(k, ()):
+                r_pred, _ = self.modelo[pred]
+                self._enfileirar(pred, abs(self._erro_td(pred[0], pred[1], r_pred, k)))
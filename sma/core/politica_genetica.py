@@ -1,10 +1,65 @@
 import json
 import random
 import numpy as np
-from pathlib import Path
 from typing import List, Tuple, Optional
 from .tipos import Observacao, Accao, TipoAccao
 from .politicas import Politica, ModoExecucao
+from .escritor import escrever_json_atomico
+
+
+N_FEATURES = 13
+
+
+def extrair_features(obs: Observacao, ultima_accao: Optional[TipoAccao]) -> np.ndarray:
+    """
+    Extrai as N_FEATURES features numéricas da observação: direção do
+    objetivo, bloqueios N/S/E/O, no alvo, no recurso, última ação e se a
+    última ação foi contra um bloqueio.
+    """
+    dados = obs.dados if hasattr(obs, "dados") else obs
+    features = np.zeros(N_FEATURES)
+
+    # 1-2: Direção do objetivo (normalizada)
+    dir_obj = dados.get("dir_farol", dados.get("dir_recurso", (0, 0)))
+    if dados.get("carregando", 0) > 0:
+        dir_obj = dados.get("dir_ninho", (0, 0))
+
+    features[0] = np.clip(dir_obj[0], -1, 1) if dir_obj else 0
+    features[1] = np.clip(dir_obj[1], -1, 1) if dir_obj else 0
+
+    viz = dados.get("viz", {})
+    features[2] = 1.0 if viz.get((0, -1), 0) in {2, 9, -1} else 0.0
+    features[3] = 1.0 if viz.get((0, 1), 0) in {2, 9, -1} else 0.0
+    features[4] = 1.0 if viz.get((1, 0), 0) in {2, 9, -1} else 0.0
+    features[5] = 1.0 if viz.get((-1, 0), 0) in {2, 9, -1} else 0.0
+
+    features[6] = (
+        1.0 if dados.get("no_farol", False) or dados.get("no_ninho", False) else 0.0
+    )
+    features[7] = 1.0 if dados.get("no_recurso", False) else 0.0
+
+    if ultima_accao == TipoAccao.MoverN:
+        features[8] = 1.0
+    elif ultima_accao == TipoAccao.MoverS:
+        features[9] = 1.0
+    elif ultima_accao == TipoAccao.MoverE:
+        features[10] = 1.0
+    elif ultima_accao == TipoAccao.MoverO:
+        features[11] = 1.0
+
+    if ultima_accao:
+        # Mapear ultima_accao para vetor
+        map_dir = {
+            TipoAccao.MoverN: (0, -1),
+            TipoAccao.MoverS: (0, 1),
+            TipoAccao.MoverE: (1, 0),
+            TipoAccao.MoverO: (-1, 0),
+        }
+        d_vec = map_dir.get(ultima_accao)
+        if d_vec and viz.get(d_vec) in {2, 9, -1}:
+            features[12] = 1.0
+
+    return features
 
 
 class PoliticaGenetica(Politica):
@@ -21,18 +76,28 @@ class PoliticaGenetica(Politica):
         pop_size: int = 20,
         taxa_mutacao: float = 0.1,
         taxa_crossover: float = 0.7,
+        semente: Optional[int] = None,
+        taxa_exploracao: float = 0.1,
     ):
         self.acoes = acoes
         self.n_acoes = len(acoes)
         self.pop_size = pop_size
         self.taxa_mutacao = taxa_mutacao
         self.taxa_crossover = taxa_crossover
+        # Probabilidade de uma ação aleatória em aprendizagem
+        self.taxa_exploracao = taxa_exploracao
 
-        self.n_features = 13
+        self.n_features = N_FEATURES
         self.tamanho_cromossoma = (self.n_features * self.n_acoes) + self.n_acoes
 
+        # Geradores próprios: a evolução não depende do estado aleatório global
+        # e o checkpoint guarda só o desta política
+        self._rng = random.Random(semente)
+        self._np_rng = np.random.default_rng(semente)
+
         self.populacao: List[np.ndarray] = [
-            np.random.randn(self.tamanho_cromossoma) * 0.5 for _ in range(pop_size)
+            self._np_rng.standard_normal(self.tamanho_cromossoma) * 0.5
+            for _ in range(pop_size)
         ]
 
         self.ultima_accao: Optional[TipoAccao] = None
@@ -44,55 +109,14 @@ class PoliticaGenetica(Politica):
 
         self.geracao = 0
         self.historico_fitness: List[float] = []
+        # Episódios de evolução acumulados, incluindo os de checkpoints retomados
+        self.episodios_treinados = 0
 
         self._modo = ModoExecucao.APRENDIZAGEM
 
     def _extrair_features(self, obs: Observacao) -> np.ndarray:
         """Extrai features numéricas da observação para usar com cromossoma."""
-        dados = obs.dados if hasattr(obs, "dados") else obs
-        features = np.zeros(self.n_features)
-
-        # 1-2: Direção do objetivo (normalizada)
-        dir_obj = dados.get("dir_farol", dados.get("dir_recurso", (0, 0)))
-        if dados.get("carregando", 0) > 0:
-            dir_obj = dados.get("dir_ninho", (0, 0))
-
-        features[0] = np.clip(dir_obj[0], -1, 1) if dir_obj else 0
-        features[1] = np.clip(dir_obj[1], -1, 1) if dir_obj else 0
-
-        viz = dados.get("viz", {})
-        features[2] = 1.0 if viz.get((0, -1), 0) in {2, 9, -1} else 0.0
-        features[3] = 1.0 if viz.get((0, 1), 0) in {2, 9, -1} else 0.0
-        features[4] = 1.0 if viz.get((1, 0), 0) in {2, 9, -1} else 0.0
-        features[5] = 1.0 if viz.get((-1, 0), 0) in {2, 9, -1} else 0.0
-
-        features[6] = (
-            1.0 if dados.get("no_farol", False) or dados.get("no_ninho", False) else 0.0
-        )
-        features[7] = 1.0 if dados.get("no_recurso", False) else 0.0
-
-        if self.ultima_accao == TipoAccao.MoverN:
-            features[8] = 1.0
-        elif self.ultima_accao == TipoAccao.MoverS:
-            features[9] = 1.0
-        elif self.ultima_accao == TipoAccao.MoverE:
-            features[10] = 1.0
-        elif self.ultima_accao == TipoAccao.MoverO:
-            features[11] = 1.0
-
-        if self.ultima_accao:
-            # Mapear ultima_accao para vetor
-            map_dir = {
-                TipoAccao.MoverN: (0, -1),
-                TipoAccao.MoverS: (0, 1),
-                TipoAccao.MoverE: (1, 0),
-                TipoAccao.MoverO: (-1, 0),
-            }
-            d_vec = map_dir.get(self.ultima_accao)
-            if d_vec and viz.get(d_vec) in {2, 9, -1}:
-                features[12] = 1.0
-
-        return features
+        return extrair_features(obs, self.ultima_accao)
 
     def _calcular_scores(
         self, cromossoma: np.ndarray, features: np.ndarray
@@ -110,21 +134,60 @@ class PoliticaGenetica(Politica):
 
     def selecionar_acao(self, estado: Observacao) -> Accao:
         """Seleciona ação usando o indivíduo atual da população."""
-        if self._modo == ModoExecucao.TESTE and self.melhor_cromossoma is not None:
-            cromossoma = self.melhor_cromossoma
-        else:
-            cromossoma = self.populacao[self.individuo_atual]
-
+        cromossoma = self._cromossoma_ativo()
         features = self._extrair_features(estado)
         scores = self._calcular_scores(cromossoma, features)
 
-        if self._modo == ModoExecucao.APRENDIZAGEM and random.random() < 0.1:
-            idx = random.randrange(self.n_acoes)
+        if self._modo == ModoExecucao.APRENDIZAGEM and self._rng.random() < self.taxa_exploracao:
+            idx = self._rng.randrange(self.n_acoes)
         else:
             idx = int(np.argmax(scores))
 
         self.ultima_accao = self.acoes[idx]
-        return Accao(self.ultima_accao)
+        return Accao.de(self.ultima_accao)
+
+    def _cromossoma_ativo(self) -> np.ndarray:
+        if self._modo == ModoExecucao.TESTE and self.melhor_cromossoma is not None:
+            return self.melhor_cromossoma
+        return self.populacao[self.individuo_atual]
+
+    @classmethod
+    def selecionar_acoes_batch(
+        cls, politicas: List["PoliticaGenetica"], estados: List[Observacao]
+    ) -> List[Accao]:
+        """
+        `selecionar_acao` para vários agentes de uma vez: as features e os
+        cromossomas ativos são empilhados e os scores de todos saem de um
+        único produto (einsum) em vez de um ciclo de produtos por agente.
+        """
+        accoes: List[Accao] = [None] * len(politicas)
+        por_acoes = {}
+        for i, pol in enumerate(politicas):
+            por_acoes.setdefault(pol.acoes, []).append(i)
+
+        for acoes, indices in por_acoes.items():
+            n_acoes = len(acoes)
+            offset = N_FEATURES * n_acoes
+            features = np.stack(
+                [politicas[i]._extrair_features(estados[i]) for i in indices]
+            )
+            cromossomas = np.stack([politicas[i]._cromossoma_ativo() for i in indices])
+            pesos = cromossomas[:, :offset].reshape(len(indices), n_acoes, N_FEATURES)
+            scores = np.einsum("naf,nf->na", pesos, features) + cromossomas[:, offset:]
+            melhores = scores.argmax(axis=1)
+
+            for j, i in enumerate(indices):
+                pol = politicas[i]
+                if (
+                    pol._modo == ModoExecucao.APRENDIZAGEM
+                    and pol._rng.random() < pol.taxa_exploracao
+                ):
+                    idx = pol._rng.randrange(n_acoes)
+                else:
+                    idx = int(melhores[j])
+                pol.ultima_accao = acoes[idx]
+                accoes[i] = Accao.de(pol.ultima_accao)
+        return accoes
 
     def atualizar(
         self,
@@ -142,6 +205,7 @@ class PoliticaGenetica(Politica):
         """Chamado no fim de cada episódio para avançar para próximo indivíduo."""
         if self._modo != ModoExecucao.APRENDIZAGEM:
             return
+        self.episodios_treinados += 1
 
         # Verificar se é o melhor
         if self.fitness[self.individuo_atual] > self.melhor_fitness:
@@ -182,7 +246,7 @@ class PoliticaGenetica(Politica):
             pai2 = self._selecao_torneio()
 
             # Crossover
-            if random.random() < self.taxa_crossover:
+            if self._rng.random() < self.taxa_crossover:
                 filho = self._crossover(pai1, pai2)
             else:
                 filho = pai1.copy()
@@ -198,48 +262,128 @@ class PoliticaGenetica(Politica):
 
     def _selecao_torneio(self, k: int = 3) -> np.ndarray:
         """Seleção por torneio: escolhe k indivíduos, retorna o melhor."""
-        indices = random.sample(range(self.pop_size), min(k, self.pop_size))
+        indices = self._rng.sample(range(self.pop_size), min(k, self.pop_size))
         melhor_idx = max(indices, key=lambda i: self.fitness[i])
         return self.populacao[melhor_idx]
 
     def _crossover(self, pai1: np.ndarray, pai2: np.ndarray) -> np.ndarray:
         """Crossover de um ponto."""
-        ponto = random.randint(1, len(pai1) - 1)
+        ponto = self._rng.randint(1, len(pai1) - 1)
         filho = np.concatenate([pai1[:ponto], pai2[ponto:]])
         return filho
 
     def _mutacao(self, cromossoma: np.ndarray) -> np.ndarray:
         """Aplica mutação gaussiana a cada gene."""
         for i in range(len(cromossoma)):
-            if random.random() < self.taxa_mutacao:
-                cromossoma[i] += np.random.randn() * 0.3
+            if self._rng.random() < self.taxa_mutacao:
+                cromossoma[i] += self._np_rng.standard_normal() * 0.3
         return cromossoma
 
     def set_modo(self, modo: str):
         """Define modo de execução."""
         self._modo = modo
 
-    def guardar(self, caminho: str):
-        """Guarda o melhor cromossoma e estatísticas."""
-        dados = {
+    def estado_guardar(self) -> dict:
+        """Copia o melhor cromossoma e estatísticas para um dict serializável."""
+        return {
             "melhor_cromossoma": self.melhor_cromossoma.tolist()
             if self.melhor_cromossoma is not None
             else None,
             "melhor_fitness": self.melhor_fitness,
             "geracao": self.geracao,
-            "historico_fitness": self.historico_fitness,
+            "historico_fitness": list(self.historico_fitness),
             "acoes": [a.value for a in self.acoes],
             "parametros": {
                 "pop_size": self.pop_size,
                 "taxa_mutacao": self.taxa_mutacao,
                 "taxa_crossover": self.taxa_crossover,
+                "taxa_exploracao": self.taxa_exploracao,
             },
         }
-        Path(caminho).parent.mkdir(parents=True, exist_ok=True)
-        with open(caminho, "w", encoding="utf-8") as f:
-            json.dump(dados, f, indent=2)
+
+    def guardar(self, caminho: str):
+        """Guarda o melhor cromossoma e estatísticas."""
+        escrever_json_atomico(caminho, self.estado_guardar(), indent=2)
         print(f"Política genética guardada: {caminho}")
 
+    def estado_checkpoint(self) -> dict:
+        """
+        Copia o estado evolutivo completo para um dict serializável.
+
+        Inclui população, fitness de cada indivíduo, indivíduo atual, geração,
+        episódios acumulados e o estado dos geradores aleatórios da política,
+        para que a evolução possa ser retomada exatamente no mesmo ponto.
+        """
+        versao, estado_py, gauss = self._rng.getstate()
+        return {
+            "episodio": self.episodios_treinados,
+            "populacao": [c.tolist() for c in self.populacao],
+            "fitness": list(self.fitness),
+            "individuo_atual": self.individuo_atual,
+            "geracao": self.geracao,
+            "melhor_cromossoma": self.melhor_cromossoma.tolist()
+            if self.melhor_cromossoma is not None
+            else None,
+            "melhor_fitness": self.melhor_fitness,
+            "historico_fitness": list(self.historico_fitness),
+            "ultima_accao": self.ultima_accao.value if self.ultima_accao else None,
+            "acoes": [a.value for a in self.acoes],
+            "parametros": {
+                "pop_size": self.pop_size,
+                "taxa_mutacao": self.taxa_mutacao,
+                "taxa_crossover": self.taxa_crossover,
+                "taxa_exploracao": self.taxa_exploracao,
+            },
+            "rng": {
+                "random": [versao, list(estado_py), gauss],
+                "numpy": self._np_rng.bit_generator.state,
+            },
+        }
+
+    def carregar_checkpoint(self, caminho: str) -> bool:
+        """Retoma a evolução a partir de um checkpoint completo."""
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+
+            acoes = tuple(TipoAccao(a) for a in dados["acoes"])
+            if acoes != self.acoes:
+                print(f"Aviso: ações do checkpoint não coincidem: {caminho}")
+                return False
+
+            params = dados["parametros"]
+            self.pop_size = params["pop_size"]
+            self.taxa_mutacao = params["taxa_mutacao"]
+            self.taxa_crossover = params["taxa_crossover"]
+            self.taxa_exploracao = params.get("taxa_exploracao", self.taxa_exploracao)
+            self.populacao = [np.array(c) for c in dados["populacao"]]
+            self.fitness = list(dados["fitness"])
+            self.individuo_atual = dados["individuo_atual"]
+            self.geracao = dados["geracao"]
+            if dados["melhor_cromossoma"] is not None:
+                self.melhor_cromossoma = np.array(dados["melhor_cromossoma"])
+            self.melhor_fitness = dados["melhor_fitness"]
+            self.historico_fitness = dados.get("historico_fitness", [])
+            ultima = dados.get("ultima_accao")
+            self.ultima_accao = TipoAccao(ultima) if ultima else None
+            self.episodios_treinados = dados.get("episodio", 0)
+
+            rng = dados.get("rng")
+            if rng:
+                versao, estado_py, gauss = rng["random"]
+                self._rng.setstate((versao, tuple(estado_py), gauss))
+                self._np_rng.bit_generator.state = rng["numpy"]
+
+            print(
+                f"Checkpoint genético carregado: {caminho} "
+                f"(episódio {self.episodios_treinados}, geração {self.geracao}, "
+                f"indivíduo {self.individuo_atual})"
+            )
+            return True
+        except (FileNotFoundError, json.JSONDecodeError, KeyError) as e:
+            print(f"Erro ao carregar checkpoint genético: {e}")
+            return False
+
     def carregar(self, caminho: str) -> bool:
         """Carrega o melhor cromossoma."""
         try:
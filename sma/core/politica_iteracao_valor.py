@@ -0,0 +1,105 @@
+import time
+import numpy as np
+from typing import Optional, Tuple
+from .tipos import Observacao, Accao, TipoAccao
+from .politicas import Politica
+from .navegacao import campo_distancias
+
+
+def iteracao_valor(
+    proximo: np.ndarray,
+    recompensa: np.ndarray,
+    terminal: np.ndarray,
+    gama: float,
+    tolerancia: float = 1e-6,
+    max_iteracoes: int = 100000,
+    V: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Iteração de valor vetorizada sobre um MDP determinístico em forma de tabela.
+
+    proximo/recompensa/terminal são arrays [n_acoes, n_estados] (como os de
+    AmbienteFarol.tabela_transicoes). Devolve (V, índice da melhor ação por
+    estado, nº de iterações).
+    """
+    continua = gama * ~terminal
+    V = np.zeros(proximo.shape[1]) if V is None else V.astype(float)
+    for i in range(1, max_iteracoes + 1):
+        Q = recompensa + continua * V[proximo]
+        V_novo = Q.max(axis=0)
+        delta = float(np.abs(V_novo - V).max())
+        V = V_novo
+        if delta < tolerancia:
+            break
+    return V, Q.argmax(axis=0), i
+
+
+class PoliticaIteracaoValor(Politica):
+    """
+    Política ótima para o AmbienteFarol, calculada por iteração de valor.
+
+    O Farol é um MDP estático e determinístico, por isso o modelo completo
+    vem diretamente do ambiente (`tabela_transicoes`) e a política ótima e o
+    mapa de valores são resolvidos uma vez, na construção. Cada passo é uma
+    consulta à posição do agente (campo "pos" da observação).
+
+    Com `arranque_bfs` os valores iniciais vêm da distância BFS ao farol, que
+    já é o ponto fixo para as recompensas do Farol; a iteração de valor só
+    confirma (e corrige, se preciso) em poucas passagens, o que mantém o
+    tempo baixo em mapas grandes.
+    """
+
+    def __init__(
+        self,
+        ambiente,
+        acoes: Tuple[TipoAccao, ...],
+        gama: float = 0.95,
+        tolerancia: float = 1e-6,
+        arranque_bfs: bool = True,
+        max_iteracoes: int = 100000,
+    ):
+        self.acoes = acoes
+        self.gama = gama
+        self._accoes = [Accao.de(a) for a in acoes]
+        self.largura, self.altura = ambiente.largura, ambiente.altura
+
+        inicio = time.perf_counter()
+        proximo, recompensa, terminal = ambiente.tabela_transicoes(acoes)
+        V0 = self._valores_bfs(ambiente) if arranque_bfs else None
+        V, melhor, self.iteracoes = iteracao_valor(
+            proximo, recompensa, terminal, gama, tolerancia, max_iteracoes, V=V0
+        )
+        self.valores = V.reshape(self.altura, self.largura)
+        self.mapa_acoes = melhor.reshape(self.altura, self.largura).astype(np.int8)
+        self.tempo_ms = (time.perf_counter() - inicio) * 1000
+        print(
+            f"Iteracao de valor: {self.largura}x{self.altura}, {self.iteracoes} iteracoes, "
+            f"{self.tempo_ms:.1f} ms"
+        )
+
+    def _valores_bfs(self, ambiente) -> np.ndarray:
+        bloqueado = np.zeros((self.altura, self.largura), dtype=bool)
+        for ox, oy in ambiente.obstaculos:
+            if 0 <= ox < self.largura and 0 <= oy < self.altura:
+                bloqueado[oy, ox] = True
+        d = campo_distancias(bloqueado, [ambiente.pos_farol]).ravel().astype(float)
+        g = self.gama
+        # d-1 passos a -1 e o último a +99; sem caminho: ficar parado para sempre
+        V = -(1 - g ** (d - 1)) / (1 - g) + 99.0 * g ** (d - 1)
+        V[d == 0] = 99.0
+        V[d < 0] = -1.0 / (1 - g)
+        V[bloqueado.ravel()] = 0.0
+        return V
+
+    def selecionar_acao(self, estado: Observacao) -> Accao:
+        dados = estado.dados if isinstance(estado.dados, dict) else {}
+        pos = dados.get("pos")
+        if pos is None:
+            return Accao.de(TipoAccao.Stay)
+        x, y = pos
+        return self._accoes[self.mapa_acoes[y, x]]
+
+    def selecionar_acoes_populacao(self, populacao, indices: np.ndarray) -> np.ndarray:
+        """Ações de vários agentes de uma Populacao, lidas do mapa de uma só vez."""
+        pos = populacao.posicoes[indices]
+        return self.mapa_acoes[pos[:, 1], pos[:, 0]]
@@ -0,0 +1,176 @@
+import json
+import random
+import numpy as np
+from typing import List, Optional, Tuple
+from .tipos import Observacao, Accao, TipoAccao
+from .politicas import Politica, ModoExecucao
+from .agendas import Agenda
+from .escritor import escrever_json_atomico
+from .politica_genetica import N_FEATURES, extrair_features
+
+
+class PoliticaQLinear(Politica):
+    """
+    Q-Learning com aproximação linear: Q(s, a) = W[a] · phi(s).
+
+    phi(s) são as 13 features de `extrair_features` (as mesmas da política
+    genética) mais um termo de bias. A memória é constante (uma matriz de
+    pesos por agente), independentemente do tamanho do mapa ou do número de
+    estados visitados, o que a torna adequada a mapas grandes.
+    """
+
+    def __init__(
+        self,
+        acoes: Tuple[TipoAccao, ...],
+        alfa=0.01,
+        gama=0.95,
+        epsilon=0.1,
+        agenda_epsilon: Optional[Agenda] = None,
+        agenda_alfa: Optional[Agenda] = None,
+    ):
+        self.acoes = acoes
+        self.alfa = alfa
+        self.gama = gama
+        self.eps = epsilon
+        self.agenda_epsilon = agenda_epsilon
+        self.agenda_alfa = agenda_alfa
+        self.episodios_treinados = 0
+        self.ultimo_delta_q = 0.0
+        self._delta_q_episodio = 0.0
+
+        self.W = np.zeros((len(acoes), N_FEATURES + 1))
+        self._indice = {a: i for i, a in enumerate(acoes)}
+        self.ultima_accao: Optional[TipoAccao] = None
+        # phi da última observação usada em selecionar_acao (reutilizada em atualizar)
+        self._obs_cache: Optional[Observacao] = None
+        self._phi_cache: Optional[np.ndarray] = None
+
+        self._modo = ModoExecucao.APRENDIZAGEM
+        self._aplicar_agendas()
+
+    def _aplicar_agendas(self):
+        if self._modo != ModoExecucao.APRENDIZAGEM:
+            return
+        if self.agenda_epsilon is not None:
+            self.eps = self.agenda_epsilon.valor(self.episodios_treinados)
+        if self.agenda_alfa is not None:
+            self.alfa = self.agenda_alfa.valor(self.episodios_treinados)
+
+    def _phi(self, obs: Observacao, ultima_accao: Optional[TipoAccao]) -> np.ndarray:
+        phi = np.empty(N_FEATURES + 1)
+        phi[:N_FEATURES] = extrair_features(obs, ultima_accao)
+        phi[N_FEATURES] = 1.0
+        return phi
+
+    def selecionar_acao(self, estado: Observacao) -> Accao:
+        phi = self._phi(estado, self.ultima_accao)
+        self._obs_cache, self._phi_cache = estado, phi
+
+        if self._modo == ModoExecucao.APRENDIZAGEM and random.random() < self.eps:
+            a = random.choice(self.acoes)
+        else:
+            a = self.acoes[int(np.argmax(self.W @ phi))]
+        self.ultima_accao = a
+        return Accao.de(a)
+
+    @classmethod
+    def selecionar_acoes_batch(
+        cls, politicas: List["PoliticaQLinear"], estados: List[Observacao]
+    ) -> List[Accao]:
+        """`selecionar_acao` para vários agentes, com os Q de todos num único einsum."""
+        accoes: List[Accao] = [None] * len(politicas)
+        por_acoes = {}
+        for i, pol in enumerate(politicas):
+            por_acoes.setdefault(pol.acoes, []).append(i)
+
+        for acoes, indices in por_acoes.items():
+            phis = np.stack(
+                [politicas[i]._phi(estados[i], politicas[i].ultima_accao) for i in indices]
+            )
+            pesos = np.stack([politicas[i].W for i in indices])
+            melhores = np.einsum("naf,nf->na", pesos, phis).argmax(axis=1)
+
+            for j, i in enumerate(indices):
+                pol = politicas[i]
+                pol._obs_cache, pol._phi_cache = estados[i], phis[j]
+                if pol._modo == ModoExecucao.APRENDIZAGEM and random.random() < pol.eps:
+                    a = random.choice(acoes)
+                else:
+                    a = acoes[int(melhores[j])]
+                pol.ultima_accao = a
+                accoes[i] = Accao.de(a)
+        return accoes
+
+    def atualizar(
+        self,
+        estado: Observacao,
+        accao: Accao,
+        recompensa: float,
+        prox_estado: Observacao,
+    ):
+        if self._modo != ModoExecucao.APRENDIZAGEM:
+            return
+
+        if estado is self._obs_cache:
+            phi = self._phi_cache
+        else:
+            phi = self._phi(estado, None)
+        phi2 = self._phi(prox_estado, accao.tipo)
+
+        # Semi-gradiente: W[a] += alfa * (r + gama * max_a' Q(s', a') - Q(s, a)) * phi(s)
+        i = self._indice[accao.tipo]
+        erro = recompensa + self.gama * float(np.max(self.W @ phi2)) - float(self.W[i] @ phi)
+        self.W[i] += self.alfa * erro * phi
+        if abs(self.alfa * erro) > self._delta_q_episodio:
+            self._delta_q_episodio = abs(self.alfa * erro)
+
+    def fim_episodio(self):
+        if self._modo == ModoExecucao.APRENDIZAGEM:
+            self.episodios_treinados += 1
+            self._aplicar_agendas()
+        self.ultimo_delta_q = self._delta_q_episodio
+        self._delta_q_episodio = 0.0
+        self.ultima_accao = None
+        self._obs_cache = self._phi_cache = None
+
+    def set_modo(self, modo: str):
+        self._modo = modo
+        if modo == ModoExecucao.TESTE:
+            self.eps = 0.0
+
+    def estado_guardar(self) -> dict:
+        return {
+            "W": self.W.tolist(),
+            "acoes": [a.value for a in self.acoes],
+            "alfa": self.alfa,
+            "gama": self.gama,
+            "epsilon_original": self.eps if self._modo != ModoExecucao.TESTE else 0.1,
+            "episodios": self.episodios_treinados,
+        }
+
+    def guardar(self, caminho: str):
+        escrever_json_atomico(caminho, self.estado_guardar(), indent=2)
+        print(f"Pesos Q-linear guardados: {caminho}")
+
+    def carregar(self, caminho: str, restaurar_estado: bool = False) -> bool:
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+            W = np.array(dados["W"], dtype=float)
+            if W.shape != self.W.shape:
+                print(f"Erro ao carregar: pesos com forma {W.shape}, esperado {self.W.shape}")
+                return False
+            self.W = W
+            self.episodios_treinados = dados.get("episodios", 0)
+            if restaurar_estado and self._modo == ModoExecucao.APRENDIZAGEM:
+                self.eps = dados.get("epsilon_original", self.eps)
+                self.alfa = dados.get("alfa", self.alfa)
+                self._aplicar_agendas()
+            print(f"Pesos Q-linear carregados: {caminho}")
+            return True
+        except FileNotFoundError:
+            print(f"Ficheiro nao encontrado: {caminho}")
+            return False
+        except (json.JSONDecodeError, KeyError) as e:
+            print(f"Erro ao carregar: {e}")
+            return False
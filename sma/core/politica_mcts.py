@@ -0,0 +1,173 @@
+import math
+import random
+from typing import Dict, List, Optional, Tuple
+from .tipos import Observacao, Accao, TipoAccao
+from .politicas import Politica
+
+
+class _AgenteSimulado:
+    """Substituto leve do agente nas simulações (só o que `agir` lê e altera)."""
+
+    __slots__ = ("posicao", "carregando")
+
+    def __init__(self):
+        self.posicao = (0, 0)
+        self.carregando = 0
+
+
+class _No:
+    __slots__ = ("filhos", "n", "soma")
+
+    def __init__(self):
+        self.filhos: Dict[int, "_No"] = {}
+        self.n = 0
+        self.soma = 0.0
+
+
+class PoliticaMCTS(Politica):
+    """
+    Planeamento por simulação sobre uma cópia privada do ambiente.
+
+    O estado real é capturado (`Ambiente.capturar`) uma vez por decisão, e
+    só de novo quando a `versao` do ambiente muda; cada simulação começa com
+    `restaurar` na cópia, por isso o ambiente real nunca é alterado. O orçamento é fixo em `simulacoes` por passo, cada uma com no
+    máximo `profundidade` passos, o que mantém a latência previsível.
+
+    - modo "uct": Monte-Carlo Tree Search com UCB1 (valores normalizados)
+    - modo "rollout": as simulações são repartidas pelas ações da raiz e
+      cada uma continua com ações aleatórias
+
+    Lê a posição (e carga) do agente da observação (campo "pos").
+    """
+
+    def __init__(
+        self,
+        ambiente,
+        acoes: Tuple[TipoAccao, ...],
+        simulacoes: int = 100,
+        profundidade: int = 20,
+        gama: float = 0.95,
+        c_uct: float = 1.4,
+        modo: str = "uct",
+        semente: Optional[int] = None,
+    ):
+        if modo not in ("uct", "rollout"):
+            raise ValueError(f"Modo MCTS desconhecido: {modo}")
+        self.acoes = acoes
+        self.simulacoes = max(1, simulacoes)
+        self.profundidade = max(1, profundidade)
+        self.gama = gama
+        self.c_uct = c_uct
+        self.modo = modo
+        self._accoes = [Accao.de(a) for a in acoes]
+        self._ambiente = ambiente
+        self._modelo = ambiente.clonar()
+        self._agente = _AgenteSimulado()
+        self._rng = random.Random(semente)
+        self._captura = None
+        self._versao_captura = None
+
+    def _passo(self, i: int) -> Tuple[float, bool]:
+        r = self._modelo.agir(self._accoes[i], self._agente)
+        if hasattr(self._modelo, "verificar_termino"):
+            self._modelo.verificar_termino([self._agente])
+        return r, self._modelo.terminou
+
+    def _aleatorio(self, retorno: float, desconto: float, prof: int, terminou: bool) -> float:
+        n = len(self.acoes)
+        while not terminou and prof < self.profundidade:
+            r, terminou = self._passo(self._rng.randrange(n))
+            retorno += desconto * r
+            desconto *= self.gama
+            prof += 1
+        return retorno
+
+    def selecionar_acao(self, estado: Observacao) -> Accao:
+        dados = estado.dados if isinstance(estado.dados, dict) else {}
+        pos = dados.get("pos")
+        if pos is None:
+            return Accao.de(TipoAccao.Stay)
+        self._agente.posicao = pos
+        self._agente.carregando = dados.get("carregando", 0)
+        raiz = self._capturar()
+
+        if self.modo == "rollout":
+            i = self._plano_rollout(raiz)
+        else:
+            i = self._uct(raiz)
+        return self._accoes[i]
+
+    def _capturar(self):
+        """Captura do ambiente real; os recursos só são lidos de novo se `versao` mudou."""
+        versao = getattr(self._ambiente, "versao", None)
+        if versao is None or self._captura is None or versao != self._versao_captura:
+            self._captura = self._ambiente.capturar([self._agente])
+            self._versao_captura = versao
+            return self._captura
+        return self._captura._replace(
+            posicoes=(self._agente.posicao,),
+            cargas=(self._agente.carregando,),
+            terminou=getattr(self._ambiente, "terminou", False),
+        )
+
+    def _plano_rollout(self, raiz) -> int:
+        n = len(self.acoes)
+        soma = [0.0] * n
+        visitas = [0] * n
+        for s in range(self.simulacoes):
+            i = s % n
+            self._modelo.restaurar(raiz, [self._agente])
+            r, terminou = self._passo(i)
+            soma[i] += self._aleatorio(r, self.gama, 1, terminou)
+            visitas[i] += 1
+        return max(
+            (i for i in range(n) if visitas[i]), key=lambda i: soma[i] / visitas[i]
+        )
+
+    def _uct(self, raiz) -> int:
+        n_acoes = len(self.acoes)
+        arvore = _No()
+        minimo, maximo = math.inf, -math.inf
+
+        for _ in range(self.simulacoes):
+            self._modelo.restaurar(raiz, [self._agente])
+            no = arvore
+            caminho: List[_No] = [arvore]
+            retorno, desconto, prof, terminou = 0.0, 1.0, 0, False
+
+            # Seleção e expansão: desce pela árvore até criar um nó novo
+            while not terminou and prof < self.profundidade:
+                if len(no.filhos) < n_acoes:
+                    i = len(no.filhos)
+                    no.filhos[i] = _No()
+                    novo = True
+                else:
+                    i = self._melhor_ucb(no, minimo, maximo)
+                    novo = False
+                r, terminou = self._passo(i)
+                retorno += desconto * r
+                desconto *= self.gama
+                prof += 1
+                no = no.filhos[i]
+                caminho.append(no)
+                if novo:
+                    break
+
+            retorno = self._aleatorio(retorno, desconto, prof, terminou)
+            minimo, maximo = min(minimo, retorno), max(maximo, retorno)
+            # O ambiente é determinístico: o prefixo de recompensa é igual entre
+            # irmãos, por isso basta propagar o retorno total desde a raiz
+            for n in caminho:
+                n.n += 1
+                n.soma += retorno
+
+        return max(arvore.filhos, key=lambda i: arvore.filhos[i].n)
+
+    def _melhor_ucb(self, no: _No, minimo: float, maximo: float) -> int:
+        escala = maximo - minimo if maximo > minimo else 1.0
+        log_n = math.log(no.n)
+        return max(
+            no.filhos,
+            key=lambda i: (no.filhos[i].soma / no.filhos[i].n - minimo) / escala
+            + self.c_uct * math.sqrt(log_n / no.filhos[i].n),
+        )
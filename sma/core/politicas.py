@@ -1,8 +1,17 @@
 import json
 import random
+import sqlite3
+import sys
+import numpy as np
 from pathlib import Path
-from typing import Any, Dict, Tuple
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, MutableMapping, Optional, Tuple
 from .tipos import Observacao, Accao, TipoAccao
+from .agendas import Agenda, AgendaVisitas, criar_agenda
+from .abstracao import AbstracaoEstado
+from .replay import BufferReplay, INDICE_ACAO, ORDEM_ACOES
+from .qtable_sqlite import QTabelaSQLite
+from .escritor import escrever_json_atomico
 
 
 class ModoExecucao:
@@ -26,6 +35,9 @@ class Politica:
     def set_modo(self, modo: str):
         pass
 
+    def fim_episodio(self):
+        pass
+
     def guardar(self, caminho: str):
         pass
 
@@ -38,7 +50,7 @@ class PoliticaFixa(Politica):
         self.default = default
 
     def selecionar_acao(self, estado: Observacao) -> Accao:
-        return Accao(self.default)
+        return Accao.de(self.default)
 
 
 class PoliticaFixaInteligente(Politica):
@@ -62,12 +74,12 @@ class PoliticaFixaInteligente(Politica):
         elif self.tipo_ambiente == "FORAGING":
             return self._acao_foraging(dados)
         else:
-            return Accao(TipoAccao.Stay)
+            return Accao.de(TipoAccao.Stay)
 
     def _acao_farol(self, dados: dict) -> Accao:
         """Heurística melhorada para o problema do farol: minimiza distância ao alvo."""
         if dados.get("no_farol", False):
-            return Accao(TipoAccao.Stay)
+            return Accao.de(TipoAccao.Stay)
 
         viz = dados.get("viz", {})
         dx, dy = dados.get("dir_farol", (0, 0))
@@ -87,11 +99,11 @@ class PoliticaFixaInteligente(Politica):
                 candidatos.append((nova_dist, acao_tipo))
 
         if not candidatos:
-            return Accao(TipoAccao.Stay)
+            return Accao.de(TipoAccao.Stay)
 
         random.shuffle(candidatos)
         candidatos.sort(key=lambda x: x[0])
-        return Accao(candidatos[0][1])
+        return Accao.de(candidatos[0][1])
 
     def _acao_foraging(self, dados: dict) -> Accao:
         """Heurística melhorada para foraging: minimiza distância ao alvo (recurso ou ninho)."""
@@ -102,9 +114,9 @@ class PoliticaFixaInteligente(Politica):
         no_recurso = dados.get("no_recurso", False)
 
         if no_ninho and carregando > 0:
-            return Accao(TipoAccao.Depositar)
+            return Accao.de(TipoAccao.Depositar)
         if no_recurso and carregando == 0:
-            return Accao(TipoAccao.Coletar)
+            return Accao.de(TipoAccao.Coletar)
 
         # Escolher alvo
         if carregando > 0:
@@ -127,32 +139,159 @@ class PoliticaFixaInteligente(Politica):
                 candidatos.append((nova_dist, acao_tipo))
 
         if not candidatos:
-            return Accao(TipoAccao.Stay)
+            return Accao.de(TipoAccao.Stay)
 
         random.shuffle(candidatos)
         candidatos.sort(key=lambda x: x[0])
-        return Accao(candidatos[0][1])
+        return Accao.de(candidatos[0][1])
 
 
 class PoliticaQLearning(Politica):
-    def __init__(self, acoes: Tuple[TipoAccao, ...], alfa=0.2, gama=0.95, epsilon=0.1):
+    def __init__(
+        self,
+        acoes: Tuple[TipoAccao, ...],
+        alfa=0.2,
+        gama=0.95,
+        epsilon=0.1,
+        agenda_epsilon: Optional[Agenda] = None,
+        agenda_alfa: Optional[Agenda] = None,
+    ):
         self.Q: Dict[Any, Dict[TipoAccao, float]] = {}
         self.acoes = acoes
         self.alfa = alfa
         self.gama = gama
         self.eps = epsilon
+        self.episodios_treinados = 0
+        # multiprocessing.Value partilhado no treino paralelo: as agendas seguem
+        # o total de episódios de todos os processos (None = contador local)
+        self.contador_episodios = None
+        self.ultimo_delta_q = 0.0  # maior |ΔQ| do último episódio (convergência)
+        self._delta_q_episodio = 0.0
+
+        # Agendas por episódio (None = valor constante)
+        self.agenda_epsilon = agenda_epsilon
+        self.agenda_alfa = agenda_alfa
+        # Contagem de visitas por (estado, ação), usada pelo alfa por visitas
+        self.visitas: Optional[Dict[Tuple[Any, TipoAccao], int]] = None
+        # Compactação: estados com menos visitas são descartados (0 = só zeros)
+        self.min_visitas = 0
+        self.intervalo_compactacao = 0
+        # Projeção da observação na chave de estado (None = observação completa)
+        self.abstracao: Optional[AbstracaoEstado] = None
+        # Experience replay: transições vão para o buffer e são aplicadas em lote
+        self.replay: Optional[BufferReplay] = None
+        self.tamanho_lote = 32
+        self.intervalo_replay = 4
+        self._passos_replay = 0
+        self._coluna_acao: Optional[np.ndarray] = None
+        # Nome do grupo quando a instância é partilhada por vários agentes.
+        # selecionar_acao (threads dos agentes) só insere linhas novas com
+        # setdefault, atómico sob o GIL; as atualizações Q correm na thread
+        # principal enquanto os agentes esperam na barreira.
+        self.grupo_partilha: Optional[str] = None
+        # Config do armazenamento da Q-table (ex.: {"tipo": "sqlite"}); aplicada pelo simulador
+        self.armazenamento: Optional[dict] = None
+        # Último snapshot de uma tabela SQLite, base do delta do snapshot seguinte
+        self._snapshot_sqlite: Optional[Path] = None
 
         self._modo = ModoExecucao.APRENDIZAGEM
+        self._aplicar_agendas()
+
+    def _aplicar_agendas(self):
+        """Atualiza epsilon e alfa para o episódio atual segundo as agendas."""
+        if isinstance(self.agenda_alfa, AgendaVisitas) and self.visitas is None:
+            self.visitas = {}
+        if self._modo != ModoExecucao.APRENDIZAGEM:
+            return
+        if self.agenda_epsilon is not None:
+            self.eps = self.agenda_epsilon.valor(self.episodios_treinados)
+        if self.agenda_alfa is not None:
+            self.alfa = self.agenda_alfa.valor(self.episodios_treinados)
+
+    def configurar_compactacao(self, min_visitas: int = 0, intervalo: int = 0):
+        """Ativa a remoção de estados pouco visitados e a compactação a cada N episódios."""
+        self.min_visitas = min_visitas
+        self.intervalo_compactacao = intervalo
+        if min_visitas > 0 and self.visitas is None:
+            self.visitas = {}
+
+    def configurar_replay(self, buffer: BufferReplay, lote: int = 32, intervalo: int = 4):
+        """Usa um buffer de replay (próprio ou partilhado) com atualizações em lote."""
+        self.replay = buffer
+        self.tamanho_lote = lote
+        self.intervalo_replay = max(1, intervalo)
+        self._coluna_acao = np.full(len(ORDEM_ACOES), -1, dtype=np.int64)
+        for j, a in enumerate(self.acoes):
+            self._coluna_acao[INDICE_ACAO[a]] = j
+
+    def _estados_a_remover(self, Q=None, visitas=None) -> List[Any]:
+        """
+        Estados que a compactação removeria (só zeros ou com menos de
+        min_visitas), na tabela em uso ou numa cópia de `copiar_estado`.
+        """
+        Q = self.Q if Q is None else Q
+        visitas = self.visitas if visitas is None else visitas
+        contagem: Dict[Any, int] = {}
+        if self.min_visitas > 0 and visitas:
+            for (k, _), n in visitas.items():
+                contagem[k] = contagem.get(k, 0) + n
+        return [
+            k
+            for k, acoes in Q.items()
+            if not any(acoes.values()) or contagem.get(k, self.min_visitas) < self.min_visitas
+        ]
+
+    def compactar(self) -> dict:
+        """
+        Remove linhas da Q-table que não acrescentam informação.
+
+        Linhas só com zeros são equivalentes a um estado ausente (que é lido
+        como zeros), por isso removê-las não altera a política. Com
+        min_visitas > 0 também são removidos os estados visitados menos
+        vezes do que esse limite.
+        """
+        remover = self._estados_a_remover()
+        memoria = sum(sys.getsizeof(k) + sys.getsizeof(self.Q[k]) for k in remover)
+        disco = sum(
+            len(json.dumps({k: {a.value: v for a, v in self.Q[k].items()}}, indent=2))
+            for k in remover
+        )
+        for k in remover:
+            del self.Q[k]
+        if remover and self.visitas:
+            removidos = set(remover)
+            self.visitas = {
+                chave: n for chave, n in self.visitas.items() if chave[0] not in removidos
+            }
+
+        if remover:
+            print(
+                f"Q-table compactada: -{len(remover)} estados ({len(self.Q)} restantes), "
+                f"~{memoria / 1024:.1f} KB memoria, ~{disco / 1024:.1f} KB disco"
+            )
+        return {
+            "removidos": len(remover),
+            "estados": len(self.Q),
+            "memoria_bytes": memoria,
+            "disco_bytes": disco,
+        }
 
     def _key(self, obs: Observacao) -> Any:
+        if self.abstracao is not None:
+            return self.abstracao.chave(obs.dados)
         return repr(obs.dados)
 
     def _qmax(self, k: Any) -> float:
         return max(self.Q.get(k, {}).values() or [0.0])
 
+    def _linha(self, k: Any) -> Dict[TipoAccao, float]:
+        """Linha Q do estado; só cria linhas novas em aprendizagem (TESTE não altera a tabela)."""
+        if self._modo == ModoExecucao.APRENDIZAGEM:
+            return self.Q.setdefault(k, {a: 0.0 for a in self.acoes})
+        return self.Q.get(k) or {a: 0.0 for a in self.acoes}
+
     def selecionar_acao(self, estado: Observacao) -> Accao:
-        k = self._key(estado)
-        self.Q.setdefault(k, {a: 0.0 for a in self.acoes})
+        linha = self._linha(self._key(estado))
 
         # Epsilon-greedy: durante aprendizagem, às vezes escolhe ação aleatória (explora)
         # A probabilidade é controlada por self.eps
@@ -160,8 +299,34 @@ class PoliticaQLearning(Politica):
             a = random.choice(self.acoes)
         else:
             # Escolhe a ação com maior valor Q (a melhor que conhece)
-            a = max(self.Q[k], key=self.Q[k].get)
-        return Accao(a)
+            a = max(linha, key=linha.get)
+        return Accao.de(a)
+
+    @classmethod
+    def selecionar_acoes_batch(
+        cls, politicas: List["PoliticaQLearning"], estados: List[Observacao]
+    ) -> List[Accao]:
+        """
+        `selecionar_acao` para vários agentes. Os estados são codificados
+        primeiro e a ação gulosa é calculada uma só vez por par (política,
+        chave), o que poupa trabalho quando muitos agentes partilham a
+        Q-table e estão no mesmo estado.
+        """
+        gulosas: Dict[Tuple[int, Any], TipoAccao] = {}
+        accoes: List[Accao] = []
+        for pol, estado in zip(politicas, estados):
+            k = pol._key(estado)
+            if pol._modo == ModoExecucao.APRENDIZAGEM and random.random() < pol.eps:
+                pol._linha(k)
+                accoes.append(Accao.de(random.choice(pol.acoes)))
+                continue
+            chave = (id(pol), k)
+            a = gulosas.get(chave)
+            if a is None:
+                linha = pol._linha(k)
+                a = gulosas[chave] = max(linha, key=linha.get)
+            accoes.append(Accao.de(a))
+        return accoes
 
     def atualizar(
         self,
@@ -174,15 +339,112 @@ class PoliticaQLearning(Politica):
         if self._modo != ModoExecucao.APRENDIZAGEM:
             return
 
-        k = self._key(estado)
-        k2 = self._key(prox_estado)
-        self.Q.setdefault(k, {a: 0.0 for a in self.acoes})
-        self.Q.setdefault(k2, {a: 0.0 for a in self.acoes})
+        self._aprender(self._key(estado), accao.tipo, recompensa, self._key(prox_estado))
+
+    def _aprender(self, k: Any, a: TipoAccao, recompensa: float, k2: Any):
+        """Aprende com uma transição real (k, a, r, k2), já convertida em chaves."""
+        alfa = self.alfa
+        if self.visitas is not None:
+            n = self.visitas.get((k, a), 0) + 1
+            self.visitas[(k, a)] = n
+            if isinstance(self.agenda_alfa, AgendaVisitas):
+                alfa = self.agenda_alfa.valor_visitas(n)
+
+        if self.replay is not None:
+            self.replay.adicionar(k, a, recompensa, k2)
+            self._passos_replay += 1
+            if self._passos_replay % self.intervalo_replay == 0:
+                self._aplicar_replay()
+            return
+
+        delta = self._atualizar_q(k, a, recompensa, k2, alfa)
+        if abs(delta) > self._delta_q_episodio:
+            self._delta_q_episodio = abs(delta)
+
+    def _aplicar_replay(self):
+        """
+        Atualização vetorizada de um lote amostrado do buffer de replay.
+
+        As linhas dos estados envolvidos são copiadas para um array, os alvos
+        e as variações são calculados de uma vez e só as linhas atualizadas
+        são escritas de volta. Repetições do mesmo par (s, a) no lote usam a
+        média das variações, para o passo efetivo nunca exceder alfa. Com a
+        agenda por visitas, alfa é o de cada par (s, a) amostrado.
+        """
+        if self.replay.tamanho == 0:
+            return
+        s, a, r, s2 = self.replay.amostrar(self.tamanho_lote)
+        col = self._coluna_acao[a]
+        if (col < 0).any():
+            validos = col >= 0
+            s, col, r, s2 = s[validos], col[validos], r[validos], s2[validos]
+            if len(s) == 0:
+                return
+
+        chaves = self.replay.chaves
+        unicos, inv = np.unique(np.concatenate([s, s2]), return_inverse=True)
+        linhas = np.zeros((len(unicos), len(self.acoes)))
+        for j, i in enumerate(unicos):
+            row = self.Q.get(chaves[i])
+            if row:
+                linhas[j] = [row.get(ac, 0.0) for ac in self.acoes]
+
+        n = len(s)
+        i_s, i_s2 = inv[:n], inv[n:]
+        alfa = self.alfa
+        if isinstance(self.agenda_alfa, AgendaVisitas):
+            alfa = np.array([
+                self.agenda_alfa.valor_visitas(self.visitas.get((chaves[i], self.acoes[c]), 0))
+                for i, c in zip(s.tolist(), col.tolist())
+            ])
+        alvo = r + self.gama * linhas[i_s2].max(axis=1)
+        delta = alfa * (alvo - linhas[i_s, col])
+        soma = np.zeros_like(linhas)
+        contagem = np.zeros_like(linhas)
+        np.add.at(soma, (i_s, col), delta)
+        np.add.at(contagem, (i_s, col), 1.0)
+        np.divide(soma, contagem, out=soma, where=contagem > 0)
+        linhas += soma
+
+        for j in np.unique(i_s):
+            row = self.Q.setdefault(chaves[unicos[j]], {ac: 0.0 for ac in self.acoes})
+            for ac, v in zip(self.acoes, linhas[j].tolist()):
+                row[ac] = v
+
+        maior = float(np.abs(delta).max())
+        if maior > self._delta_q_episodio:
+            self._delta_q_episodio = maior
+
+    def _atualizar_q(
+        self, k: Any, a: TipoAccao, recompensa: float, k2: Any, alfa: float
+    ) -> float:
+        """Aplica uma atualização Q-Learning às chaves dadas; devolve a variação de Q(k, a)."""
+        self.Q.setdefault(k, {ac: 0.0 for ac in self.acoes})
+        self.Q.setdefault(k2, {ac: 0.0 for ac in self.acoes})
 
         # Fórmula Q-Learning: Q(novo) = Q(antigo) + alfa * (recompensa + gama * melhor_Q_futuro - Q(antigo))
-        qsa = self.Q[k][accao.tipo]
+        qsa = self.Q[k][a]
         alvo = recompensa + self.gama * max(self.Q[k2].values())
-        self.Q[k][accao.tipo] = qsa + self.alfa * (alvo - qsa)
+        delta = alfa * (alvo - qsa)
+        self.Q[k][a] = qsa + delta
+        return delta
+
+    def fim_episodio(self):
+        if self._modo == ModoExecucao.APRENDIZAGEM:
+            if self.contador_episodios is not None:
+                with self.contador_episodios.get_lock():
+                    self.contador_episodios.value += 1
+                    self.episodios_treinados = self.contador_episodios.value
+            else:
+                self.episodios_treinados += 1
+            self._aplicar_agendas()
+            if (
+                self.intervalo_compactacao > 0
+                and self.episodios_treinados % self.intervalo_compactacao == 0
+            ):
+                self.compactar()
+        self.ultimo_delta_q = self._delta_q_episodio
+        self._delta_q_episodio = 0.0
 
     def set_modo(self, modo: str):
         self._modo = modo
@@ -190,41 +452,237 @@ class PoliticaQLearning(Politica):
             # Em teste, epsilon = 0 (só usa o que aprendeu, sem exploração)
             self.eps = 0.0
 
-    def guardar(self, caminho: str):
-        q_ser = {
-            estado: {a.value: v for a, v in acoes.items()}
-            for estado, acoes in self.Q.items()
-        }
+    def copiar_estado(self, caminho: str, compactar: bool = False) -> dict:
+        """
+        Copia a Q-table e os parâmetros para `serializar`, que pode correr
+        noutra thread enquanto o treino continua.
+
+        No ciclo de treino só se copia cada linha e o dict de visitas (cópias
+        rasas, as ações continuam TipoAccao); filtrar e converter para JSON
+        fica para `serializar`. Com compactar=True (gravação final) a tabela
+        em uso é compactada. Tabelas SQLite não são compactadas aqui (seria
+        percorrer o .db todo) e, depois do primeiro snapshot, só as linhas
+        alteradas são copiadas; o ficheiro do delta é escrito por `serializar`.
+        """
+        if compactar and not isinstance(self.Q, QTabelaSQLite):
+            self.compactar()
         dados = {
-            "Q": q_ser,
             "acoes": [a.value for a in self.acoes],
             "alfa": self.alfa,
             "gama": self.gama,
             "epsilon_original": self.eps if self._modo != ModoExecucao.TESTE else 0.1,
+            "episodios": self.episodios_treinados,
+        }
+        if isinstance(self.Q, QTabelaSQLite):
+            # Fora de memória: a tabela fica no .db ao lado do JSON (sem serializar o dict)
+            destino = Path(caminho).with_suffix(".db")
+            dados["armazenamento"] = {"tipo": "sqlite", "ficheiro": destino.name}
+            anterior = self._snapshot_sqlite
+            if destino.resolve() == Path(self.Q.caminho).resolve():
+                self.Q.sincronizar()
+            elif self.Q.tem_base and anterior is not None and anterior.parent == destino.parent:
+                # Snapshot seguinte: só as linhas alteradas, sobre o snapshot anterior
+                # (que pode ainda estar na fila do escritor)
+                dados["_alteracoes"] = (str(destino), *self.Q.copiar_alteracoes())
+                dados["armazenamento"]["base"] = anterior.name
+                self._snapshot_sqlite = Path(caminho)
+            else:
+                self.Q.exportar(str(destino))
+                self._snapshot_sqlite = Path(caminho)
+        else:
+            dados["Q"] = {estado: acoes.copy() for estado, acoes in self.Q.items()}
+        agendas = {
+            nome: agenda.para_dict()
+            for nome, agenda in (("epsilon", self.agenda_epsilon), ("alfa", self.agenda_alfa))
+            if agenda is not None
         }
-        Path(caminho).parent.mkdir(parents=True, exist_ok=True)
-        with open(caminho, "w", encoding="utf-8") as f:
-            json.dump(dados, f, indent=2)
+        if agendas:
+            dados["agendas"] = agendas
+        if self.abstracao is not None:
+            dados["abstracao"] = self.abstracao.para_dict()
+        if self.visitas:
+            dados["visitas"] = dict(self.visitas)
+        return dados
+
+    def serializar(self, dados: dict) -> dict:
+        """
+        Converte no lugar uma cópia de `copiar_estado` no dict JSON escrito
+        por `guardar`: escreve o delta SQLite pendente, retira os estados que
+        a compactação removeria e troca as ações pelos seus valores.
+        """
+        alteracoes = dados.pop("_alteracoes", None)
+        if alteracoes is not None:
+            QTabelaSQLite.escrever_alteracoes(*alteracoes)
+        Q, visitas = dados.get("Q"), dados.get("visitas")
+        filtrar = set(self._estados_a_remover(Q, visitas or {})) if Q is not None else set()
+        if Q is not None:
+            dados["Q"] = {
+                estado: {a.value: v for a, v in acoes.items()}
+                for estado, acoes in Q.items()
+                if estado not in filtrar
+            }
+        if visitas is not None:
+            visitas_ser: Dict[Any, Dict[str, int]] = {}
+            for (estado, a), n in visitas.items():
+                if estado not in filtrar:
+                    visitas_ser.setdefault(estado, {})[a.value] = n
+            dados["visitas"] = visitas_ser
+        return dados
+
+    def estado_guardar(self, caminho: str, compactar: bool = False) -> dict:
+        """Copia a Q-table e os parâmetros para um dict serializável (na thread que chama)."""
+        return self.serializar(self.copiar_estado(caminho, compactar))
+
+    def guardar(self, caminho: str):
+        escrever_json_atomico(caminho, self.estado_guardar(caminho, compactar=True), indent=2)
         print(f"Q-table guardada: {caminho}")
 
+    def usar_tabela(self, tabela: MutableMapping, copiar: bool = True):
+        """Troca o armazenamento da Q-table (ex.: memória partilhada entre processos)."""
+        if copiar:
+            tabela.update(self.Q)
+        self.Q = tabela
+
+    def compilar(self, fallback: Optional[Politica] = None) -> "PoliticaGulosa":
+        """Congela a Q-table numa tabela imutável estado -> melhor ação (para TESTE)."""
+        accoes = {a: Accao.de(a) for a in self.acoes}
+        tabela = {}
+        for k, acoes in self.Q.items():
+            melhor = max(acoes, key=acoes.get)
+            tabela[k] = accoes.setdefault(melhor, Accao.de(melhor))
+        return PoliticaGulosa(tabela, self._key, accoes[self.acoes[0]], fallback)
+
+    @staticmethod
+    def caminho_snapshot(caminho: str, episodio: int) -> str:
+        return caminho.replace(".json", f"_ep{episodio}.json")
+
     def guardar_snapshot(self, caminho: str, episodio: int):
-        """Guarda snapshot da Q-table com número do episódio."""
-        snapshot_path = caminho.replace(".json", f"_ep{episodio}.json")
-        self.guardar(snapshot_path)
+        """Guarda snapshot da Q-table com número do episódio (sem compactar a tabela em uso)."""
+        destino = self.caminho_snapshot(caminho, episodio)
+        escrever_json_atomico(destino, self.estado_guardar(destino), indent=2)
+        print(f"Q-table guardada: {destino}")
 
-    def carregar(self, caminho: str) -> bool:
+    def carregar(self, caminho: str, restaurar_estado: bool = False) -> bool:
+        """
+        Carrega a Q-table de um ficheiro.
+
+        Com restaurar_estado=True (warm-start) também repõe epsilon, alfa,
+        agendas e visitas guardados, para continuar o treino onde ficou.
+        """
         try:
             with open(caminho, "r", encoding="utf-8") as f:
                 dados = json.load(f)
-            self.Q = {
-                estado: {TipoAccao(a): v for a, v in acoes.items()}
-                for estado, acoes in dados["Q"].items()
-            }
-            print(f"Q-table carregada: {caminho} ({len(self.Q)} estados)")
-            return True
         except FileNotFoundError:
             print(f"Ficheiro nao encontrado: {caminho}")
             return False
-        except (json.JSONDecodeError, KeyError) as e:
+        except json.JSONDecodeError as e:
             print(f"Erro ao carregar: {e}")
             return False
+        return self.carregar_dados(dados, caminho, restaurar_estado)
+
+    @staticmethod
+    def _cadeia_sqlite(armazenamento: dict, pasta: Path) -> List[str]:
+        """Ficheiros .db de um snapshot SQLite: a cópia completa seguida dos deltas, por ordem."""
+        cadeia = []
+        while True:
+            origem = pasta / armazenamento["ficheiro"]
+            if not origem.exists():
+                raise FileNotFoundError(str(origem))
+            cadeia.append(str(origem))
+            base = armazenamento.get("base")
+            if not base:
+                return cadeia[::-1]
+            with open(pasta / base, "r", encoding="utf-8") as f:
+                armazenamento = json.load(f)["armazenamento"]
+
+    def carregar_dados(self, dados: dict, caminho: str, restaurar_estado: bool = False) -> bool:
+        """
+        Como `carregar`, a partir de um dict já lido (ex.: arquivo de snapshots).
+        `caminho` identifica a origem e localiza o .db de tabelas SQLite.
+        """
+        try:
+            armazenamento = dados.get("armazenamento")
+            if armazenamento and armazenamento.get("tipo") == "sqlite":
+                origem, *deltas = self._cadeia_sqlite(armazenamento, Path(caminho).parent)
+                if isinstance(self.Q, QTabelaSQLite):
+                    self.Q.importar(origem)
+                    for delta in deltas:
+                        self.Q.aplicar_alteracoes(delta)
+                else:
+                    tabela = QTabelaSQLite(origem, self.acoes)
+                    q = {k: dict(acoes) for k, acoes in tabela.items()}
+                    for delta in deltas:
+                        linhas, apagadas = tabela.ler_alteracoes(delta)
+                        q.update(linhas)
+                        for k in apagadas:
+                            q.pop(k, None)
+                    tabela.fechar()
+                    self.Q = q
+            else:
+                q = {
+                    estado: {TipoAccao(a): v for a, v in acoes.items()}
+                    for estado, acoes in dados["Q"].items()
+                }
+                if isinstance(self.Q, dict):
+                    self.Q = q
+                else:
+                    # Outro armazenamento (ex.: memória partilhada): manter e repor o conteúdo
+                    self.Q.clear()
+                    self.Q.update(q)
+            self.episodios_treinados = dados.get("episodios", 0)
+            if self.abstracao is None and dados.get("abstracao"):
+                self.abstracao = AbstracaoEstado.de_config(dados["abstracao"])
+            if restaurar_estado and self._modo == ModoExecucao.APRENDIZAGEM:
+                self.eps = dados.get("epsilon_original", self.eps)
+                self.alfa = dados.get("alfa", self.alfa)
+                agendas = dados.get("agendas", {})
+                if self.agenda_epsilon is None and "epsilon" in agendas:
+                    self.agenda_epsilon = criar_agenda(agendas["epsilon"], self.eps)
+                if self.agenda_alfa is None and "alfa" in agendas:
+                    self.agenda_alfa = criar_agenda(agendas["alfa"], self.alfa)
+                if "visitas" in dados:
+                    self.visitas = {
+                        (estado, TipoAccao(a)): n
+                        for estado, acoes in dados["visitas"].items()
+                        for a, n in acoes.items()
+                    }
+                self._aplicar_agendas()
+            print(f"Q-table carregada: {caminho} ({len(self.Q)} estados)")
+            return True
+        except FileNotFoundError as e:
+            print(f"Ficheiro nao encontrado: {e.filename or caminho}")
+            return False
+        except (json.JSONDecodeError, KeyError, sqlite3.DatabaseError) as e:
+            print(f"Erro ao carregar: {e}")
+            return False
+
+
+class PoliticaGulosa(Politica):
+    """
+    Política congelada compilada de uma Q-table treinada.
+
+    Cada passo é uma única consulta a uma tabela imutável estado -> ação,
+    sem inserir estados novos nem alocar objetos. Estados que não estão na
+    tabela usam a política de recurso, se existir; caso contrário a primeira
+    ação, tal como uma linha de zeros da Q-table.
+    """
+
+    def __init__(
+        self,
+        tabela: Dict[Any, Accao],
+        chave: Callable[[Observacao], Any],
+        accao_default: Accao,
+        fallback: Optional[Politica] = None,
+    ):
+        self.tabela = MappingProxyType(tabela)
+        self.fallback = fallback
+        self._chave = chave
+        self._default = accao_default
+
+    def selecionar_acao(self, estado: Observacao) -> Accao:
+        accao = self.tabela.get(self._chave(estado))
+        if accao is not None:
+            return accao
+        if self.fallback is not None:
+            return self.fallback.selecionar_acao(estado)
+        return self._default
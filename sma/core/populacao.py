@@ -0,0 +1,170 @@
+import numpy as np
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from .tipos import Observacao, Accao, TipoAccao
+from .agente_base import Agente
+
+
+class VistaAgente:
+    """
+    Agente leve de uma Populacao: não é uma thread e não guarda estado próprio
+    de posição/carga, lê e escreve diretamente nos arrays da população.
+
+    Expõe a mesma interface que `Agente` (posicao, carregando, politica,
+    sensores, observar, age, avaliacaoEstadoAtual, ...) para que ambientes,
+    sensores e o simulador funcionem sem alterações.
+    """
+
+    __slots__ = (
+        "_populacao", "_i", "id", "politica", "sensores", "_plano", "ninho_pos",
+        "_observacao_atual", "_accao_pronta", "_estado_anterior",
+        "_accao_anterior", "_mensagens_recebidas",
+    )
+
+    def __init__(self, populacao: "Populacao", i: int, id_: str, politica):
+        self._populacao = populacao
+        self._i = i
+        self.id = id_
+        self.politica = politica
+        self.sensores: List = []
+        self._plano = None
+        self.ninho_pos = None
+        self._observacao_atual = Observacao(dados=None)
+        self._accao_pronta = Accao.de(None)
+        self._estado_anterior: Optional[Observacao] = None
+        self._accao_anterior: Optional[Accao] = None
+        self._mensagens_recebidas: List = []
+
+    @property
+    def posicao(self) -> Tuple[int, int]:
+        x, y = self._populacao.posicoes[self._i]
+        return int(x), int(y)
+
+    @posicao.setter
+    def posicao(self, pos):
+        self._populacao.posicoes[self._i] = pos
+
+    @property
+    def posicao_inicial(self) -> Tuple[int, int]:
+        x, y = self._populacao.posicoes_iniciais[self._i]
+        return int(x), int(y)
+
+    @posicao_inicial.setter
+    def posicao_inicial(self, pos):
+        self._populacao.posicoes_iniciais[self._i] = pos
+
+    @property
+    def carregando(self) -> int:
+        return int(self._populacao.carregando[self._i])
+
+    @carregando.setter
+    def carregando(self, valor):
+        self._populacao.carregando[self._i] = valor
+
+    # Mesmo comportamento que Agente (as funções não dependem de threading)
+    instala = Agente.instala
+    observar = Agente.observar
+    observacao = Agente.observacao
+    comunica = Agente.comunica
+    obter_mensagens = Agente.obter_mensagens
+    tem_mensagens = Agente.tem_mensagens
+    avaliacaoEstadoAtual = Agente.avaliacaoEstadoAtual
+
+    def age(self) -> Accao:
+        return self.politica.selecionar_acao(self._observacao_atual)
+
+    def parar(self):
+        pass
+
+    def is_alive(self) -> bool:
+        return False
+
+
+class Populacao:
+    """
+    Estado de muitos agentes do mesmo tipo em arrays NumPy (structure of arrays).
+
+    Posições, cargas, última ação (índice em `acoes`) e última recompensa
+    ficam em arrays contíguos, e cada agente é uma `VistaAgente` sobre uma
+    linha desses arrays. Ambientes com `agir_populacao` e políticas com
+    `selecionar_acoes_populacao` tratam a população inteira de uma vez; os
+    restantes continuam a ver agentes individuais através das vistas.
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        politicas: Sequence,
+        posicoes_iniciais: Sequence[Tuple[int, int]],
+        acoes: Tuple[TipoAccao, ...],
+    ):
+        n = len(ids)
+        self.acoes = tuple(acoes)
+        self.accoes = [Accao.de(a) for a in self.acoes]
+        self.indice_acao: Dict[TipoAccao, int] = {a: i for i, a in enumerate(self.acoes)}
+
+        self.posicoes_iniciais = np.array(posicoes_iniciais, dtype=np.int32).reshape(n, 2)
+        self.posicoes = self.posicoes_iniciais.copy()
+        self.carregando = np.zeros(n, dtype=np.int32)
+        self.ultima_accao = np.full(n, self.indice_acao.get(TipoAccao.Stay, 0), dtype=np.int8)
+        self.recompensas = np.zeros(n)
+
+        self.vistas = [VistaAgente(self, i, ids[i], politicas[i]) for i in range(n)]
+
+    def __len__(self) -> int:
+        return len(self.vistas)
+
+    def reiniciar(self):
+        np.copyto(self.posicoes, self.posicoes_iniciais)
+        self.carregando.fill(0)
+        self.recompensas.fill(0.0)
+        for v in self.vistas:
+            v._estado_anterior = None
+            v._accao_anterior = None
+
+    def grupos_politica(self) -> List[Tuple[object, np.ndarray]]:
+        """(política, índices dos agentes que a usam), uma entrada por instância."""
+        grupos: Dict[int, Tuple[object, List[int]]] = {}
+        for i, v in enumerate(self.vistas):
+            grupos.setdefault(id(v.politica), (v.politica, []))[1].append(i)
+        return [(pol, np.asarray(idx)) for pol, idx in grupos.values()]
+
+    def _indices_da_politica(self, politica, indices: np.ndarray) -> np.ndarray:
+        """Converte índices nas ações da política para índices em `self.acoes`."""
+        acoes_pol = getattr(politica, "acoes", self.acoes)
+        if tuple(acoes_pol) == self.acoes:
+            return indices
+        mapa = np.array([self.indice_acao[a] for a in acoes_pol], dtype=np.int8)
+        return mapa[indices]
+
+    def selecionar_acoes(self, ambiente, decidir: Optional[Callable] = None) -> np.ndarray:
+        """
+        Escolhe a ação de todos os agentes e guarda-a em `ultima_accao`.
+
+        Grupos cuja política tem `selecionar_acoes_populacao` são decididos
+        de uma vez a partir dos arrays; os restantes observam agente a agente
+        e decidem com `decidir(vistas)` (que preenche `_accao_pronta`; por
+        omissão `age()` de cada vista), ficando com `_estado_anterior` para
+        aprender. Devolve a máscara dos agentes decididos individualmente.
+        """
+        individuais = np.zeros(len(self), dtype=bool)
+        for pol, indices in self.grupos_politica():
+            lote = getattr(pol, "selecionar_acoes_populacao", None)
+            escolhas = lote(self, indices) if lote is not None else None
+            if escolhas is not None:
+                self.ultima_accao[indices] = self._indices_da_politica(pol, escolhas)
+            else:
+                individuais[indices] = True
+
+        vistas = [self.vistas[i] for i in np.flatnonzero(individuais)]
+        for v in vistas:
+            v.observacao(v.observar(ambiente))
+            v._estado_anterior = v._observacao_atual
+        if decidir is not None:
+            decidir(vistas)
+        else:
+            for v in vistas:
+                v._accao_pronta = v.age()
+        for v in vistas:
+            v._accao_anterior = v._accao_pronta
+            self.ultima_accao[v._i] = self.indice_acao[v._accao_pronta.tipo]
+        return individuais
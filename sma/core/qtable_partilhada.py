@@ -0,0 +1,229 @@
+import hashlib
+import multiprocessing
+import numpy as np
+from collections.abc import MutableMapping
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, Optional, Tuple
+from .tipos import TipoAccao
+
+
+# Estado de cada posição da tabela de dispersão
+VAZIO, OCUPADO, REMOVIDO = 0, 1, 2
+
+
+def _dispersao(chave: str) -> int:
+    """Hash inteiro estável entre processos (hash() de str é aleatório por processo)."""
+    return int.from_bytes(
+        hashlib.blake2b(chave.encode("utf-8"), digest_size=8).digest(), "little", signed=True
+    )
+
+
+class _LinhaPartilhada(MutableMapping):
+    """Vista ação -> valor sobre uma linha da tabela partilhada (sem cópia)."""
+
+    __slots__ = ("_valores", "_indice", "_acoes")
+
+    def __init__(self, valores: np.ndarray, indice: Dict[TipoAccao, int], acoes):
+        self._valores = valores
+        self._indice = indice
+        self._acoes = acoes
+
+    def __getitem__(self, a: TipoAccao) -> float:
+        return float(self._valores[self._indice[a]])
+
+    def __setitem__(self, a: TipoAccao, v: float):
+        self._valores[self._indice[a]] = v
+
+    def __delitem__(self, a: TipoAccao):
+        raise TypeError("As linhas da Q-table partilhada têm ações fixas")
+
+    def __iter__(self):
+        return iter(self._acoes)
+
+    def __len__(self) -> int:
+        return len(self._acoes)
+
+    def values(self):
+        return self._valores.tolist()
+
+
+class QTabelaPartilhada(MutableMapping):
+    """
+    Q-table em `multiprocessing.shared_memory` para treino com vários processos.
+
+    Tabela de dispersão de capacidade fixa com endereçamento aberto (sondagem
+    linear). Cada chave de estado é reduzida a um inteiro de 64 bits estável
+    entre processos; o texto da chave também é guardado (até `largura_chave`
+    bytes) para poder gravar a tabela no formato JSON habitual.
+
+    Inserções e remoções usam um lock por faixa de posições (lock striping);
+    as atualizações de valores são feitas sem locks, ao estilo Hogwild, e uma
+    atualização concorrente ao mesmo par (estado, ação) pode perder-se.
+
+    Implementa a interface de dict usada por PoliticaQLearning (estado -> linha
+    {ação: valor}), pelo que pode substituir `politica.Q` diretamente. A
+    instância pode ser passada a processos filhos (multiprocessing), que ligam
+    ao mesmo bloco de memória.
+    """
+
+    def __init__(
+        self,
+        capacidade: int,
+        acoes: Tuple[TipoAccao, ...],
+        largura_chave: int = 512,
+        n_locks: int = 64,
+        _nome: Optional[str] = None,
+        _locks=None,
+    ):
+        self.capacidade = capacidade
+        self.acoes = tuple(acoes)
+        self.largura_chave = largura_chave
+        self._indice = {a: i for i, a in enumerate(self.acoes)}
+
+        n_acoes = len(self.acoes)
+        tamanho = capacidade * (8 * n_acoes + 8 + largura_chave + 1)
+        self._dono = _nome is None
+        if self._dono:
+            self._shm = shared_memory.SharedMemory(create=True, size=tamanho)
+            self._locks = [multiprocessing.Lock() for _ in range(n_locks)]
+        else:
+            self._shm = shared_memory.SharedMemory(name=_nome)
+            self._locks = _locks
+
+        buf = self._shm.buf
+        pos = 0
+        self._valores = np.ndarray((capacidade, n_acoes), np.float64, buf, pos)
+        pos += self._valores.nbytes
+        self._hashes = np.ndarray(capacidade, np.int64, buf, pos)
+        pos += self._hashes.nbytes
+        self._chaves = np.ndarray(capacidade, f"S{largura_chave}", buf, pos)
+        pos += self._chaves.nbytes
+        self._estado = np.ndarray(capacidade, np.int8, buf, pos)
+        if self._dono:
+            self._estado[:] = VAZIO
+
+    def __reduce__(self):
+        return (
+            QTabelaPartilhada,
+            (
+                self.capacidade,
+                self.acoes,
+                self.largura_chave,
+                len(self._locks),
+                self._shm.name,
+                self._locks,
+            ),
+        )
+
+    def _codificar(self, chave: str) -> bytes:
+        dados = chave.encode("utf-8")
+        if len(dados) > self.largura_chave:
+            raise ValueError(
+                f"Chave de estado com {len(dados)} bytes excede largura_chave={self.largura_chave}"
+            )
+        return dados
+
+    def _procurar(self, h: int, dados: bytes) -> Tuple[int, int]:
+        """Devolve (posição da chave ou -1, primeira posição livre ou -1)."""
+        livre = -1
+        i = h % self.capacidade
+        for _ in range(self.capacidade):
+            estado = self._estado[i]
+            if estado == VAZIO:
+                return -1, (i if livre < 0 else livre)
+            if estado == OCUPADO:
+                if self._hashes[i] == h and self._chaves[i] == dados:
+                    return i, livre
+            elif livre < 0:
+                livre = i
+            i = (i + 1) % self.capacidade
+        return -1, livre
+
+    def _posicao(self, chave: str) -> int:
+        return self._procurar(_dispersao(chave), self._codificar(chave))[0]
+
+    def _inserir(self, chave: str) -> int:
+        """Posição da chave, criando uma linha de zeros se ainda não existir."""
+        h, dados = _dispersao(chave), self._codificar(chave)
+        while True:
+            i, livre = self._procurar(h, dados)
+            if i >= 0:
+                return i
+            if livre < 0:
+                raise RuntimeError(
+                    f"Q-table partilhada cheia ({self.capacidade} estados); aumente a capacidade"
+                )
+            with self._locks[livre % len(self._locks)]:
+                if self._estado[livre] != OCUPADO:
+                    self._valores[livre] = 0.0
+                    self._hashes[livre] = h
+                    self._chaves[livre] = dados
+                    # Publicado por último: leitores só veem linhas completas
+                    self._estado[livre] = OCUPADO
+                    return livre
+                if self._hashes[livre] == h and self._chaves[livre] == dados:
+                    return livre
+            # Outro processo ocupou a posição com outra chave: repetir a sondagem
+
+    def _linha(self, i: int) -> _LinhaPartilhada:
+        return _LinhaPartilhada(self._valores[i], self._indice, self.acoes)
+
+    def __getitem__(self, chave: str) -> _LinhaPartilhada:
+        i = self._posicao(chave)
+        if i < 0:
+            raise KeyError(chave)
+        return self._linha(i)
+
+    def get(self, chave: str, default=None):
+        i = self._posicao(chave)
+        return self._linha(i) if i >= 0 else default
+
+    def __contains__(self, chave) -> bool:
+        return self._posicao(chave) >= 0
+
+    def setdefault(self, chave: str, default=None) -> _LinhaPartilhada:
+        # Devolve sempre a vista partilhada. A linha por omissão é ignorada (linhas
+        # novas começam a zeros) para não apagar valores que outro processo
+        # escreva entre a inserção e o retorno.
+        i = self._posicao(chave)
+        if i < 0:
+            i = self._inserir(chave)
+        return self._linha(i)
+
+    def _escrever(self, i: int, linha: Dict[TipoAccao, float]):
+        for a, v in linha.items():
+            self._valores[i, self._indice[a]] = v
+
+    def __setitem__(self, chave: str, linha: Dict[TipoAccao, float]):
+        self._escrever(self._inserir(chave), linha)
+
+    def __delitem__(self, chave: str):
+        i = self._posicao(chave)
+        if i < 0:
+            raise KeyError(chave)
+        with self._locks[i % len(self._locks)]:
+            self._estado[i] = REMOVIDO
+
+    def __iter__(self) -> Iterator[str]:
+        for i in np.flatnonzero(self._estado == OCUPADO):
+            yield self._chaves[i].decode("utf-8")
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._estado == OCUPADO))
+
+    def clear(self):
+        self._estado[:] = VAZIO
+
+    def copia(self) -> Dict[str, Dict[TipoAccao, float]]:
+        """Cópia local (dict de dicts), ex. para gravar em JSON."""
+        return {
+            self._chaves[i].decode("utf-8"): dict(zip(self.acoes, self._valores[i].tolist()))
+            for i in np.flatnonzero(self._estado == OCUPADO)
+        }
+
+    def fechar(self):
+        """Liberta as vistas e desliga deste processo; o dono também apaga o bloco."""
+        self._valores = self._hashes = self._chaves = self._estado = None
+        self._shm.close()
+        if self._dono:
+            self._shm.unlink()
@@ -0,0 +1,317 @@
+import os
+import sqlite3
+import struct
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Dict, Iterator, List, Set, Tuple
+from .tipos import TipoAccao
+
+
+class QTabelaSQLite(MutableMapping):
+    """
+    Q-table fora de memória: estados frios num ficheiro SQLite, com uma cache
+    LRU limitada (`capacidade_lru` linhas) dos estados usados recentemente.
+
+    As linhas em cache são dicts normais {ação: valor}, alterados no lugar pela
+    política; ao sair da cache (ou em `sincronizar`) são escritas na base de
+    dados (write-back). Todas as escritas ficam numa transação que só é
+    confirmada em `sincronizar`.
+
+    Implementa a interface de dict usada por PoliticaQLearning e pode ser
+    partilhada por agentes em threads diferentes (acesso protegido por lock).
+
+    Com somente_leitura=True (modo TESTE) o ficheiro é aberto só para
+    leitura: `setdefault` devolve uma linha de zeros sem a inserir e nada é
+    escrito de volta, para a avaliação não alterar a tabela treinada.
+    """
+
+    def __init__(
+        self,
+        caminho: str,
+        acoes: Tuple[TipoAccao, ...],
+        capacidade_lru: int = 10000,
+        somente_leitura: bool = False,
+    ):
+        self.caminho = str(caminho)
+        self.acoes = tuple(acoes)
+        self.capacidade_lru = max(1, capacidade_lru)
+        self.somente_leitura = somente_leitura
+        self._formato = struct.Struct(f"<{len(self.acoes)}d")
+        self._lock = threading.RLock()
+
+        if somente_leitura:
+            uri = Path(self.caminho).resolve().as_uri() + "?mode=ro"
+            self._bd = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            Path(self.caminho).parent.mkdir(parents=True, exist_ok=True)
+            self._bd = sqlite3.connect(self.caminho, check_same_thread=False)
+            self._bd.execute("CREATE TABLE IF NOT EXISTS q (chave TEXT PRIMARY KEY, valores BLOB)")
+        self._n_bd = self._bd.execute("SELECT COUNT(*) FROM q").fetchone()[0]
+
+        self._lru: "OrderedDict[str, Dict[TipoAccao, float]]" = OrderedDict()
+        self._novas: Set[str] = set()  # chaves em cache ainda sem linha na base de dados
+        # Alterações desde a última exportação (só registadas depois da primeira)
+        self._rastrear = False
+        self._escritas: Set[str] = set()
+        self._apagadas: Set[str] = set()
+
+        self.acessos = 0
+        self.acertos = 0
+        self.despejos = 0
+
+    def _codificar(self, linha: Dict[TipoAccao, float]) -> bytes:
+        return self._formato.pack(*(linha.get(a, 0.0) for a in self.acoes))
+
+    def _descodificar(self, valores: bytes) -> Dict[TipoAccao, float]:
+        return dict(zip(self.acoes, self._formato.unpack(valores)))
+
+    def _escrever_bd(self, chave: str, linha: Dict[TipoAccao, float]):
+        if self.somente_leitura:
+            return
+        if self._rastrear:
+            self._escritas.add(chave)
+            self._apagadas.discard(chave)
+        self._bd.execute(
+            "INSERT OR REPLACE INTO q (chave, valores) VALUES (?, ?)",
+            (chave, self._codificar(linha)),
+        )
+        if chave in self._novas:
+            self._novas.discard(chave)
+            self._n_bd += 1
+
+    def _guardar_cache(self, chave: str, linha: Dict[TipoAccao, float]):
+        self._lru[chave] = linha
+        self._lru.move_to_end(chave)
+        while len(self._lru) > self.capacidade_lru:
+            antiga, linha_antiga = self._lru.popitem(last=False)
+            self._escrever_bd(antiga, linha_antiga)
+            self.despejos += 1
+
+    def _obter(self, chave: str):
+        """Linha da chave (carregada para a cache), ou None se não existir."""
+        self.acessos += 1
+        linha = self._lru.get(chave)
+        if linha is not None:
+            self._lru.move_to_end(chave)
+            self.acertos += 1
+            return linha
+        res = self._bd.execute("SELECT valores FROM q WHERE chave = ?", (chave,)).fetchone()
+        if res is None:
+            return None
+        linha = self._descodificar(res[0])
+        self._guardar_cache(chave, linha)
+        return linha
+
+    def __getitem__(self, chave: str) -> Dict[TipoAccao, float]:
+        with self._lock:
+            linha = self._obter(chave)
+        if linha is None:
+            raise KeyError(chave)
+        return linha
+
+    def get(self, chave: str, default=None):
+        with self._lock:
+            linha = self._obter(chave)
+        return default if linha is None else linha
+
+    def __contains__(self, chave) -> bool:
+        with self._lock:
+            if chave in self._lru:
+                return True
+            return self._bd.execute("SELECT 1 FROM q WHERE chave = ?", (chave,)).fetchone() is not None
+
+    def setdefault(self, chave: str, default=None):
+        with self._lock:
+            linha = self._obter(chave)
+            if linha is None:
+                linha = dict(default) if default is not None else {a: 0.0 for a in self.acoes}
+                if self.somente_leitura:
+                    return linha
+                self._novas.add(chave)
+                self._guardar_cache(chave, linha)
+            return linha
+
+    def __setitem__(self, chave: str, linha: Dict[TipoAccao, float]):
+        with self._lock:
+            if chave not in self._lru and chave not in self:
+                self._novas.add(chave)
+            self._guardar_cache(chave, dict(linha))
+
+    def __delitem__(self, chave: str):
+        with self._lock:
+            em_cache = self._lru.pop(chave, None) is not None
+            if chave in self._novas:
+                self._novas.discard(chave)
+                return
+            apagadas = self._bd.execute("DELETE FROM q WHERE chave = ?", (chave,)).rowcount
+            self._n_bd -= apagadas
+            if self._rastrear:
+                self._escritas.discard(chave)
+                self._apagadas.add(chave)
+            if not (em_cache or apagadas):
+                raise KeyError(chave)
+
+    def __len__(self) -> int:
+        return self._n_bd + len(self._novas)
+
+    def __iter__(self) -> Iterator[str]:
+        for chave, _ in self.items():
+            yield chave
+
+    def items(self):
+        """Percorre todas as linhas (as da cache são devolvidas pela própria cache)."""
+        with self._lock:
+            self._escrever_cache()
+            cursor = self._bd.execute("SELECT chave, valores FROM q")
+        for chave, valores in cursor:
+            linha = self._lru.get(chave)
+            yield chave, (linha if linha is not None else self._descodificar(valores))
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            self._novas.clear()
+            self._bd.execute("DELETE FROM q")
+            self._n_bd = 0
+            # Sem base para um delta: a próxima exportação volta a ser completa
+            self._rastrear = False
+
+    def _escrever_cache(self):
+        for chave, linha in self._lru.items():
+            self._escrever_bd(chave, linha)
+
+    def sincronizar(self):
+        """Escreve as linhas em cache na base de dados e confirma a transação."""
+        if self.somente_leitura:
+            return
+        with self._lock:
+            self._escrever_cache()
+            self._bd.commit()
+
+    def exportar(self, destino: str):
+        """
+        Copia a base de dados completa para outro ficheiro (ex.: snapshots).
+        A partir daqui as alterações são registadas para `exportar_alteracoes`.
+        """
+        if Path(destino).resolve() == Path(self.caminho).resolve():
+            self.sincronizar()
+            return
+        self.sincronizar()
+        Path(destino).parent.mkdir(parents=True, exist_ok=True)
+        bd_destino = sqlite3.connect(destino)
+        try:
+            with self._lock:
+                self._bd.backup(bd_destino)
+                self._rastrear = True
+                self._escritas.clear()
+                self._apagadas.clear()
+        finally:
+            bd_destino.close()
+
+    @property
+    def tem_base(self) -> bool:
+        """Se já houve uma exportação a partir da qual se pode gravar um delta."""
+        return self._rastrear
+
+    def exportar_alteracoes(self, destino: str):
+        """
+        Grava em `destino` só as linhas escritas e as chaves apagadas desde a
+        última exportação: o custo depende das alterações (no máximo a cache
+        mais os despejos), não do tamanho da tabela.
+        """
+        self.escrever_alteracoes(destino, *self.copiar_alteracoes())
+
+    def copiar_alteracoes(self) -> Tuple[List[Tuple[str, bytes]], List[str]]:
+        """
+        Linhas (já codificadas) e chaves apagadas desde a última exportação,
+        para `escrever_alteracoes` gravar noutra thread. As linhas em cache
+        são codificadas diretamente, sem escrever nem confirmar a transação;
+        só as despejadas entretanto são lidas da base de dados.
+        """
+        with self._lock:
+            linhas = [(k, self._codificar(linha)) for k, linha in self._lru.items()]
+            escritas = [k for k in self._escritas if k not in self._lru]
+            for i in range(0, len(escritas), 500):
+                lote = escritas[i : i + 500]
+                linhas += self._bd.execute(
+                    f"SELECT chave, valores FROM q WHERE chave IN ({','.join('?' * len(lote))})",
+                    lote,
+                ).fetchall()
+            # Uma chave apagada e depois reinserida só existe na cache: não é apagada
+            apagadas = [k for k in self._apagadas if k not in self._lru]
+            self._escritas.clear()
+            self._apagadas.clear()
+        return linhas, apagadas
+
+    @staticmethod
+    def escrever_alteracoes(destino: str, linhas: List[Tuple[str, bytes]], apagadas: List[str]):
+        """Grava um delta de `copiar_alteracoes` num ficheiro SQLite próprio."""
+        Path(destino).parent.mkdir(parents=True, exist_ok=True)
+        bd_destino = sqlite3.connect(destino)
+        try:
+            bd_destino.execute("DROP TABLE IF EXISTS q")
+            bd_destino.execute("DROP TABLE IF EXISTS apagadas")
+            bd_destino.execute("CREATE TABLE q (chave TEXT PRIMARY KEY, valores BLOB)")
+            bd_destino.execute("CREATE TABLE apagadas (chave TEXT PRIMARY KEY)")
+            bd_destino.executemany("INSERT INTO q (chave, valores) VALUES (?, ?)", linhas)
+            bd_destino.executemany("INSERT INTO apagadas (chave) VALUES (?)", [(k,) for k in apagadas])
+            bd_destino.commit()
+        finally:
+            bd_destino.close()
+
+    def ler_alteracoes(self, origem: str) -> Tuple[Dict[str, Dict[TipoAccao, float]], List[str]]:
+        """Linhas e chaves apagadas de um ficheiro escrito por `exportar_alteracoes`."""
+        bd = sqlite3.connect(origem)
+        try:
+            linhas = {k: self._descodificar(v) for k, v in bd.execute("SELECT chave, valores FROM q")}
+            apagadas = [k for (k,) in bd.execute("SELECT chave FROM apagadas")]
+        finally:
+            bd.close()
+        return linhas, apagadas
+
+    def aplicar_alteracoes(self, origem: str):
+        """Aplica um delta de `exportar_alteracoes` (ex.: retomar de um snapshot)."""
+        linhas, apagadas = self.ler_alteracoes(origem)
+        with self._lock:
+            self._bd.executemany(
+                "INSERT OR REPLACE INTO q (chave, valores) VALUES (?, ?)",
+                [(k, self._codificar(linha)) for k, linha in linhas.items()],
+            )
+            self._bd.executemany("DELETE FROM q WHERE chave = ?", [(k,) for k in apagadas])
+            for k in list(linhas) + apagadas:
+                self._lru.pop(k, None)
+            self._n_bd = self._bd.execute("SELECT COUNT(*) FROM q").fetchone()[0]
+
+    def importar(self, origem: str):
+        """Substitui o conteúdo pelo de outra base de dados (ex.: retomar de um snapshot)."""
+        if Path(origem).resolve() == Path(self.caminho).resolve():
+            return
+        bd_origem = sqlite3.connect(origem)
+        try:
+            with self._lock:
+                self._lru.clear()
+                self._novas.clear()
+                self._bd.commit()
+                bd_origem.backup(self._bd)
+                self._n_bd = self._bd.execute("SELECT COUNT(*) FROM q").fetchone()[0]
+                self._rastrear = False
+        finally:
+            bd_origem.close()
+
+    def estatisticas(self) -> dict:
+        tamanho = sum(
+            os.path.getsize(c) for c in (self.caminho, self.caminho + "-journal") if os.path.exists(c)
+        )
+        return {
+            "estados": len(self),
+            "em_cache": len(self._lru),
+            "taxa_acerto": self.acertos / self.acessos if self.acessos else 0.0,
+            "despejos": self.despejos,
+            "tamanho_bd_kb": tamanho / 1024,
+        }
+
+    def fechar(self):
+        self.sincronizar()
+        self._bd.close()
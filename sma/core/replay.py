@@ -0,0 +1,77 @@
+import numpy as np
+from typing import Any, Dict, List, Tuple
+from .tipos import TipoAccao
+
+
+# Codificação inteira das ações (igual para todos os agentes, para buffers partilhados)
+ORDEM_ACOES: Tuple[TipoAccao, ...] = tuple(TipoAccao)
+INDICE_ACAO = {a: i for i, a in enumerate(ORDEM_ACOES)}
+
+
+class BufferReplay:
+    """
+    Buffer circular de transições (s, a, r, s') em arrays NumPy.
+
+    Os estados são codificados como inteiros (chave de estado -> id) e as
+    ações pelo índice em ORDEM_ACOES. Quando o buffer está cheio, as
+    transições mais antigas são substituídas. Pode ser partilhado por vários
+    agentes do mesmo tipo.
+
+    Cada id conta as transições do buffer que o usam; quando a última é
+    substituída, a chave é esquecida e o id reutilizado, por isso a memória
+    das chaves também fica limitada pela capacidade.
+    """
+
+    def __init__(self, capacidade: int = 10000):
+        self.capacidade = capacidade
+        self.s = np.zeros(capacidade, dtype=np.int32)
+        self.a = np.zeros(capacidade, dtype=np.int8)
+        self.r = np.zeros(capacidade, dtype=np.float64)
+        self.s2 = np.zeros(capacidade, dtype=np.int32)
+        self.tamanho = 0
+        self._pos = 0
+
+        self.chaves: List[Any] = []
+        self._ids: Dict[Any, int] = {}
+        self._refs: List[int] = []
+        self._livres: List[int] = []
+
+    def _codificar(self, chave: Any) -> int:
+        i = self._ids.get(chave)
+        if i is None:
+            if self._livres:
+                i = self._livres.pop()
+                self.chaves[i] = chave
+            else:
+                i = len(self.chaves)
+                self.chaves.append(chave)
+                self._refs.append(0)
+            self._ids[chave] = i
+        self._refs[i] += 1
+        return i
+
+    def _libertar(self, i: int):
+        self._refs[i] -= 1
+        if self._refs[i] == 0:
+            del self._ids[self.chaves[i]]
+            self.chaves[i] = None
+            self._livres.append(i)
+
+    def adicionar(self, k: Any, a: TipoAccao, recompensa: float, k2: Any):
+        p = self._pos
+        s, s2 = self._codificar(k), self._codificar(k2)
+        if self.tamanho == self.capacidade:
+            # Transição substituída: as suas chaves deixam de ser referidas por ela
+            self._libertar(int(self.s[p]))
+            self._libertar(int(self.s2[p]))
+        self.s[p] = s
+        self.a[p] = INDICE_ACAO[a]
+        self.r[p] = recompensa
+        self.s2[p] = s2
+        self._pos = (p + 1) % self.capacidade
+        self.tamanho = min(self.tamanho + 1, self.capacidade)
+
+    def amostrar(self, n: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Amostra n transições (com reposição)."""
+        idx = np.random.randint(0, self.tamanho, size=n)
+        return self.s[idx], self.a[idx], self.r[idx], self.s2[idx]
@@ -1,5 +1,6 @@
 import csv
 import math
+import numpy as np
 from dataclasses import dataclass, asdict
 from typing import List
 
@@ -11,6 +12,9 @@ class MetricasEpisodio:
     recompensa_descontada: float = 0.0
     sucesso: bool = False
     valor_total_depositado: float = 0.0
+    motivo_paragem: str = ""
+    ciclos_detetados: int = 0  # agentes dados como presos num ciclo
+    parado_por_ciclo: bool = False
 
 
 class RegistadorResultados:
@@ -31,6 +35,17 @@ class RegistadorResultados:
         self._fator *= self.gama
         self.ep.valor_total_depositado += valor_depositado
 
+    def registar_passos(self, recompensas):
+        """Equivalente a `registar_passo` para cada recompensa, pela mesma ordem."""
+        n = len(recompensas)
+        if n == 0:
+            return
+        fatores = self._fator * np.power(self.gama, np.arange(n))
+        self.ep.passos += n
+        self.ep.recompensa_total += float(np.sum(recompensas))
+        self.ep.recompensa_descontada += float(np.dot(fatores, recompensas))
+        self._fator *= self.gama ** n
+
     def fechar_episodio(self) -> MetricasEpisodio:
         self.historico.append(self.ep)
         return self.ep
@@ -82,6 +97,11 @@ class RegistadorResultados:
         print(f"  min: {stats['passos_min']}, max: {stats['passos_max']}")
         print(f"\nRecompensa: {stats['recompensa_media']:.2f} +/- {stats['recompensa_desvio']:.2f}")
         print(f"Recompensa desc (g={self.gama}): {stats['recompensa_descontada_media']:.2f}")
+        parados = sum(1 for ep in self.historico if ep.parado_por_ciclo)
+        if parados:
+            print(f"Episodios parados por ciclo: {parados}")
+        if self.historico[-1].motivo_paragem:
+            print(f"Paragem antecipada: {self.historico[-1].motivo_paragem}")
         print("=" * 50)
 
     def exportarCSV(self, path: str):
@@ -1,4 +1,5 @@
-from typing import Any
+from collections.abc import Mapping
+from typing import Any, Dict, Sequence
 
 
 class Sensor:
@@ -7,29 +8,102 @@ class Sensor:
     def ler(self, ambiente: Any, agente: Any) -> Any:
         raise NotImplementedError
 
+    def ler_partilhado(self, ambiente: Any, agente: Any, partilhado: Dict) -> Any:
+        """
+        Leitura dentro de um PlanoObservacao: `partilhado` guarda os resultados
+        intermédios do passo atual, comuns a todos os sensores do agente.
+        """
+        return self.ler(ambiente, agente)
+
+
+def vizinhanca_partilhada(ambiente, agente, raio: int, diagonais: bool, partilhado: Dict):
+    """`ambiente.vizinhanca` calculada uma só vez por passo para os mesmos parâmetros."""
+    chave = ("vizinhanca", raio, diagonais)
+    viz = partilhado.get(chave)
+    if viz is None:
+        viz = partilhado[chave] = ambiente.vizinhanca(
+            agente.posicao, raio, diagonais, agente=agente
+        )
+    return viz
+
+
+class PlanoObservacao:
+    """
+    Vários sensores compilados numa única leitura (fusão de sensores).
+
+    O layout é fixado na construção. Os campos do primeiro sensor ficam no
+    topo do dict, como na leitura de um só sensor (é o que as políticas leem
+    com `dados.get(...)`); a leitura de cada sensor seguinte fica inteira na
+    sua chave `chaves[i]` ("<ClasseSensor>_<i>"), pelo que sensores com as
+    mesmas chaves não se sobrepõem. Os resultados intermédios (ex.: a
+    vizinhança) são calculados uma vez e partilhados pelos sensores que os
+    pedem com os mesmos parâmetros.
+    """
+
+    def __init__(self, sensores: Sequence[Sensor]):
+        self.sensores = tuple(sensores)
+        self.chaves = tuple(f"{s.__class__.__name__}_{i}" for i, s in enumerate(self.sensores))
+        self._leitores = tuple(zip(self.chaves, (s.ler_partilhado for s in self.sensores)))
+        self._colisoes_avisadas: set = set()
+
+    def ler(self, ambiente: Any, agente: Any) -> Dict:
+        partilhado: Dict = {}
+        (chave, ler), *seguintes = self._leitores
+        principal = ler(ambiente, agente, partilhado)
+        leitura = dict(principal) if isinstance(principal, Mapping) else {chave: principal}
+        for chave, ler in seguintes:
+            if chave in leitura and chave not in self._colisoes_avisadas:
+                self._colisoes_avisadas.add(chave)
+                print(f"Aviso: campo {chave!r} do primeiro sensor substituido pela leitura do sensor {chave}")
+            leitura[chave] = ler(ambiente, agente, partilhado)
+        return leitura
+
 
 class SensorDirecaoFarol(Sensor):
     """Sensor que indica direcao para o farol e vizinhanca."""
     
-    def __init__(self, diagonais: bool = True):
+    def __init__(self, diagonais: bool = True, incluir_posicao: bool = False):
         self.diagonais = diagonais
+        # Posição absoluta ("pos"), para políticas que planeiam sobre o mapa
+        self.incluir_posicao = incluir_posicao
     
     def ler(self, ambiente, agente) -> Any:
-        dir_farol = ambiente.direcao_para_farol(agente.posicao)
         viz = ambiente.vizinhanca(agente.posicao, raio=1, diagonais=self.diagonais, agente=agente)
-        return {
+        return self._dados(ambiente, agente, viz)
+
+    def ler_partilhado(self, ambiente, agente, partilhado) -> Any:
+        viz = vizinhanca_partilhada(ambiente, agente, 1, self.diagonais, partilhado)
+        return self._dados(ambiente, agente, viz)
+
+    def _dados(self, ambiente, agente, viz) -> Any:
+        dir_farol = ambiente.direcao_para_farol(agente.posicao)
+        dados = {
             "dir_farol": dir_farol,
             "viz": viz,
             "no_farol": agente.posicao == ambiente.pos_farol,
         }
+        if self.incluir_posicao:
+            dados["pos"] = agente.posicao
+        return dados
 
 
 class SensorVizinhancaGrid(Sensor):
     """Sensor que le celulas vizinhas."""
     
-    def __init__(self, raio: int = 1, diagonais: bool = True):
+    def __init__(self, raio: int = 1, diagonais: bool = True, incluir_posicao: bool = False):
         self.raio = raio
         self.diagonais = diagonais
+        self.incluir_posicao = incluir_posicao
 
     def ler(self, ambiente, agente) -> Any:
-        return ambiente.vizinhanca(agente.posicao, self.raio, self.diagonais, agente=agente)
+        dados = ambiente.vizinhanca(agente.posicao, self.raio, self.diagonais, agente=agente)
+        if self.incluir_posicao and isinstance(dados, dict):
+            dados["pos"] = agente.posicao
+        return dados
+
+    def ler_partilhado(self, ambiente, agente, partilhado) -> Any:
+        dados = vizinhanca_partilhada(ambiente, agente, self.raio, self.diagonais, partilhado)
+        if self.incluir_posicao and isinstance(dados, dict):
+            # A vizinhança pode ser partilhada com outros sensores: não alterar a original
+            dados = {**dados, "pos": agente.posicao}
+        return dados
@@ -1,12 +1,30 @@
 import json
 import threading
+import time
 import numpy as np
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 from .ambiente_base import Ambiente
 from .agente_base import Agente
 from .resultados import RegistadorResultados
 from .politicas import ModoExecucao
+from .convergencia import MonitorConvergencia
+from .populacao import Populacao
+from .decisao import selecionar_acoes_em_lote
+from .deteccao_ciclos import DetetorCiclos
+from .escritor import EscritorAssincrono
+from .arquivo_snapshots import ArquivoSnapshots
+from .tipos import TipoAccao
+
+
+def ler_episodio_snapshot(valor) -> Union[int, str]:
+    """Valida o snapshot a retomar: "ultimo" ou o nº (>= 0) do episódio."""
+    texto = str(valor).strip().lower()
+    if texto == "ultimo":
+        return texto
+    if texto.isdigit():
+        return int(texto)
+    raise ValueError(f"snapshot invalido: {valor!r} (use o numero do episodio ou 'ultimo')")
 
 
 class MotorDeSimulacao:
@@ -23,6 +41,32 @@ class MotorDeSimulacao:
         self.diretorio_qtables: Optional[str] = None
         self._comunicacao_ativa = True
         self.snapshot_interval = 0  # 0 = desativado, N = guardar a cada N episódios
+        # Config do arquivo de snapshots (base + deltas zlib); None = um JSON por snapshot
+        self.arquivo_snapshots: Optional[dict] = None
+        self._arquivos: Dict[str, ArquivoSnapshots] = {}
+        self.checkpoint_interval = 0  # checkpoints genéticos completos a cada N episódios
+        self.retomar = False  # warm-start: carregar Q-tables existentes antes de treinar
+        self.retomar_snapshot = None  # None, "ultimo" ou nº do episódio do snapshot
+        self.episodio_inicial = 0
+        self.convergencia: Optional[MonitorConvergencia] = None  # paragem antecipada
+        self.compilar_teste = True  # em TESTE, congelar Q-tables numa tabela gulosa
+        self.fallback_teste: Optional[str] = None  # "fixa_inteligente" para estados novos
+        # Snapshots, checkpoints e políticas finais são escritos numa thread de fundo
+        self.escritor = EscritorAssincrono()
+        # False nos processos de treino paralelo: só o processo principal grava
+        self.guardar_no_fim = True
+        # False: os agentes decidem no ciclo principal, sem threads nem barreiras
+        self.usar_threads = True
+        # Sem threads: decidir por grupos de política com selecionar_acoes_batch
+        self.decisao_em_lote = True
+        self.tempo_decisao = 0.0  # segundos gastos a escolher ações (sem threads)
+        self.decisoes = 0
+        self.populacao: Optional[Populacao] = None
+        self.detetor_ciclos: Optional[DetetorCiclos] = None  # agentes presos em ciclos
+        # Orçamento da execução (None = sem limite), verificado entre episódios
+        self.orcamento_segundos: Optional[float] = None
+        self.orcamento_passos: Optional[int] = None  # passos do ambiente (um por passo do motor)
+        self.passos_totais = 0  # passos do motor, não multiplicados pelo nº de agentes
 
     @staticmethod
     def cria(cfg_path: str) -> "MotorDeSimulacao":
@@ -32,6 +76,23 @@ class MotorDeSimulacao:
         sim.episodios = cfg.get("episodios", 1)
         sim.max_passos = cfg.get("max_passos", 200)
         sim.modo = cfg.get("modo_execucao", ModoExecucao.TESTE)
+        sim.snapshot_interval = cfg.get("snapshot_interval", 0)
+        sim.checkpoint_interval = cfg.get("checkpoint_interval", 0)
+        sim.arquivo_snapshots = cfg.get("arquivo_snapshots")
+        sim.escritor.max_pendentes = cfg.get("escritas_pendentes", 4)
+        sim.retomar = cfg.get("retomar", False)
+        sim.retomar_snapshot = cfg.get("retomar_snapshot")
+        sim.compilar_teste = cfg.get("compilar_teste", True)
+        sim.fallback_teste = cfg.get("fallback_teste")
+        sim.usar_threads = cfg.get("threads", True)
+        sim.decisao_em_lote = cfg.get("decisao_lote", True)
+        orcamento = cfg.get("orcamento", {})
+        sim.orcamento_segundos = orcamento.get("segundos")
+        sim.orcamento_passos = orcamento.get("passos")
+        if cfg.get("deteccao_ciclos"):
+            sim.detetor_ciclos = DetetorCiclos.de_config(cfg["deteccao_ciclos"])
+        if cfg.get("convergencia"):
+            sim.convergencia = MonitorConvergencia.de_config(cfg["convergencia"])
         return sim
 
     def listaAgentes(self) -> List[Agente]:
@@ -61,88 +122,457 @@ class MotorDeSimulacao:
             dir_ = self.diretorio_qtables
         else:
             dir_ = str(Path(__file__).parent.parent / "qtables")
-        return str(Path(dir_) / f"qtable_{ag.id}.json")
+        # Políticas partilhadas por um grupo de agentes têm um único ficheiro
+        grupo = getattr(ag.politica, "grupo_partilha", None)
+        nome = f"partilhada_{grupo}" if grupo else ag.id
+        return str(Path(dir_) / f"qtable_{nome}.json")
+
+    def _grupos_politica(self) -> List[List[Agente]]:
+        """Agrupa os agentes pela instância de política (partilhada ou não)."""
+        grupos: Dict[int, List[Agente]] = {}
+        for ag in self.agentes:
+            grupos.setdefault(id(ag.politica), []).append(ag)
+        return list(grupos.values())
+
+    def _agentes_unicos(self) -> List[Agente]:
+        """Um agente por política, para guardar/carregar cada política uma só vez."""
+        return [grupo[0] for grupo in self._grupos_politica()]
+
+    def _caminho_linear(self, ag: Agente) -> str:
+        return self._caminho_qtable(ag).replace("qtable_", "linear_")
 
     def guardar_politicas(self):
+        """
+        Guarda as políticas finais. O estado de cada política é copiado aqui e
+        escrito pelo escritor de fundo; o método só volta com tudo em disco.
+        """
         from .politicas import PoliticaQLearning
         from .politica_genetica import PoliticaGenetica
+        from .politica_linear import PoliticaQLinear
 
         guardadas = 0
-        for ag in self.agentes:
+        for ag in self._agentes_unicos():
             if isinstance(ag.politica, PoliticaQLearning):
-                ag.politica.guardar(self._caminho_qtable(ag))
+                caminho = self._caminho_qtable(ag)
+                copia = ag.politica.copiar_estado(caminho, compactar=True)
+                self.escritor.executar(self._escrever_qtable, ag.politica, caminho, copia, 2)
                 guardadas += 1
-            elif isinstance(ag.politica, PoliticaGenetica):
+                continue
+            if isinstance(ag.politica, PoliticaGenetica):
                 caminho = self._caminho_qtable(ag).replace("qtable_", "genetico_")
-                ag.politica.guardar(caminho)
-                guardadas += 1
+                dados, mensagem = ag.politica.estado_guardar(), f"Política genética guardada: {caminho}"
+            elif isinstance(ag.politica, PoliticaQLinear):
+                caminho = self._caminho_linear(ag)
+                dados, mensagem = ag.politica.estado_guardar(), f"Pesos Q-linear guardados: {caminho}"
+            else:
+                continue
+            self.escritor.submeter(caminho, dados, indent=2, mensagem=mensagem)
+            guardadas += 1
+        self._aguardar_escritas()
         if guardadas > 0:
             print(
                 f"\nTotal: {guardadas} política(s) guardada(s) de {len(self.agentes)} agente(s)"
             )
 
     def guardar_snapshots(self, episodio: int):
-        """Guarda snapshots das Q-tables no episódio especificado."""
+        """
+        Guarda snapshots das Q-tables no episódio especificado. Só a cópia rasa
+        das linhas é feita no ciclo principal; a conversão e a escrita ficam em
+        fundo (JSON compacto).
+        """
         from .politicas import PoliticaQLearning
 
-        for ag in self.agentes:
+        for ag in self._agentes_unicos():
             if isinstance(ag.politica, PoliticaQLearning):
-                ag.politica.guardar_snapshot(self._caminho_qtable(ag), episodio)
+                caminho = PoliticaQLearning.caminho_snapshot(self._caminho_qtable(ag), episodio)
+                copia = ag.politica.copiar_estado(caminho)
+                # O delta do arquivo é calculado na thread de escrita (o arquivo guarda o snapshot anterior)
+                arquivo = self._arquivo(ag) if self.arquivo_snapshots is not None and "Q" in copia else None
+                self.escritor.executar(
+                    self._escrever_qtable, ag.politica, caminho, copia, None, episodio, arquivo
+                )
+
+    def _escrever_qtable(self, politica, caminho, copia, indent=None, episodio=None, arquivo=None):
+        """Thread de escrita: converte a cópia de `copiar_estado` e escreve-a (ou arquiva-a)."""
+        dados = politica.serializar(copia)
+        if arquivo is not None:
+            arquivo.adicionar(episodio, dados)
+        else:
+            self.escritor.escrever(caminho, dados, indent, f"Q-table guardada: {caminho}")
+
+    def _caminho_arquivo(self, ag: Agente) -> str:
+        return self._caminho_qtable(ag).replace(".json", "_snapshots")
+
+    def _arquivo(self, ag: Agente) -> ArquivoSnapshots:
+        caminho = self._caminho_arquivo(ag)
+        if caminho not in self._arquivos:
+            arquivo = ArquivoSnapshots.de_config(caminho, self.arquivo_snapshots or {})
+            arquivo.avisar = self.escritor.avisar
+            self._arquivos[caminho] = arquivo
+        return self._arquivos[caminho]
+
+    def _caminho_checkpoint(self, ag: Agente) -> str:
+        caminho = self._caminho_qtable(ag).replace("qtable_", "genetico_")
+        return caminho.replace(".json", "_checkpoint.json")
+
+    def guardar_checkpoints(self):
+        """
+        Guarda checkpoints completos das políticas genéticas (uma vez por
+        política, mesmo que partilhada), com o episódio acumulado de cada uma.
+
+        O estado é copiado no ciclo principal e a escrita em disco é feita
+        pelo escritor de fundo, para não bloquear a simulação.
+        """
+        from .politica_genetica import PoliticaGenetica
+
+        for ag in self._agentes_unicos():
+            if isinstance(ag.politica, PoliticaGenetica):
+                self.escritor.submeter(self._caminho_checkpoint(ag), ag.politica.estado_checkpoint())
+
+    def _guardar_paragem(self, ep: int):
+        """Paragem antecipada: snapshot e checkpoint do último episódio, se ainda não guardados."""
+        if self.modo != ModoExecucao.APRENDIZAGEM:
+            return
+        if self.snapshot_interval > 0 and (ep + 1) % self.snapshot_interval != 0:
+            self.guardar_snapshots(self.episodio_inicial + ep + 1)
+        if self.checkpoint_interval > 0 and (ep + 1) % self.checkpoint_interval != 0:
+            self.guardar_checkpoints()
+
+    def _aguardar_escritas(self):
+        self.escritor.aguardar()
+        self.escritor.mostrar_mensagens()
+
+    def _snapshots_disponiveis(self, ag: Agente) -> Dict[int, Union[str, ArquivoSnapshots]]:
+        """
+        Mapeia episódio -> caminho dos snapshots qtable_<id>_epN.json do agente,
+        ou -> ArquivoSnapshots para os que estão no arquivo de deltas.
+        """
+        base = Path(self._caminho_qtable(ag))
+        snapshots = {}
+        if (Path(self._caminho_arquivo(ag)) / ArquivoSnapshots.INDICE).exists():
+            arquivo = self._arquivo(ag)
+            snapshots = {ep: arquivo for ep in arquivo.episodios()}
+        for p in base.parent.glob(f"{base.stem}_ep*.json"):
+            sufixo = p.stem[len(base.stem) + 3 :]
+            if sufixo.isdigit():
+                snapshots[int(sufixo)] = str(p)
+        return snapshots
+
+    def retomar_politicas(self):
+        """
+        Warm-start: carrega as Q-tables existentes (ou um snapshot) antes de
+        treinar, repondo epsilon e o contador de episódios para que a
+        numeração dos snapshots continue a partir do treino anterior.
+        """
+        from .politicas import PoliticaQLearning
+        from .politica_linear import PoliticaQLinear
+
+        pedido = None
+        if self.retomar_snapshot is not None:
+            try:
+                pedido = ler_episodio_snapshot(self.retomar_snapshot)
+            except ValueError as e:
+                print(f"Erro: {e}; a usar as politicas finais")
+
+        unicos = self._agentes_unicos()
+        for ag in unicos:
+            if isinstance(ag.politica, PoliticaQLinear):
+                if pedido is not None:
+                    print(f"Aviso: {ag.id} usa Q-linear, sem snapshots; a retomar dos pesos finais")
+                ag.politica.carregar(self._caminho_linear(ag), restaurar_estado=True)
+
+        retomadas = [ag for ag in unicos if isinstance(ag.politica, PoliticaQLearning)]
+        for ag in retomadas:
+            caminho = self._caminho_qtable(ag)
+            episodio = None
+            if pedido is not None:
+                snapshots = self._snapshots_disponiveis(ag)
+                if pedido == "ultimo":
+                    episodio = max(snapshots, default=None)
+                elif pedido in snapshots:
+                    episodio = pedido
+                if episodio is None:
+                    print(
+                        f"Aviso: snapshot {pedido} nao encontrado para {ag.id}, a usar Q-table final"
+                    )
+                else:
+                    caminho = snapshots[episodio]
+
+            if isinstance(caminho, ArquivoSnapshots):
+                dados = caminho.reconstruir(episodio)
+                origem = str(caminho.diretorio / f"ep{episodio}")
+                carregada = ag.politica.carregar_dados(dados, origem, restaurar_estado=True)
+            else:
+                carregada = ag.politica.carregar(caminho, restaurar_estado=True)
+            if carregada and episodio is not None:
+                ag.politica.episodios_treinados = episodio
+
+        self.episodio_inicial = max(
+            (
+                ag.politica.episodios_treinados
+                for ag in self.agentes
+                if isinstance(ag.politica, (PoliticaQLearning, PoliticaQLinear))
+            ),
+            default=0,
+        )
+        if self.episodio_inicial > 0:
+            print(f"A retomar treino a partir do episodio {self.episodio_inicial}")
+
+    @staticmethod
+    def _tipo_agente(ag: Agente) -> str:
+        if "Farol" in ag.__class__.__name__ or "FAROL" in str(ag.id).upper():
+            return "FAROL"
+        return "FORAGER"
 
     def carregar_politicas(self):
         from .politicas import PoliticaFixaInteligente, PoliticaQLearning
+        from .politica_linear import PoliticaQLinear
 
-        for ag in self.agentes:
-            if isinstance(ag.politica, PoliticaQLearning):
-                sucesso = ag.politica.carregar(self._caminho_qtable(ag))
+        for grupo in self._grupos_politica():
+            ag = grupo[0]
+            nova = ag.politica
+            if isinstance(ag.politica, PoliticaQLinear):
+                sucesso = ag.politica.carregar(self._caminho_linear(ag))
                 if not sucesso and self.modo == ModoExecucao.TESTE:
-                    tipo_agente = (
-                        "FAROL"
-                        if "Farol" in ag.__class__.__name__
-                        or "FAROL" in str(ag.id).upper()
-                        else "FORAGER"
+                    print(
+                        f"Aviso: Agente {ag.id} sem pesos Q-linear, usando politica fixa inteligente"
                     )
+                    nova = PoliticaFixaInteligente(self._tipo_agente(ag))
+            elif isinstance(ag.politica, PoliticaQLearning):
+                sucesso = ag.politica.carregar(self._caminho_qtable(ag))
+                if self.modo != ModoExecucao.TESTE:
+                    continue
+                if not sucesso:
                     print(
                         f"Aviso: Agente {ag.id} sem Q-table, usando politica fixa inteligente"
                     )
-                    ag.politica = PoliticaFixaInteligente(tipo_agente)
+                    nova = PoliticaFixaInteligente(self._tipo_agente(ag))
+                elif self.compilar_teste and ag.politica.armazenamento is None:
+                    # Q-tables fora de memória ficam por compilar (não cabem num dict em RAM)
+                    fallback = None
+                    if self.fallback_teste == "fixa_inteligente":
+                        fallback = PoliticaFixaInteligente(self._tipo_agente(ag))
+                    nova = ag.politica.compilar(fallback)
+            for outro in grupo:
+                outro.politica = nova
+
+    def _preparar_armazenamento(self):
+        """Liga as Q-tables configuradas com "armazenamento" ao respetivo backend."""
+        from .politicas import PoliticaQLearning
+        from .qtable_sqlite import QTabelaSQLite
+
+        for ag in self._agentes_unicos():
+            pol = ag.politica
+            if not isinstance(pol, PoliticaQLearning) or not pol.armazenamento:
+                continue
+            if pol.armazenamento.get("tipo") != "sqlite" or isinstance(pol.Q, QTabelaSQLite):
+                continue
+            caminho = Path(self._caminho_qtable(ag)).with_suffix(".db")
+            teste = self.modo == ModoExecucao.TESTE
+            if teste and not caminho.exists():
+                continue  # carregar() avisa que não há Q-table
+            # Em TESTE só leitura: a avaliação não pode alterar a tabela treinada
+            tabela = QTabelaSQLite(
+                str(caminho), pol.acoes, pol.armazenamento.get("lru", 10000), somente_leitura=teste
+            )
+            # Treino novo começa do zero; em TESTE e --retomar o conteúdo vem de carregar()
+            if self.modo == ModoExecucao.APRENDIZAGEM and not self.retomar:
+                tabela.clear()
+            pol.usar_tabela(tabela)
+
+    def _relatorio_armazenamento(self):
+        from .qtable_sqlite import QTabelaSQLite
+
+        for ag in self._agentes_unicos():
+            tabela = getattr(ag.politica, "Q", None)
+            if isinstance(tabela, QTabelaSQLite):
+                if self.modo == ModoExecucao.APRENDIZAGEM:
+                    tabela.sincronizar()
+                est = tabela.estatisticas()
+                print(
+                    f"Q-table SQLite {ag.id}: {est['estados']} estados, "
+                    f"acertos LRU {est['taxa_acerto']:.1%}, {est['despejos']} despejos, "
+                    f"{est['tamanho_bd_kb']:.1f} KB em disco"
+                )
+
+    def usar_populacao(self, populacao: Populacao):
+        """Substitui os agentes pelas vistas de uma Populacao (corre sem threads)."""
+        self.populacao = populacao
+        self.agentes = list(populacao.vistas)
+        self.usar_threads = False
 
     def _reset_episodio(self):
-        self.ambiente.terminou = False
+        if self.populacao is not None:
+            self.populacao.reiniciar()
+            self.ambiente.reiniciar()
+        else:
+            self.ambiente.reiniciar(self.agentes)
+        if self.detetor_ciclos is not None:
+            self.detetor_ciclos.reiniciar(len(self.agentes))
+
+    def _agentes_presos(self) -> Optional[np.ndarray]:
+        """Máscara dos agentes parados pela deteção de ciclos (acao "marcar")."""
+        det = self.detetor_ciclos
+        if det is None or det.acao != "marcar" or not det.presos.any():
+            return None
+        return det.presos
+
+    def _registar_ciclos(self) -> bool:
+        """Atualiza a deteção de ciclos após um passo; True se o episódio deve acabar."""
+        if self.detetor_ciclos is None or not self.agentes:
+            return False
+        if self.populacao is not None:
+            posicoes, cargas = self.populacao.posicoes, self.populacao.carregando
+        else:
+            posicoes = [ag.posicao for ag in self.agentes]
+            cargas = [getattr(ag, "carregando", 0) for ag in self.agentes]
+        novos = self.detetor_ciclos.registar(posicoes, cargas)
+        ep = self.registador_resultados.ep
+        ep.ciclos_detetados += int(novos.sum())
+        if self.detetor_ciclos.terminar_episodio():
+            ep.parado_por_ciclo = True
+            return True
+        return False
+
+    def _passo_agentes(self):
         for ag in self.agentes:
-            ag.posicao = ag.posicao_inicial
-            if hasattr(ag, "carregando"):
-                ag.carregando = 0
-
-        if hasattr(self.ambiente, "recursos_iniciais"):
-            self.ambiente.recursos = dict(self.ambiente.recursos_iniciais)
-            self.ambiente.matriz = np.zeros(
-                (self.ambiente.altura, self.ambiente.largura), dtype=int
+            obs = ag.observar(self.ambiente)
+            ag.observacao(obs)
+            ag._estado_anterior = ag._observacao_atual
+
+        if self.usar_threads:
+            self.barreira_percepcao.wait()
+            self.barreira_acao.wait()
+        else:
+            self._decidir(self.agentes)
+
+        if hasattr(self.ambiente, "_agentes"):
+            self.ambiente._agentes = self.agentes
+        if hasattr(self.ambiente, "_simulador"):
+            self.ambiente._simulador = self
+
+        presos = self._agentes_presos()
+        for i, ag in enumerate(self.agentes):
+            if presos is not None and presos[i]:
+                continue
+            accao = ag._accao_pronta
+            ag._accao_anterior = accao
+            recomp = self.ambiente.agir(accao, ag)
+            novo_obs = ag.observar(self.ambiente)
+            ag.observacao(novo_obs)
+
+            # Processar comunicação após ação
+            if self._comunicacao_ativa and hasattr(
+                ag, "processar_comunicacao"
+            ):
+                ag.processar_comunicacao(self, self.ambiente)
+
+            ag.avaliacaoEstadoAtual(recomp)
+            val_dep = getattr(
+                self.ambiente, "get_ultimo_valor_depositado", lambda: 0.0
+            )()
+            self.registador_resultados.registar_passo(recomp, val_dep)
+
+    def _decidir(self, agentes):
+        """Etapa de decisão no ciclo principal (sem threads), cronometrada."""
+        inicio = time.perf_counter()
+        if self.decisao_em_lote:
+            accoes = selecionar_acoes_em_lote(agentes)
+        else:
+            accoes = [ag.age() for ag in agentes]
+        for ag, accao in zip(agentes, accoes):
+            ag._accao_pronta = accao
+        self.tempo_decisao += time.perf_counter() - inicio
+        self.decisoes += len(agentes)
+
+    def _relatorio_decisao(self):
+        if self.decisoes:
+            modo = "em lote" if self.decisao_em_lote else "por agente"
+            print(
+                f"Decisao ({modo}): {self.tempo_decisao * 1000:.1f} ms, "
+                f"{self.tempo_decisao / self.decisoes * 1e6:.2f} us/decisao"
             )
-            for (x, y), _ in self.ambiente.recursos.items():
-                self.ambiente.matriz[y, x] = 2
-            if hasattr(self.ambiente, "obstaculos"):
-                for (x, y), _ in self.ambiente.obstaculos.items():
-                    self.ambiente.matriz[y, x] = 9
-            if hasattr(self.ambiente, "ninho"):
-                self.ambiente.matriz[self.ambiente.ninho[1], self.ambiente.ninho[0]] = 3
+
+    def _orcamento_esgotado(self, decorrido: float) -> Optional[str]:
+        if self.orcamento_segundos is not None and decorrido >= self.orcamento_segundos:
+            return f"orcamento de tempo esgotado ({decorrido:.1f} s)"
+        if self.orcamento_passos is not None and self.passos_totais >= self.orcamento_passos:
+            return f"orcamento de passos esgotado ({self.passos_totais} passos)"
+        return None
+
+    def _relatorio_debito(self, episodios: int, decorrido: float):
+        """Episódios/s, passos/s e tempo previsto para completar `episodios`."""
+        if episodios == 0 or decorrido <= 0:
+            return
+        ep_s = episodios / decorrido
+        print(
+            f"Debito: {ep_s:.2f} episodios/s, {self.passos_totais / decorrido:.1f} passos/s "
+            f"({episodios} episodios em {decorrido:.1f} s)"
+        )
+        if episodios < self.episodios:
+            previsto = self.episodios / ep_s
+            print(
+                f"Tempo previsto para {self.episodios} episodios: {previsto:.1f} s "
+                f"(faltam {previsto - decorrido:.1f} s)"
+            )
+
+    def _passo_populacao(self):
+        """Passo da Populacao: decisões e ações em lote sempre que suportado."""
+        pop = self.populacao
+        individuais = pop.selecionar_acoes(self.ambiente, self._decidir)
+        presos = self._agentes_presos()
+        if presos is not None:
+            # Agentes presos ficam no lugar, sem recompensa nem aprendizagem
+            pop.ultima_accao[presos] = pop.indice_acao[TipoAccao.Stay]
+            individuais &= ~presos
+
+        if hasattr(self.ambiente, "agir_populacao"):
+            pop.recompensas[:] = self.ambiente.agir_populacao(pop)
+            if presos is not None:
+                pop.recompensas[presos] = 0.0
+                self.registador_resultados.registar_passos(pop.recompensas[~presos])
+            else:
+                self.registador_resultados.registar_passos(pop.recompensas)
+        else:
+            for i, v in enumerate(self.agentes):
+                if presos is not None and presos[i]:
+                    pop.recompensas[i] = 0.0
+                    continue
+                pop.recompensas[i] = self.ambiente.agir(pop.accoes[pop.ultima_accao[i]], v)
+                val_dep = getattr(
+                    self.ambiente, "get_ultimo_valor_depositado", lambda: 0.0
+                )()
+                self.registador_resultados.registar_passo(float(pop.recompensas[i]), val_dep)
+
+        # Só quem decidiu a partir de observações precisa do novo estado para aprender
+        for i in np.flatnonzero(individuais):
+            v = self.agentes[i]
+            v.observacao(v.observar(self.ambiente))
+            v.avaliacaoEstadoAtual(float(pop.recompensas[i]))
 
     def executa(self):
         self._propagar_modo()
+        self._preparar_armazenamento()
 
         if self.modo == ModoExecucao.TESTE:
             self.carregar_politicas()
+        elif self.retomar:
+            self.retomar_politicas()
 
-        n_participantes = len(self.agentes) + 1
-        self.barreira_percepcao = threading.Barrier(n_participantes)
-        self.barreira_acao = threading.Barrier(n_participantes)
-
-        for a in self.agentes:
-            a._barreira_percepcao = self.barreira_percepcao
-            a._barreira_acao = self.barreira_acao
-            if not a.is_alive():
-                a.start()
+        if self.usar_threads:
+            n_participantes = len(self.agentes) + 1
+            self.barreira_percepcao = threading.Barrier(n_participantes)
+            self.barreira_acao = threading.Barrier(n_participantes)
 
+            for a in self.agentes:
+                a._barreira_percepcao = self.barreira_percepcao
+                a._barreira_acao = self.barreira_acao
+                if not a.is_alive():
+                    a.start()
+
+        inicio = time.perf_counter()
+        self.passos_totais = 0
+        executados = 0
         try:
             for ep in range(self.episodios):
                 self.registador_resultados.iniciar_episodio()
@@ -150,37 +580,11 @@ class MotorDeSimulacao:
                 self._reset_episodio()
 
                 for _ in range(self.max_passos):
-                    for ag in self.agentes:
-                        obs = ag.observar(self.ambiente)
-                        ag.observacao(obs)
-                        ag._estado_anterior = ag._observacao_atual
-
-                    self.barreira_percepcao.wait()
-                    self.barreira_acao.wait()
-
-                    if hasattr(self.ambiente, "_agentes"):
-                        self.ambiente._agentes = self.agentes
-                    if hasattr(self.ambiente, "_simulador"):
-                        self.ambiente._simulador = self
-
-                    for ag in self.agentes:
-                        accao = ag._accao_pronta
-                        ag._accao_anterior = accao
-                        recomp = self.ambiente.agir(accao, ag)
-                        novo_obs = ag.observar(self.ambiente)
-                        ag.observacao(novo_obs)
-
-                        # Processar comunicação após ação
-                        if self._comunicacao_ativa and hasattr(
-                            ag, "processar_comunicacao"
-                        ):
-                            ag.processar_comunicacao(self, self.ambiente)
-
-                        ag.avaliacaoEstadoAtual(recomp)
-                        val_dep = getattr(
-                            self.ambiente, "get_ultimo_valor_depositado", lambda: 0.0
-                        )()
-                        self.registador_resultados.registar_passo(recomp, val_dep)
+                    if self.populacao is not None:
+                        self._passo_populacao()
+                    else:
+                        self._passo_agentes()
+                    self.passos_totais += 1
 
                     self.ambiente.atualizacao()
 
@@ -194,45 +598,85 @@ class MotorDeSimulacao:
                         sucesso = True
                         break
 
+                    if self._registar_ciclos():
+                        break
+
                 met = self.registador_resultados.fechar_episodio()
                 met.sucesso = sucesso
+                executados += 1
 
                 if self.visualizador:
                     self.visualizador.render(self.ambiente, self.agentes)
 
+                ciclos = f", ciclos={met.ciclos_detetados}" if met.ciclos_detetados else ""
                 print(
-                    f"Ep {ep + 1}/{self.episodios}: passos={met.passos}, recomp={met.recompensa_total:.2f}, sucesso={met.sucesso}",
+                    f"Ep {ep + 1}/{self.episodios}: passos={met.passos}, recomp={met.recompensa_total:.2f}, sucesso={met.sucesso}{ciclos}",
                     flush=True,
                 )
 
+                # Callback de fim de episódio (ex.: troca de indivíduo na genética)
+                for ag in self._agentes_unicos():
+                    ag.politica.fim_episodio()
+
                 # Guardar snapshots periódicos durante aprendizagem
                 if (
                     self.modo == ModoExecucao.APRENDIZAGEM
                     and self.snapshot_interval > 0
                     and (ep + 1) % self.snapshot_interval == 0
                 ):
-                    self.guardar_snapshots(ep + 1)
+                    self.guardar_snapshots(self.episodio_inicial + ep + 1)
 
-                # Callback para política genética (troca de indivíduo)
-                from .politica_genetica import PoliticaGenetica
+                # Checkpoints genéticos completos (escritos em segundo plano)
+                if (
+                    self.modo == ModoExecucao.APRENDIZAGEM
+                    and self.checkpoint_interval > 0
+                    and (ep + 1) % self.checkpoint_interval == 0
+                ):
+                    self.guardar_checkpoints()
+
+                # Mensagens da thread de escrita (ficheiros gravados, erros)
+                self.escritor.mostrar_mensagens()
+
+                # Paragem antecipada quando o treino convergiu
+                if self.modo == ModoExecucao.APRENDIZAGEM and self.convergencia:
+                    motivo = self.convergencia.registar_episodio(
+                        self.registador_resultados.historico,
+                        [ag.politica for ag in self.agentes],
+                    )
+                    if motivo:
+                        met.motivo_paragem = motivo
+                        print(f"Treino parado no episodio {ep + 1}: {motivo}")
+                        self._guardar_paragem(ep)
+                        break
 
-                for ag in self.agentes:
-                    if isinstance(ag.politica, PoliticaGenetica):
-                        ag.politica.fim_episodio()
+                # Orçamento de tempo/passos: parar entre episódios, com snapshot final
+                motivo = self._orcamento_esgotado(time.perf_counter() - inicio)
+                if motivo and ep + 1 < self.episodios:
+                    met.motivo_paragem = motivo
+                    print(f"Execucao parada no episodio {ep + 1}: {motivo}")
+                    self._guardar_paragem(ep)
+                    break
 
         finally:
             for a in self.agentes:
                 a.parar()
-            try:
-                self.barreira_percepcao.abort()
-                self.barreira_acao.abort()
-            except threading.BrokenBarrierError:
-                pass
+            if self.usar_threads:
+                try:
+                    self.barreira_percepcao.abort()
+                    self.barreira_acao.abort()
+                except threading.BrokenBarrierError:
+                    pass
+            self._aguardar_escritas()
 
         self.registador_resultados.imprimir_resumo()
+        self._relatorio_debito(executados, time.perf_counter() - inicio)
+        self._relatorio_decisao()
 
-        if self.modo == ModoExecucao.APRENDIZAGEM:
+        if self.modo == ModoExecucao.APRENDIZAGEM and self.guardar_no_fim:
             self.guardar_politicas()
+        self.escritor.fechar()
+        self.escritor.mostrar_mensagens()
+        self._relatorio_armazenamento()
 
         if self.visualizador:
             self.visualizador.finalizar()
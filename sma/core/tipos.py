@@ -14,14 +14,22 @@ class TipoAccao(Enum):
     Depositar = "Depositar"
 
 
-@dataclass
+@dataclass(slots=True)
 class Observacao:
     """Observacao do ambiente."""
     dados: Any
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Accao:
-    """Accao a executar."""
+    """Accao a executar (imutável: as sem parâmetros são partilhadas, ver `Accao.de`)."""
     tipo: TipoAccao
     parametros: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def de(cls, tipo: Optional[TipoAccao]) -> "Accao":
+        """Instância única da ação sem parâmetros do tipo dado (sem alocar)."""
+        return _ACCOES[tipo]
+
+
+_ACCOES: Dict[Optional[TipoAccao], Accao] = {t: Accao(t) for t in (*TipoAccao, None)}
@@ -1,4 +1,5 @@
 import json
+import numpy as np
 from pathlib import Path
 
 from sma.core.simulador import MotorDeSimulacao
@@ -9,6 +10,15 @@ from sma.core.politicas import (
     ModoExecucao,
 )
 from sma.core.politica_genetica import PoliticaGenetica
+from sma.core.politica_linear import PoliticaQLinear
+from sma.core.politica_dyna import PoliticaDynaQ
+from sma.core.politica_iteracao_valor import PoliticaIteracaoValor
+from sma.core.politica_campo_fluxo import PoliticaCampoFluxo
+from sma.core.politica_mcts import PoliticaMCTS
+from sma.core.agendas import criar_agenda
+from sma.core.abstracao import AbstracaoEstado
+from sma.core.replay import BufferReplay
+from sma.core.populacao import Populacao
 from sma.core.tipos import TipoAccao
 from sma.core.sensores import SensorDirecaoFarol, SensorVizinhancaGrid
 from sma.ambientes.farol import AmbienteFarol
@@ -27,16 +37,80 @@ ACOES_FAROL = (
 ACOES_FORAGER = (*ACOES_FAROL, TipoAccao.Coletar, TipoAccao.Depositar)
 
 
-def criar_politica(cfg_pol, modo, tipo_agente):
+def configurar_replay(pol, cfg_replay, tipo_agente, partilha):
+    """Liga a política a um buffer de replay próprio ou partilhado pelo tipo de agente."""
+    capacidade = cfg_replay.get("capacidade", 10000)
+    if cfg_replay.get("partilhado", False) and partilha is not None:
+        buffer = partilha.setdefault(("replay", tipo_agente), BufferReplay(capacidade))
+    else:
+        buffer = BufferReplay(capacidade)
+    pol.configurar_replay(
+        buffer, cfg_replay.get("lote", 32), cfg_replay.get("intervalo", 4)
+    )
+
+
+# Políticas que planeiam sobre o mapa e precisam da posição na observação
+POLITICAS_COM_POSICAO = ("iteracao_valor", "campo_fluxo", "mcts")
+
+
+def criar_politica(cfg_pol, modo, tipo_agente, partilha=None, ambiente=None):
     tipo = cfg_pol.get("tipo", "fixa")
 
-    if tipo == "qlearning":
+    if tipo in ("qlearning", "dyna_q"):
+        # Agentes do mesmo tipo com o mesmo "grupo_partilha" usam a mesma política
+        grupo = cfg_pol.get("grupo_partilha")
+        chave_grupo = ("politica", tipo_agente, grupo)
+        if grupo and partilha is not None and chave_grupo in partilha:
+            return partilha[chave_grupo]
+
         acoes = ACOES_FAROL if tipo_agente == "FAROL" else ACOES_FORAGER
-        pol = PoliticaQLearning(
+        params = dict(
+            agenda_epsilon=criar_agenda(
+                cfg_pol.get("epsilon_agenda"), cfg_pol.get("epsilon", 0.1)
+            ),
+            agenda_alfa=criar_agenda(cfg_pol.get("alfa_agenda"), cfg_pol.get("alfa", 0.2)),
+        )
+        if tipo == "dyna_q":
+            params.update(
+                passos_planeamento=cfg_pol.get("passos_planeamento", 10),
+                max_modelo=cfg_pol.get("max_modelo", 10000),
+                prioritizado=cfg_pol.get("prioritizado", False),
+                limiar_prioridade=cfg_pol.get("limiar_prioridade", 0.01),
+            )
+        classe = PoliticaDynaQ if tipo == "dyna_q" else PoliticaQLearning
+        pol = classe(
             acoes,
             cfg_pol.get("alfa", 0.2),
             cfg_pol.get("gama", 0.95),
             cfg_pol.get("epsilon", 0.1),
+            **params,
+        )
+        if "replay" in cfg_pol:
+            configurar_replay(pol, cfg_pol["replay"], tipo_agente, partilha)
+        if "armazenamento" in cfg_pol:
+            pol.armazenamento = cfg_pol["armazenamento"]
+        if "compactacao" in cfg_pol:
+            pol.configurar_compactacao(
+                cfg_pol["compactacao"].get("min_visitas", 0),
+                cfg_pol["compactacao"].get("intervalo", 0),
+            )
+        pol.set_modo(modo)
+        if grupo and partilha is not None:
+            pol.grupo_partilha = f"{tipo_agente.lower()}_{grupo}"
+            partilha[chave_grupo] = pol
+        return pol
+
+    if tipo == "qlearning_linear":
+        acoes = ACOES_FAROL if tipo_agente == "FAROL" else ACOES_FORAGER
+        pol = PoliticaQLinear(
+            acoes,
+            cfg_pol.get("alfa", 0.01),
+            cfg_pol.get("gama", 0.95),
+            cfg_pol.get("epsilon", 0.1),
+            agenda_epsilon=criar_agenda(
+                cfg_pol.get("epsilon_agenda"), cfg_pol.get("epsilon", 0.1)
+            ),
+            agenda_alfa=criar_agenda(cfg_pol.get("alfa_agenda"), cfg_pol.get("alfa", 0.01)),
         )
         pol.set_modo(modo)
         return pol
@@ -48,10 +122,61 @@ def criar_politica(cfg_pol, modo, tipo_agente):
             pop_size=cfg_pol.get("pop_size", 20),
             taxa_mutacao=cfg_pol.get("taxa_mutacao", 0.1),
             taxa_crossover=cfg_pol.get("taxa_crossover", 0.7),
+            semente=cfg_pol.get("semente"),
+            taxa_exploracao=cfg_pol.get("taxa_exploracao", 0.1),
         )
+        if cfg_pol.get("checkpoint"):
+            pol.carregar_checkpoint(cfg_pol["checkpoint"])
         pol.set_modo(modo)
         return pol
 
+    if tipo == "iteracao_valor":
+        if not isinstance(ambiente, AmbienteFarol):
+            print("Aviso: iteracao_valor so suporta o ambiente FAROL, usando politica fixa inteligente")
+            return PoliticaFixaInteligente(tipo_agente)
+        # A solução depende só do mapa e dos parâmetros: uma instância por combinação
+        params = {
+            "gama": cfg_pol.get("gama", 0.95),
+            "tolerancia": cfg_pol.get("tolerancia", 1e-6),
+            "arranque_bfs": cfg_pol.get("arranque_bfs", True),
+            "max_iteracoes": cfg_pol.get("max_iteracoes", 100000),
+        }
+        chave = ("iteracao_valor", *params.values())
+        if partilha is not None and chave in partilha:
+            return partilha[chave]
+        pol = PoliticaIteracaoValor(ambiente, ACOES_FAROL, **params)
+        if partilha is not None:
+            partilha[chave] = pol
+        return pol
+
+    if tipo == "campo_fluxo":
+        if ambiente is None:
+            print("Aviso: campo_fluxo requer o ambiente, usando politica fixa inteligente")
+            return PoliticaFixaInteligente(tipo_agente)
+        chave = ("campo_fluxo", tipo_agente)
+        if partilha is not None and chave in partilha:
+            return partilha[chave]
+        pol = PoliticaCampoFluxo(ambiente, tipo_agente)
+        if partilha is not None:
+            partilha[chave] = pol
+        return pol
+
+    if tipo == "mcts":
+        if ambiente is None:
+            print("Aviso: mcts requer o ambiente, usando politica fixa inteligente")
+            return PoliticaFixaInteligente(tipo_agente)
+        # Uma instância por agente: cada uma simula numa cópia privada do ambiente
+        return PoliticaMCTS(
+            ambiente,
+            ACOES_FAROL if tipo_agente == "FAROL" else ACOES_FORAGER,
+            simulacoes=cfg_pol.get("simulacoes", 100),
+            profundidade=cfg_pol.get("profundidade", 20),
+            gama=cfg_pol.get("gama", 0.95),
+            c_uct=cfg_pol.get("c_uct", 1.4),
+            modo=cfg_pol.get("modo", "uct"),
+            semente=cfg_pol.get("semente"),
+        )
+
     if tipo == "fixa_inteligente":
         return PoliticaFixaInteligente(tipo_agente)
 
@@ -60,35 +185,143 @@ def criar_politica(cfg_pol, modo, tipo_agente):
     return PoliticaFixa(acao)
 
 
-def criar_agente_farol(cfg, modo, idx):
+def configurar_abstracao(pol, cfg, tipo_agente, id_agente, ambiente=None):
+    """Aplica a abstração de estado do agente (chave "abstracao") a políticas tabulares."""
+    if "abstracao" not in cfg or not isinstance(pol, PoliticaQLearning):
+        return
+
+    pol.abstracao = AbstracaoEstado.de_config(cfg["abstracao"])
+    # "viz" vem do primeiro sensor (ver PlanoObservacao)
+    padrao = "direcao_farol" if tipo_agente == "FAROL" else "vizinhanca"
+    esp = (cfg.get("sensores") or [{"tipo": padrao}])[0]
+    diagonais = esp.get("diagonais", cfg.get("sensor_diagonais", True))
+    raio = 1 if esp.get("tipo") == "direcao_farol" else esp.get("raio", cfg.get("sensor_raio", 1))
+    dominios = {}
+    if ambiente is not None and hasattr(ambiente, "recursos_iniciais"):
+        # Sem carga (0) ou com o valor de um dos recursos do mapa
+        dominios["carregando"] = len(set(ambiente.recursos_iniciais.values())) + 1
+    tamanho = pol.abstracao.tamanho_espaco(tipo_agente, diagonais, raio, dominios)
+    original = AbstracaoEstado().tamanho_espaco(tipo_agente, diagonais, raio, dominios)
+    print(
+        f"Abstracao de estado {id_agente}: {tamanho or 'ilimitado'} estados "
+        f"(sem abstracao: {original or 'ilimitado'})"
+    )
+
+
+def criar_sensores(cfg, tipo_agente, incluir_posicao=False):
+    """
+    Sensores do agente: a lista "sensores" da config (ex.: [{"tipo":
+    "direcao_farol"}, {"tipo": "vizinhanca", "raio": 2}]) ou, sem ela, o
+    sensor por omissão do tipo de agente. Com vários sensores o agente
+    compila-os num PlanoObservacao.
+    """
+    padrao = "direcao_farol" if tipo_agente == "FAROL" else "vizinhanca"
+    sensores = []
+    for esp in cfg.get("sensores") or [{"tipo": padrao}]:
+        diagonais = esp.get("diagonais", cfg.get("sensor_diagonais", True))
+        if esp.get("tipo") == "direcao_farol":
+            sensores.append(
+                SensorDirecaoFarol(diagonais=diagonais, incluir_posicao=incluir_posicao)
+            )
+        elif esp.get("tipo") == "vizinhanca":
+            sensores.append(
+                SensorVizinhancaGrid(
+                    raio=esp.get("raio", cfg.get("sensor_raio", 1)),
+                    diagonais=diagonais,
+                    incluir_posicao=incluir_posicao,
+                )
+            )
+        else:
+            print(f"Aviso: sensor desconhecido {esp.get('tipo')}, ignorado")
+    return sensores
+
+
+def criar_agente_farol(cfg, modo, idx, partilha=None, ambiente=None):
     cfg_pol = cfg.get("politica", {"tipo": "fixa"})
-    pol = criar_politica(cfg_pol, modo, "FAROL")
+    pol = criar_politica(cfg_pol, modo, "FAROL", partilha, ambiente)
+    configurar_abstracao(pol, cfg, "FAROL", cfg.get("id", f"A{idx}"), ambiente)
 
     ag = AgenteFarol(cfg.get("id", f"A{idx}"), pol)
     pos = tuple(cfg.get("posicao_inicial", [0, 0]))
     ag.posicao = pos
     ag.posicao_inicial = pos
-    ag.instala(SensorDirecaoFarol(diagonais=cfg.get("sensor_diagonais", True)))
+    for sensor in criar_sensores(cfg, "FAROL", cfg_pol.get("tipo") in POLITICAS_COM_POSICAO):
+        ag.instala(sensor)
     return ag
 
 
-def criar_agente_forager(cfg, modo, ninho, idx):
+def criar_agente_forager(cfg, modo, ninho, idx, partilha=None, ambiente=None):
     cfg_pol = cfg.get("politica", {"tipo": "fixa"})
-    pol = criar_politica(cfg_pol, modo, "FORAGER")
+    pol = criar_politica(cfg_pol, modo, "FORAGER", partilha, ambiente)
+    configurar_abstracao(pol, cfg, "FORAGER", cfg.get("id", f"F{idx}"), ambiente)
 
     ag = AgenteForager(cfg.get("id", f"F{idx}"), pol, ninho_pos=ninho)
     pos = tuple(cfg.get("posicao_inicial", [0, 0]))
     ag.posicao = pos
     ag.posicao_inicial = pos
-    ag.instala(
-        SensorVizinhancaGrid(
-            raio=cfg.get("sensor_raio", 1),
-            diagonais=cfg.get("sensor_diagonais", True),
-        )
-    )
+    for sensor in criar_sensores(cfg, "FORAGER", cfg_pol.get("tipo") in POLITICAS_COM_POSICAO):
+        ag.instala(sensor)
     return ag
 
 
+def _posicoes_aleatorias(ambiente, n, semente=None):
+    """n posições livres (sem obstáculo, farol, ninho ou recurso), com repetição."""
+    ocupadas = set(getattr(ambiente, "obstaculos", ()))
+    ocupadas |= set(getattr(ambiente, "recursos_iniciais", ()))
+    for attr in ("pos_farol", "ninho"):
+        if hasattr(ambiente, attr):
+            ocupadas.add(tuple(getattr(ambiente, attr)))
+    livres = [
+        (x, y)
+        for y in range(ambiente.altura)
+        for x in range(ambiente.largura)
+        if (x, y) not in ocupadas
+    ]
+    rng = np.random.default_rng(semente)
+    return [livres[i] for i in rng.integers(len(livres), size=n)]
+
+
+def criar_populacao(cfg_pop, modo, tipo_agente, ambiente, partilha=None):
+    """
+    Cria uma Populacao de `tamanho` agentes do mesmo tipo (chave "populacao").
+
+    Todos os agentes usam a mesma instância de política; as Q-tables ficam
+    num único ficheiro (grupo "populacao").
+    """
+    n = cfg_pop.get("tamanho", 100)
+    cfg_pol = cfg_pop.get("politica", {"tipo": "fixa"})
+    pol = criar_politica(cfg_pol, modo, tipo_agente, partilha, ambiente)
+    if isinstance(pol, (PoliticaGenetica, PoliticaQLinear)):
+        # Guardam a última ação e a observação de um só agente: partilhadas
+        # por toda a população misturariam o estado de agentes diferentes
+        print(
+            f"Aviso: {cfg_pol.get('tipo')} nao pode ser partilhada pela populacao, "
+            "usando politica fixa inteligente"
+        )
+        pol = PoliticaFixaInteligente(tipo_agente)
+    if isinstance(pol, PoliticaQLearning) and not pol.grupo_partilha:
+        pol.grupo_partilha = f"{tipo_agente.lower()}_populacao"
+    configurar_abstracao(pol, cfg_pop, tipo_agente, "populacao", ambiente)
+
+    posicoes = cfg_pop.get("posicoes_iniciais", "aleatorias")
+    if posicoes == "aleatorias":
+        posicoes = _posicoes_aleatorias(ambiente, n, cfg_pop.get("semente"))
+    else:
+        posicoes = [tuple(posicoes[i % len(posicoes)]) for i in range(n)]
+
+    prefixo = "A" if tipo_agente == "FAROL" else "F"
+    acoes = ACOES_FAROL if tipo_agente == "FAROL" else ACOES_FORAGER
+    pop = Populacao([f"{prefixo}{i}" for i in range(n)], [pol] * n, posicoes, acoes)
+
+    incluir_posicao = cfg_pol.get("tipo") in POLITICAS_COM_POSICAO
+    for v in pop.vistas:
+        if tipo_agente != "FAROL":
+            v.ninho_pos = ambiente.ninho
+        for sensor in criar_sensores(cfg_pop, tipo_agente, incluir_posicao):
+            v.instala(sensor)
+    return pop
+
+
 def carregar_simulacao(cfg_path, visual=None, episodios=None):
     with open(cfg_path, "r", encoding="utf-8") as f:
         cfg = json.load(f)
@@ -97,6 +330,8 @@ def carregar_simulacao(cfg_path, visual=None, episodios=None):
     tipo = cfg["ambiente"]["tipo"]
     modo = cfg.get("modo_execucao", ModoExecucao.TESTE)
     agentes_cfg = cfg.get("agentes", {})
+    # Objetos partilhados entre agentes desta simulação (buffers de replay, Q-tables)
+    partilha = {}
 
     if episodios is not None:
         sim.episodios = episodios
@@ -110,14 +345,18 @@ def carregar_simulacao(cfg_path, visual=None, episodios=None):
             obstaculos=[tuple(o) for o in obs_cfg] if obs_cfg else None,
         )
 
-        if isinstance(agentes_cfg, dict) and "pos_iniciais" in agentes_cfg:
+        if "populacao" in cfg:
+            sim.usar_populacao(
+                criar_populacao(cfg["populacao"], modo, "FAROL", sim.ambiente, partilha)
+            )
+        elif isinstance(agentes_cfg, dict) and "pos_iniciais" in agentes_cfg:
             for i, pos in enumerate(agentes_cfg["pos_iniciais"]):
                 sim.agentes.append(
                     criar_agente_farol({"posicao_inicial": pos}, modo, i)
                 )
         else:
             for i, ac in enumerate(agentes_cfg):
-                sim.agentes.append(criar_agente_farol(ac, modo, i))
+                sim.agentes.append(criar_agente_farol(ac, modo, i, partilha, sim.ambiente))
 
     elif tipo == "FORAGING":
         recursos = {(r["x"], r["y"]): r["valor"] for r in cfg["ambiente"]["recursos"]}
@@ -129,14 +368,20 @@ def carregar_simulacao(cfg_path, visual=None, episodios=None):
             recursos=recursos,
         )
 
-        if isinstance(agentes_cfg, dict) and "pos_iniciais" in agentes_cfg:
+        if "populacao" in cfg:
+            sim.usar_populacao(
+                criar_populacao(cfg["populacao"], modo, "FORAGER", sim.ambiente, partilha)
+            )
+        elif isinstance(agentes_cfg, dict) and "pos_iniciais" in agentes_cfg:
             for i, pos in enumerate(agentes_cfg["pos_iniciais"]):
                 sim.agentes.append(
                     criar_agente_forager({"posicao_inicial": pos}, modo, ninho, i)
                 )
         else:
             for i, ac in enumerate(agentes_cfg):
-                sim.agentes.append(criar_agente_forager(ac, modo, ninho, i))
+                sim.agentes.append(
+                    criar_agente_forager(ac, modo, ninho, i, partilha, sim.ambiente)
+                )
 
     usar_visual = visual if visual is not None else cfg.get("visualizar", False)
     if usar_visual:
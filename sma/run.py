@@ -1,13 +1,21 @@
 #!/usr/bin/env python3
 """
 Script principal para correr as simulacoes.
-Uso: python -m sma.run [farol|foraging] [--visual] [--episodios N]
+Uso: python -m sma.run [farol|foraging] [--visual] [--episodios N] [--retomar] [--processos N] [--tempo-max SEG] [--passos-max N]
 """
 import argparse
 import sys
 from pathlib import Path
 
 from sma.loader import carregar_simulacao
+from sma.core.simulador import ler_episodio_snapshot
+
+
+def _episodio_snapshot(valor: str):
+    try:
+        return ler_episodio_snapshot(valor)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
 
 
 def main():
@@ -19,6 +27,11 @@ def main():
     parser.add_argument("--output", "-o", type=str, help="Ficheiro CSV para resultados")
     parser.add_argument("--auto-export", action="store_true", help="Exportar CSV automaticamente após execução")
     parser.add_argument("--gerar-analise", action="store_true", help="Gerar análise e gráficos automaticamente")
+    parser.add_argument("--retomar", action="store_true", help="Continuar treino a partir das Q-tables existentes")
+    parser.add_argument("--processos", "-p", type=int, default=1, help="Treinar Q-Learning em N processos com Q-tables partilhadas")
+    parser.add_argument("--retomar-snapshot", type=_episodio_snapshot, metavar="N|ultimo", help="Continuar treino a partir de um snapshot qtable_<id>_epN.json")
+    parser.add_argument("--tempo-max", type=float, metavar="SEG", help="Parar (e guardar) ao fim de SEG segundos, entre episodios")
+    parser.add_argument("--passos-max", type=int, metavar="N", help="Parar (e guardar) ao fim de N passos do ambiente, entre episodios")
     
     args = parser.parse_args()
     
@@ -33,8 +46,28 @@ def main():
         print(f"Erro: config nao encontrado: {cfg_path}")
         return 1
     
-    sim = carregar_simulacao(str(cfg_path), visual=args.visual, episodios=args.episodios)
-    sim.executa()
+    if args.processos > 1:
+        from sma.treino_paralelo import treinar_paralelo
+        sim = treinar_paralelo(
+            str(cfg_path),
+            args.processos,
+            episodios=args.episodios,
+            retomar=args.retomar or args.retomar_snapshot is not None,
+            retomar_snapshot=args.retomar_snapshot,
+            orcamento_segundos=args.tempo_max,
+            orcamento_passos=args.passos_max,
+        )
+    else:
+        sim = carregar_simulacao(str(cfg_path), visual=args.visual, episodios=args.episodios)
+        if args.retomar or args.retomar_snapshot is not None:
+            sim.retomar = True
+        if args.retomar_snapshot is not None:
+            sim.retomar_snapshot = args.retomar_snapshot
+        if args.tempo_max is not None:
+            sim.orcamento_segundos = args.tempo_max
+        if args.passos_max is not None:
+            sim.orcamento_passos = args.passos_max
+        sim.executa()
     
     if args.output:
         out = base / args.output
@@ -0,0 +1,160 @@
+"""
+Treino Q-Learning com vários processos sobre Q-tables em memória partilhada.
+Uso: python -m sma.run farol --processos 4
+"""
+import json
+import multiprocessing
+import queue
+import random
+import time
+import numpy as np
+
+from sma.loader import carregar_simulacao
+from sma.core.politicas import ModoExecucao, PoliticaQLearning
+from sma.core.qtable_partilhada import QTabelaPartilhada
+
+
+def _trabalhador(cfg_path, episodios, tabelas, contadores, semente, fila, orcamento):
+    """Corre episódios num processo, a aprender diretamente nas tabelas partilhadas."""
+    random.seed(semente)
+    np.random.seed(semente)
+    historico = []
+    try:
+        sim = carregar_simulacao(cfg_path, visual=False, episodios=episodios)
+        # Leitura/gravação de ficheiros fica a cargo do processo principal
+        sim.retomar = False
+        sim.snapshot_interval = 0
+        sim.checkpoint_interval = 0
+        sim.guardar_no_fim = False
+        sim.orcamento_segundos, sim.orcamento_passos = orcamento
+        for ag in sim._agentes_unicos():
+            caminho = sim._caminho_qtable(ag)
+            if isinstance(ag.politica, PoliticaQLearning) and caminho in tabelas:
+                pol = ag.politica
+                pol.armazenamento = None
+                pol.usar_tabela(tabelas[caminho], copiar=False)
+                # Compactar apagaria linhas em uso pelos outros processos
+                pol.intervalo_compactacao = 0
+                # Episódios contados em conjunto por todos os processos
+                pol.contador_episodios = contadores[caminho]
+                pol.episodios_treinados = contadores[caminho].value
+                pol._aplicar_agendas()
+        sim.executa()
+        historico = sim.registador_resultados.historico
+    finally:
+        fila.put(historico)
+
+
+def _guardar_tabelas(sim, tabelas, contadores):
+    """Grava cada tabela partilhada no ficheiro qtable habitual."""
+    for ag in sim._agentes_unicos():
+        caminho = sim._caminho_qtable(ag)
+        if caminho in tabelas:
+            ag.politica.Q = tabelas[caminho].copia()
+            ag.politica.episodios_treinados = contadores[caminho].value
+            ag.politica._aplicar_agendas()
+            ag.politica.guardar(caminho)
+
+
+def treinar_paralelo(
+    cfg_path: str,
+    processos: int,
+    episodios=None,
+    retomar=False,
+    retomar_snapshot=None,
+    orcamento_segundos=None,
+    orcamento_passos=None,
+):
+    """
+    Divide os episódios de treino por `processos` processos que atualizam as
+    mesmas Q-tables em memória partilhada (uma por política Q-Learning).
+
+    Config opcional "memoria_partilhada": capacidade (nº de estados por
+    tabela), largura_chave (bytes) e intervalo_checkpoint (segundos entre
+    gravações intermédias, 0 = só no fim).
+
+    O orçamento (argumentos ou config "orcamento") aplica-se à execução
+    inteira: o tempo vale para cada processo, que correm em simultâneo, e os
+    passos são divididos pelos processos.
+    """
+    with open(cfg_path, "r", encoding="utf-8") as f:
+        opcoes = json.load(f).get("memoria_partilhada", {})
+    capacidade = opcoes.get("capacidade", 65536)
+    largura_chave = opcoes.get("largura_chave", 512)
+    intervalo_checkpoint = opcoes.get("intervalo_checkpoint", 0)
+
+    sim = carregar_simulacao(cfg_path, visual=False, episodios=episodios)
+    if sim.modo != ModoExecucao.APRENDIZAGEM:
+        print("Erro: treino paralelo requer modo_execucao APRENDIZAGEM")
+        return sim
+    sim._propagar_modo()
+    if orcamento_segundos is not None:
+        sim.orcamento_segundos = orcamento_segundos
+    if orcamento_passos is not None:
+        sim.orcamento_passos = orcamento_passos
+    if retomar:
+        sim.retomar = True
+        sim.retomar_snapshot = retomar_snapshot
+    if sim.retomar:
+        sim.retomar_politicas()
+
+    tabelas = {}
+    contadores = {}
+    for ag in sim._agentes_unicos():
+        if isinstance(ag.politica, PoliticaQLearning):
+            caminho = sim._caminho_qtable(ag)
+            tabela = QTabelaPartilhada(capacidade, ag.politica.acoes, largura_chave)
+            tabela.update(ag.politica.Q)
+            tabelas[caminho] = tabela
+            contadores[caminho] = multiprocessing.Value("q", ag.politica.episodios_treinados)
+        else:
+            print(f"Aviso: {ag.id} nao usa Q-Learning tabular; nao sera guardado no treino paralelo")
+    if not tabelas:
+        print("Erro: nenhuma politica Q-Learning para treinar em paralelo")
+        return sim
+
+    total = sim.episodios
+    processos = max(1, min(processos, total))
+    fila = multiprocessing.Queue()
+    trabalhadores = []
+    for p in range(processos):
+        n = total // processos + (1 if p < total % processos else 0)
+        passos = None
+        if sim.orcamento_passos is not None:
+            passos = sim.orcamento_passos // processos + (1 if p < sim.orcamento_passos % processos else 0)
+        proc = multiprocessing.Process(
+            target=_trabalhador,
+            args=(
+                cfg_path, n, tabelas, contadores, random.randrange(2**32), fila,
+                (sim.orcamento_segundos, passos),
+            ),
+        )
+        proc.start()
+        trabalhadores.append(proc)
+    print(f"Treino paralelo: {total} episodios em {processos} processos")
+
+    historico = []
+    recebidos = 0
+    ultimo_checkpoint = time.monotonic()
+    try:
+        while recebidos < processos:
+            try:
+                historico.extend(fila.get(timeout=1.0))
+                recebidos += 1
+            except queue.Empty:
+                if not any(p.is_alive() for p in trabalhadores) and fila.empty():
+                    print("Aviso: processos de treino terminaram sem resultados")
+                    break
+            if intervalo_checkpoint > 0 and time.monotonic() - ultimo_checkpoint >= intervalo_checkpoint:
+                _guardar_tabelas(sim, tabelas, contadores)
+                ultimo_checkpoint = time.monotonic()
+        for proc in trabalhadores:
+            proc.join()
+
+        sim.registador_resultados.historico.extend(historico)
+        sim.registador_resultados.imprimir_resumo()
+        _guardar_tabelas(sim, tabelas, contadores)
+    finally:
+        for tabela in tabelas.values():
+            tabela.fechar()
+    return sim
@@ -0,0 +1,136 @@
+import copy
+import json
+import random
+
+import pytest
+
+from sma.core.arquivo_snapshots import ArquivoSnapshots, episodios_a_manter
+from sma.core.politicas import PoliticaQLearning
+from sma.core.tipos import TipoAccao
+
+
+def _evoluir(dados: dict, episodio: int, rng: random.Random) -> dict:
+    """Snapshot seguinte (como o de estado_guardar): linhas novas, alteradas e removidas."""
+    novo = copy.deepcopy(dados)
+    novo["episodios"] = episodio
+    novo["epsilon_original"] = round(rng.random(), 3)
+    q, visitas = novo["Q"], novo.setdefault("visitas", {})
+    for _ in range(rng.randint(1, 4)):
+        k = f"s{rng.randrange(40)}"
+        q[k] = {a: round(rng.uniform(-1, 1), 3) for a in ("N", "S", "E", "O")}
+        visitas.setdefault(k, {})["N"] = rng.randint(1, 9)
+    for k in rng.sample(sorted(q), min(len(q), rng.randint(0, 2))):
+        del q[k]
+        visitas.pop(k, None)
+    if not visitas:
+        del novo["visitas"]
+    return novo
+
+
+def _serie(n: int, semente: int = 0):
+    rng = random.Random(semente)
+    dados = {"acoes": ["N", "S", "E", "O"], "alfa": 0.1, "Q": {}}
+    for ep in range(1, n + 1):
+        dados = _evoluir(dados, ep, rng)
+        # Ida e volta por JSON, como os ficheiros escritos
+        yield ep, json.loads(json.dumps(dados))
+
+
+def _verificar(arquivo: ArquivoSnapshots, esperados: dict):
+    for ep in arquivo.episodios():
+        assert arquivo.reconstruir(ep) == esperados[ep], f"episodio {ep}"
+
+
+def test_bases_e_deltas_sem_retencao(tmp_path):
+    arquivo = ArquivoSnapshots(str(tmp_path / "arq"), manter_ultimos=None, intervalo_base=3)
+    esperados = {}
+    for ep, dados in _serie(10):
+        arquivo.adicionar(ep, copy.deepcopy(dados))
+        esperados[ep] = dados
+
+    assert arquivo.episodios() == list(range(1, 11))
+    assert [e["base"] for e in arquivo.entradas] == [True, False, False] * 3 + [True]
+    _verificar(arquivo, esperados)
+    with pytest.raises(KeyError):
+        arquivo.reconstruir(11)
+
+
+@pytest.mark.parametrize("manter_ultimos,intervalo_base", [(1, 2), (2, 4), (3, 50)])
+def test_retencao_mantem_os_restantes_reconstruiveis(tmp_path, manter_ultimos, intervalo_base):
+    diretorio = tmp_path / "arq"
+    arquivo = ArquivoSnapshots(str(diretorio), manter_ultimos, intervalo_base)
+    esperados = {}
+    adicionados = []
+    for ep, dados in _serie(40, semente=manter_ultimos):
+        arquivo.adicionar(ep, copy.deepcopy(dados))
+        esperados[ep] = dados
+        adicionados.append(ep)
+        # Depois de cada remoção (delta composto com o seguinte) tudo o que resta reconstrói
+        _verificar(arquivo, esperados)
+
+    assert arquivo.episodios()[-manter_ultimos:] == adicionados[-manter_ultimos:]
+    assert arquivo.entradas[0]["base"]
+    assert len(arquivo.episodios()) < len(adicionados)
+    # Só ficam em disco os ficheiros das entradas retidas
+    ficheiros = {p.name for p in diretorio.iterdir()} - {ArquivoSnapshots.INDICE}
+    assert ficheiros == {e["ficheiro"] for e in arquivo.entradas}
+
+
+def test_reabrir_o_arquivo_continua_a_cadeia(tmp_path):
+    diretorio = str(tmp_path / "arq")
+    esperados = {}
+    serie = list(_serie(12))
+    arquivo = ArquivoSnapshots(diretorio, manter_ultimos=3, intervalo_base=5)
+    for ep, dados in serie[:6]:
+        arquivo.adicionar(ep, copy.deepcopy(dados))
+        esperados[ep] = dados
+
+    reaberto = ArquivoSnapshots(diretorio, manter_ultimos=3, intervalo_base=5)
+    assert reaberto.episodios() == arquivo.episodios()
+    for ep, dados in serie[6:]:
+        reaberto.adicionar(ep, copy.deepcopy(dados))
+        esperados[ep] = dados
+    _verificar(reaberto, esperados)
+
+
+def test_retomar_de_um_snapshot_anterior_descarta_os_seguintes(tmp_path):
+    arquivo = ArquivoSnapshots(str(tmp_path / "arq"), manter_ultimos=None, intervalo_base=4)
+    arquivo.avisar = lambda mensagem: None
+    esperados = {}
+    for ep, dados in _serie(6):
+        arquivo.adicionar(ep, copy.deepcopy(dados))
+        esperados[ep] = dados
+
+    # Treino retomado do episódio 3: o novo episódio 4 substitui o histórico a partir daí
+    _, novo = next(_serie(1, semente=99))
+    arquivo.adicionar(4, copy.deepcopy(novo))
+    esperados[4] = novo
+    assert arquivo.episodios() == [1, 2, 3, 4]
+    _verificar(arquivo, esperados)
+
+
+def test_ida_e_volta_da_politica_pelo_arquivo(tmp_path):
+    acoes = (TipoAccao.MoverN, TipoAccao.MoverS)
+    pol = PoliticaQLearning(acoes)
+    pol.configurar_compactacao(min_visitas=1)
+    arquivo = ArquivoSnapshots(str(tmp_path / "arq"), manter_ultimos=2, intervalo_base=3)
+    caminho = str(tmp_path / "qtable.json")
+    esperados = {}
+    for ep in range(1, 8):
+        for i in range(ep):
+            estado, accao = f"s{i}", acoes[i % 2]
+            pol.Q.setdefault(estado, {a: 0.0 for a in acoes})[accao] += 1.0
+            pol.visitas[(estado, accao)] = pol.visitas.get((estado, accao), 0) + 1
+        arquivo.adicionar(ep, pol.estado_guardar(caminho))
+        esperados[ep] = ({k: dict(v) for k, v in pol.Q.items()}, dict(pol.visitas))
+
+    for ep in arquivo.episodios():
+        carregada = PoliticaQLearning(acoes)
+        assert carregada.carregar_dados(arquivo.reconstruir(ep), caminho, restaurar_estado=True)
+        assert ({k: dict(v) for k, v in carregada.Q.items()}, carregada.visitas) == esperados[ep]
+
+
+def test_episodios_a_manter():
+    assert episodios_a_manter([], 2) == set()
+    # Os 2 últimos e o mais antigo de cada intervalo de idade 2^k
+    assert episodios_a_manter(list(range(1, 17)), 2) == {1, 9, 13, 15, 16}
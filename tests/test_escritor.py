@@ -0,0 +1,28 @@
+import json
+import threading
+
+from sma.core.escritor import EscritorAssincrono
+
+
+def _falhar():
+    raise RuntimeError("falha no trabalho")
+
+
+def test_trabalho_falhado_nao_bloqueia_escritor(tmp_path):
+    escritor = EscritorAssincrono(max_pendentes=1)
+
+    def escrever():
+        escritor.executar(_falhar)
+        # Dados não serializáveis: TypeError dentro da thread de escrita
+        escritor.submeter(str(tmp_path / "invalido.json"), {"x": object()})
+        escritor.submeter(str(tmp_path / "ok.json"), {"x": 1})
+        escritor.aguardar()
+
+    # Com a thread de escrita morta, submeter()/aguardar() bloqueariam para sempre
+    t = threading.Thread(target=escrever, daemon=True)
+    t.start()
+    t.join(timeout=5)
+    assert not t.is_alive()
+    assert escritor.erros == 2
+    assert json.loads((tmp_path / "ok.json").read_text()) == {"x": 1}
+    escritor.fechar()
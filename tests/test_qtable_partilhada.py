@@ -0,0 +1,114 @@
+import multiprocessing
+
+import pytest
+
+from sma.core.politicas import PoliticaQLearning
+from sma.core.qtable_partilhada import QTabelaPartilhada
+from sma.core.tipos import TipoAccao
+
+ACOES = (TipoAccao.MoverN, TipoAccao.MoverS, TipoAccao.MoverE, TipoAccao.MoverO)
+
+
+@pytest.fixture
+def criar_tabela():
+    tabelas = []
+
+    def criar(capacidade=16, **opcoes):
+        tabela = QTabelaPartilhada(capacidade, ACOES, **opcoes)
+        tabelas.append(tabela)
+        return tabela
+
+    yield criar
+    for tabela in tabelas:
+        tabela.fechar()
+
+
+def test_inserir_e_procurar(criar_tabela):
+    tabela = criar_tabela()
+    linha = tabela.setdefault("s0", {a: 5.0 for a in ACOES})
+    # Linhas novas começam a zeros (a linha por omissão é ignorada)
+    assert dict(linha) == {a: 0.0 for a in ACOES}
+
+    # A linha devolvida é uma vista: escrever nela altera a tabela
+    linha[TipoAccao.MoverE] = 1.5
+    assert tabela["s0"][TipoAccao.MoverE] == 1.5
+    assert tabela.setdefault("s0")[TipoAccao.MoverE] == 1.5
+
+    tabela["s1"] = {TipoAccao.MoverN: -2.0}
+    assert tabela.get("s1")[TipoAccao.MoverN] == -2.0
+    assert tabela.get("s2") is None
+    assert "s1" in tabela and "s2" not in tabela
+    with pytest.raises(KeyError):
+        tabela["s2"]
+    assert len(tabela) == 2
+    assert sorted(tabela) == ["s0", "s1"]
+
+
+def test_sondagem_linear_com_tabela_cheia(criar_tabela):
+    tabela = criar_tabela(capacidade=4)
+    # Encher todas as posições: as chaves que colidem ficam na posição livre seguinte
+    for i in range(4):
+        tabela[f"s{i}"] = {TipoAccao.MoverN: float(i)}
+    assert len(tabela) == 4
+    for i in range(4):
+        assert tabela[f"s{i}"][TipoAccao.MoverN] == float(i)
+
+    with pytest.raises(RuntimeError, match="cheia"):
+        tabela.setdefault("s4")
+    # Procurar uma chave ausente numa tabela cheia termina sem a inserir
+    assert "s4" not in tabela
+    assert tabela.get("s0")[TipoAccao.MoverN] == 0.0
+
+
+def test_remocao_deixa_as_restantes_acessiveis(criar_tabela):
+    tabela = criar_tabela(capacidade=4)
+    for i in range(4):
+        tabela[f"s{i}"] = {TipoAccao.MoverS: float(i)}
+    del tabela["s1"]
+    assert "s1" not in tabela
+    assert len(tabela) == 3
+    # A posição removida não corta a sondagem das chaves seguintes
+    for i in (0, 2, 3):
+        assert tabela[f"s{i}"][TipoAccao.MoverS] == float(i)
+
+    # e é reutilizada pela inserção seguinte
+    tabela["s4"] = {TipoAccao.MoverS: 4.0}
+    assert len(tabela) == 4
+    assert tabela["s4"][TipoAccao.MoverS] == 4.0
+    with pytest.raises(KeyError):
+        del tabela["s1"]
+
+
+def test_chave_demasiado_longa(criar_tabela):
+    tabela = criar_tabela(largura_chave=8)
+    with pytest.raises(ValueError, match="largura_chave"):
+        tabela.setdefault("x" * 9)
+
+
+def _escrever_no_filho(tabela):
+    tabela.setdefault("filho")[TipoAccao.MoverO] = 3.0
+    tabela["s0"][TipoAccao.MoverN] += 1.0
+
+
+def test_processo_filho_ve_a_mesma_memoria(criar_tabela):
+    tabela = criar_tabela()
+    tabela["s0"] = {TipoAccao.MoverN: 1.0}
+    proc = multiprocessing.Process(target=_escrever_no_filho, args=(tabela,))
+    proc.start()
+    proc.join(timeout=30)
+    assert proc.exitcode == 0
+    assert tabela["filho"][TipoAccao.MoverO] == 3.0
+    assert tabela["s0"][TipoAccao.MoverN] == 2.0
+
+
+def test_ida_e_volta_pela_politica(criar_tabela):
+    pol = PoliticaQLearning(ACOES)
+    pol.Q = {
+        f"s{i}": {a: float(i * len(ACOES) + j) for j, a in enumerate(ACOES)} for i in range(10)
+    }
+    original = {k: dict(linha) for k, linha in pol.Q.items()}
+
+    tabela = criar_tabela()
+    pol.usar_tabela(tabela)
+    assert pol.Q is tabela
+    assert tabela.copia() == original
@@ -0,0 +1,120 @@
+import pytest
+
+from sma.core.escritor import escrever_json_atomico
+from sma.core.politicas import PoliticaQLearning
+from sma.core.qtable_sqlite import QTabelaSQLite
+from sma.core.tipos import TipoAccao
+
+ACOES = (TipoAccao.MoverN, TipoAccao.MoverS, TipoAccao.MoverE, TipoAccao.MoverO)
+
+
+@pytest.fixture
+def criar_tabela(tmp_path):
+    tabelas = []
+
+    def criar(nome="q.db", **opcoes):
+        tabela = QTabelaSQLite(str(tmp_path / nome), ACOES, **opcoes)
+        tabelas.append(tabela)
+        return tabela
+
+    yield criar
+    for tabela in tabelas:
+        tabela._bd.close()
+
+
+def _conteudo(tabela):
+    return {k: dict(linha) for k, linha in tabela.items()}
+
+
+def test_despejo_lru_escreve_as_linhas_alteradas(criar_tabela):
+    tabela = criar_tabela(capacidade_lru=2)
+    for i in range(5):
+        # As linhas são alteradas no lugar, como faz a política
+        tabela.setdefault(f"s{i}")[TipoAccao.MoverE] = float(i)
+    assert tabela.despejos == 3
+    assert len(tabela._lru) == 2
+    assert len(tabela) == 5
+
+    # As linhas despejadas voltam da base de dados com os valores alterados
+    for i in range(5):
+        assert tabela[f"s{i}"][TipoAccao.MoverE] == float(i)
+    assert "s9" not in tabela
+
+    tabela.sincronizar()
+    reaberta = criar_tabela(capacidade_lru=2)
+    assert _conteudo(reaberta) == _conteudo(tabela)
+
+
+def test_remover_linha_em_cache_e_na_base(criar_tabela):
+    tabela = criar_tabela(capacidade_lru=1)
+    tabela["a"] = {TipoAccao.MoverN: 1.0}
+    tabela["b"] = {TipoAccao.MoverN: 2.0}  # despeja "a"
+    del tabela["a"]
+    del tabela["b"]  # nunca chegou à base de dados
+    assert len(tabela) == 0
+    with pytest.raises(KeyError):
+        del tabela["a"]
+
+
+def test_somente_leitura_nao_altera_a_tabela(criar_tabela):
+    tabela = criar_tabela()
+    tabela["s0"] = {TipoAccao.MoverN: 1.0}
+    tabela.sincronizar()
+
+    leitura = criar_tabela(somente_leitura=True)
+    linha = leitura.setdefault("novo")
+    linha[TipoAccao.MoverS] = 5.0
+    assert "novo" not in leitura
+    assert leitura["s0"][TipoAccao.MoverN] == 1.0
+    assert len(leitura) == 1
+
+
+def test_cadeia_de_deltas_reconstroi_a_tabela(criar_tabela, tmp_path):
+    tabela = criar_tabela(capacidade_lru=3)
+    for i in range(6):
+        tabela.setdefault(f"s{i}")[TipoAccao.MoverN] = float(i)
+    tabela.exportar(str(tmp_path / "base.db"))
+    assert tabela.tem_base
+
+    # Alterações desde a base: linhas em cache, linhas despejadas, remoções
+    tabela["s0"][TipoAccao.MoverS] = 10.0
+    for i in range(6, 9):
+        tabela.setdefault(f"s{i}")[TipoAccao.MoverE] = float(i)
+    del tabela["s2"]
+    tabela.exportar_alteracoes(str(tmp_path / "d1.db"))
+    esperado_d1 = _conteudo(tabela)
+
+    # Apagada e depois reinserida só em cache: o delta não a pode apagar
+    del tabela["s3"]
+    tabela.setdefault("s3")[TipoAccao.MoverO] = 3.5
+    del tabela["s7"]
+    tabela.exportar_alteracoes(str(tmp_path / "d2.db"))
+    esperado_d2 = _conteudo(tabela)
+
+    copia = criar_tabela("copia.db", capacidade_lru=3)
+    copia.importar(str(tmp_path / "base.db"))
+    copia.aplicar_alteracoes(str(tmp_path / "d1.db"))
+    assert _conteudo(copia) == esperado_d1
+    copia.aplicar_alteracoes(str(tmp_path / "d2.db"))
+    assert _conteudo(copia) == esperado_d2
+    assert len(copia) == len(tabela)
+
+
+def test_snapshots_da_politica_ida_e_volta(criar_tabela, tmp_path):
+    pol = PoliticaQLearning(ACOES)
+    pol.Q = criar_tabela(capacidade_lru=4)
+    snapshots = {}
+    for ep in range(1, 4):
+        for i in range(ep * 3):
+            pol.Q.setdefault(f"s{i}")[ACOES[ep % len(ACOES)]] += float(ep)
+        if ep == 2:
+            del pol.Q["s0"]
+        caminho = str(tmp_path / f"qtable_ep{ep}.json")
+        # Primeiro snapshot completo, os seguintes só com as alterações
+        escrever_json_atomico(caminho, pol.estado_guardar(caminho))
+        snapshots[caminho] = _conteudo(pol.Q)
+
+    for caminho, esperado in snapshots.items():
+        carregada = PoliticaQLearning(ACOES)
+        assert carregada.carregar(caminho)
+        assert {k: dict(linha) for k, linha in carregada.Q.items()} == esperado